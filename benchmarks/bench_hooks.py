@@ -0,0 +1,55 @@
+import pytest
+
+
+def noop(i):
+    return i
+
+
+@pytest.mark.benchmark(group="hook")
+def test_call_plain(benchmark):
+    """
+    Call of the no-op function without any wrapping as reference.
+    """
+    benchmark(noop, 1)
+
+
+@pytest.mark.benchmark(group="hook")
+def test_call_no_logger(benchmark, pads):
+    """
+    Call of a tracked no-op function on an anchor without any loggers.
+    """
+    fn = pads.decorators.track(event=["bench_none"])(noop)
+    benchmark(fn, 1)
+
+
+@pytest.mark.benchmark(group="hook")
+def test_call_single_logger(benchmark, pads):
+    """
+    Call of a tracked no-op function triggering a single no-op logger.
+    """
+    fn = pads.decorators.track(event=["bench_single"])(noop)
+    benchmark(fn, 1)
+
+
+@pytest.mark.benchmark(group="hook")
+def test_call_multiple_loggers(benchmark, pads):
+    """
+    Call of a tracked no-op function triggering five no-op loggers.
+    """
+    fn = pads.decorators.track(event=["bench_multiple"])(noop)
+    benchmark(fn, 1)
+
+
+@pytest.mark.benchmark(group="sklearn")
+def test_decision_tree_fit(benchmark, pads):
+    """
+    Fit of a small decision tree with the default hooks of the sklearn mapping.
+    """
+    from sklearn.datasets import load_iris
+    from sklearn.tree import DecisionTreeClassifier
+    data = load_iris()
+
+    def fit():
+        DecisionTreeClassifier(max_depth=3).fit(data.data, data.target)
+
+    benchmark.pedantic(fit, rounds=10, iterations=1)
@@ -0,0 +1,46 @@
+import pytest
+
+from pypads.app.backends.mlflow import MongoSupportMixin
+
+RUNS = 10
+
+
+@pytest.mark.benchmark(group="metric")
+def test_log_metric(benchmark, pads):
+    """
+    Throughput of logging metrics via the api.
+    """
+    step = iter(range(10 ** 9))
+
+    def log():
+        pads.api.log_metric("benchmark_metric", 0.5, step=next(step))
+
+    benchmark(log)
+
+
+@pytest.fixture(scope="module")
+def finished_runs(pads):
+    active = pads.api.active_run()
+    run_ids = []
+    try:
+        pads.api.end_run()
+        for i in range(RUNS):
+            run = pads.api.start_run(experiment_id=active.info.experiment_id)
+            run_ids.append(run.info.run_id)
+            pads.api.log_param("benchmark_param", i)
+            pads.api.log_metric("benchmark_metric", float(i))
+            pads.api.set_tag("benchmark_tag", str(i))
+            pads.api.end_run()
+    finally:
+        pads.api.start_run(experiment_id=active.info.experiment_id)
+    return run_ids
+
+
+@pytest.mark.benchmark(group="results")
+def test_get_data_frame(benchmark, pads, finished_runs):
+    """
+    Building a data frame of the parameters, metrics and tags of multiple runs.
+    """
+    if not isinstance(pads.backend, MongoSupportMixin):
+        pytest.skip("Querying results for a data frame needs a mongo db supported backend.")
+    benchmark.pedantic(pads.results.get_data_frame, args=(finished_runs,), rounds=5, iterations=1)
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.conftest import BENCHMARK_CONFIG
+
+IMPORT_PLAIN = "import sklearn.tree"
+
+IMPORT_TRACKED = """
+from pypads.app.base import PyPads
+PyPads(uri={uri!r}, config={config!r}, setup_fns={{}}).activate_tracking()
+import sklearn.tree
+"""
+
+
+def _run_python(code):
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.benchmark(group="import")
+def test_import_sklearn(benchmark):
+    """
+    Import time of sklearn in a fresh interpreter without pypads.
+    """
+    benchmark.pedantic(_run_python, args=(IMPORT_PLAIN,), rounds=5, iterations=1)
+
+
+@pytest.mark.benchmark(group="import")
+def test_import_sklearn_tracked(benchmark, tracking_uri):
+    """
+    Import time of sklearn in a fresh interpreter with activated tracking. This includes the construction of PyPads.
+    """
+    code = IMPORT_TRACKED.format(uri=tracking_uri, config=BENCHMARK_CONFIG)
+    benchmark.pedantic(_run_python, args=(code,), rounds=5, iterations=1)
+
+
+@pytest.mark.benchmark(group="constructor")
+def test_constructor(benchmark, pads, tracking_uri):
+    """
+    Construction time of a PyPads instance without activating the tracking.
+    """
+    from pypads.app.base import PyPads
+    from pypads.app.pypads import set_current_pads
+
+    instances = []
+
+    def construct():
+        # Reset the current instance to stop PyPads from reusing it
+        set_current_pads(None)
+        instances.append(PyPads(uri=tracking_uri, config=BENCHMARK_CONFIG, setup_fns={}))
+
+    try:
+        benchmark.pedantic(construct, rounds=10, iterations=1)
+    finally:
+        # Unregister the exit functions of the constructed instances
+        for instance in instances:
+            instance.deactivate_tracking(run_atexits=False, reload_modules=False)
+        set_current_pads(pads)
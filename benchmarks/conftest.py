@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pypads.app import base
+from pypads.app.injections.injection import InjectionLogger
+from pypads.bindings.events import DEFAULT_LOGGING_FNS
+from pypads.bindings.hooks import DEFAULT_HOOK_MAPPING
+
+# Setup functions are measured on their own and would distort the timings of the hot paths
+base.DEFAULT_SETUP_FNS = {}
+
+# Benchmarks are run offline against a local file store. A mongo db is only used if it is configured in the
+# environment.
+BENCHMARK_CONFIG = {"mongo_db": "MONGO_URL" in os.environ}
+
+
+class NoOpLogger(InjectionLogger):
+    """ Logger doing nothing in pre and post. This is used to measure the overhead of the logging machinery. """
+
+    def __init__(self, *args, identity=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if identity:
+            # Distinct identities stop the function registry from filtering out multiple instances
+            self.identity = identity
+
+    def __pre__(self, ctx, *args, **kwargs):
+        pass
+
+    def __post__(self, ctx, *args, **kwargs):
+        pass
+
+
+BENCHMARK_EVENTS = {
+    **DEFAULT_LOGGING_FNS,
+    "bench_single": NoOpLogger(),
+    "bench_multiple": [NoOpLogger(identity="NoOpLogger_" + str(i)) for i in range(5)]
+}
+
+BENCHMARK_HOOKS = {
+    **DEFAULT_HOOK_MAPPING,
+    "bench_single": {"on": ["bench_single"]},
+    "bench_multiple": {"on": ["bench_multiple"]}
+}
+
+
+@pytest.fixture(scope="session")
+def tracking_uri():
+    folder = tempfile.mkdtemp(prefix="pypads-benchmark_")
+    yield folder
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def pads(tracking_uri):
+    """
+    PyPads instance shared by all benchmarks of a session. Tracking is activated before sklearn is imported by any
+    of the benchmarks.
+    """
+    from pypads.app.base import PyPads
+    tracker = PyPads(uri=tracking_uri, config=BENCHMARK_CONFIG, events=BENCHMARK_EVENTS, hooks=BENCHMARK_HOOKS,
+                     setup_fns={}, autostart="benchmarks")
+    yield tracker
+    if tracker.api.active_run():
+        tracker.api.end_run()
+    tracker.deactivate_tracking(run_atexits=False, reload_modules=False)
@@ -0,0 +1,5 @@
+import sys
+
+from pypads.cli import main
+
+sys.exit(main())
@@ -15,11 +15,14 @@ from pypads.app.injections.tracked_object import LoggerOutput, Parameter, Tag, A
 from pypads.app.misc.caches import Cache
 from pypads.app.misc.extensions import ExtendableMixin, Plugin
 from pypads.app.misc.mixins import FunctionHolderMixin
+from pypads.app.misc.profiler import profile_span
+from pypads.app.misc.scheduler import SetupScheduler
 from pypads.bindings.anchors import get_anchor, Anchor
 from pypads.importext.mappings import Mapping, MatchedMapping, make_run_time_mapping_collection
 from pypads.importext.package_path import PackagePathMatcher, PackagePath
 from pypads.utils.logging_util import get_temp_folder, FileFormats, read_artifact, find_file_format
 from pypads.utils.util import get_experiment_id, get_run_id
+from pypads.variables import parallel_setups, setup_timeout, write_ahead_log
 
 api_plugins = set()
 cmds = set()
@@ -233,6 +236,11 @@ class PyPadsApi(IApi):
         :return: The newly spawned run
         """
         out = mlflow.start_run(run_id=run_id, experiment_id=experiment_id, run_name=run_name, nested=nested)
+        if self.pypads.config.get(write_ahead_log, False):
+            from pypads.app.misc.wal import open_run_wal
+            open_run_wal(self.pypads, out)
+        from pypads.app.backends.resilience import report_resilience
+        report_resilience(self.pypads)
         if setups:
             self.run_setups(
                 _pypads_env=_pypads_env or LoggerEnv(parameter=dict(), experiment_id=experiment_id, run_id=run_id,
@@ -285,26 +293,76 @@ class PyPadsApi(IApi):
 
     @cmd
     def log_mem_artifact(self, path, obj, write_format=FileFormats.text, description="", additional_data=None,
-                         holder=None):
+                         holder=None, compression=None):
         """
         See log_artifact. This logs directly from memory by storing the memory to a temporary file.
         :param holder: Output model to which to add the artifact
         :param description: Description of the artifact.
         :param path: path of the new file to create.
         :param obj: Object you want to store
-        :param write_format: Format to write to. FileFormats currently include text and binary.
+        :param write_format: Format to write to. FileFormats currently include text and binary. For None or pickle a
+        format not pickling the object is chosen by its type if possible (npy, npz or parquet).
         :param additional_data: Meta information you want to store about the artifact.
         This is an extension by pypads creating a
         json containing some meta information.
+        :param compression: Compression of the stored file (gzip, zstd or lz4). Defaults to the configured
+        artifact_compression. Files below the artifact_compression_threshold are stored uncompressed.
         :return:
         """
         if holder is None:
             holder = self.get_programmatic_output()
         return Artifact(data=path, content=obj, description=description, file_format=write_format,
-                        additional_data=additional_data, parent=holder).store()
+                        additional_data=additional_data, compression=compression, parent=holder).store()
 
+    @contextmanager
     @cmd
-    def log_metric(self, key, value, description="", step=0, additional_data: dict = None, holder=None):
+    def artifact_writer(self, path, write_format=FileFormats.text, description="", additional_data=None,
+                        holder=None, compression=None):
+        """
+        Open a file to stream an artifact into instead of passing the whole object in memory. The file is logged as
+        artifact after the "with" block and discarded if the block failed.
+        with pads.api.artifact_writer("model", FileFormats.pickle) as f:
+            pickle.dump(model, f)
+        :param path: Path of the artifact without its file extension
+        :param write_format: Format of the written content. Text, yaml and json are opened in text mode, other
+        formats in binary mode.
+        :param description: Description of the artifact.
+        :param additional_data: Meta information you want to store about the artifact.
+        :param holder: Output model to which to add the artifact
+        :param compression: Compression of the written stream. Defaults to the configured artifact_compression. As the
+        size isn't known in advance the artifact_compression_threshold doesn't apply.
+        :return: File object
+        """
+        from pypads.utils.compression import COMPRESSIONS, open_compressed
+        from pypads.utils.logging_util import artifact_compression
+        if holder is None:
+            holder = self.get_programmatic_output()
+        if isinstance(write_format, str) and write_format in FileFormats.__members__:
+            write_format = FileFormats[write_format]
+        extension = write_format.value if isinstance(write_format, FileFormats) else str(write_format)
+        text = write_format in {FileFormats.text, FileFormats.yaml, FileFormats.json} or not isinstance(
+            write_format, FileFormats)
+        compression, _ = artifact_compression(write_format, compression)
+
+        local_path = os.path.join(get_temp_folder(), path + "." + extension)
+        if compression is not None:
+            local_path += COMPRESSIONS[compression]
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        try:
+            with open_compressed(local_path, "wt" if text else "wb", compression=compression) as f:
+                yield f
+        except BaseException:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            raise
+        ato = Artifact(data=os.path.dirname(path), description=description, file_format=find_file_format(local_path),
+                       additional_data=additional_data, parent=holder)
+        self.pypads.backend.log_artifact(ato, local_path, move=True)
+        holder.add_result(ato)
+
+    @cmd
+    def log_metric(self, key, value, description="", step=0, additional_data: dict = None, holder=None,
+                   aggregate=None):
         """
         Log a metric to mlflow.
         :param holder: Output model to which to add the artifact
@@ -314,13 +372,53 @@ class PyPadsApi(IApi):
         :param step: A step for metrics which can change while executing
         :param additional_data: Meta information you want to store about the metric. This is an extension by pypads creating a
         json containing some meta information.
+        :param aggregate: Only add the value to the aggregated statistics of the metric which are stored in batches.
+        Defaults to the metric_aggregation config.
         :return:
         """
         if holder is None:
             holder = self.get_programmatic_output()
+        from pypads.app.misc.metric_aggregation import is_aggregated, get_metric_aggregator
+        if aggregate or (aggregate is None and is_aggregated(self.pypads)):
+            return get_metric_aggregator(self.pypads).add(key, value, step=step, description=description,
+                                                          additional_data=additional_data, holder=holder)
         return Metric(name=key, step=step, data=value, description=description, additional_data=additional_data,
                       parent=holder).store()
 
+    @cmd
+    def log_array_metric(self, key, value, description="", step=None, additional_data: dict = None, holder=None):
+        """
+        Append a vector or array valued metric to the series of the metric. The series is stored in chunks holding
+        the steps, timestamps and values and the metric gets a single metadata document.
+        :param holder: Output model to which to add the metric
+        :param description: Description of the metric.
+        :param key: Metric key
+        :param value: Vector or array. All values of a metric need to have the same shape.
+        :param step: Step of the value. Defaults to the number of the value.
+        :param additional_data: Meta information you want to store about the metric.
+        :return: Reference to the metadata document of the metric
+        """
+        if holder is None:
+            holder = self.get_programmatic_output()
+        from pypads.app.misc.metric_series import get_metric_series_store
+        return get_metric_series_store(self.pypads).append(key, value, step=step, description=description,
+                                                           additional_data=additional_data, holder=holder)
+
+    @cmd
+    def flush_metrics(self):
+        """
+        Store the values of the aggregated metrics and the buffered values of the array valued metrics of the active
+        run collected since the last flush.
+        :return: Number of stored points of the aggregated metrics
+        """
+        from pypads.app.misc.metric_aggregation import AGGREGATOR_CACHE
+        from pypads.app.misc.metric_series import SERIES_CACHE
+        store = self.pypads.cache.run_get(SERIES_CACHE)
+        if store is not None:
+            store.flush()
+        aggregator = self.pypads.cache.run_get(AGGREGATOR_CACHE)
+        return aggregator.flush() if aggregator is not None else 0
+
     @cmd
     def log_param(self, key, value, value_format=None, description="", additional_data: dict = None, holder=None):
         """
@@ -472,13 +570,22 @@ class PyPadsApi(IApi):
     @cmd
     def run_setups(self, _pypads_env=None):
         cache = self._get_setup_cache()
+        if self.pypads.config.get(parallel_setups, False):
+            try:
+                scheduler = SetupScheduler(dict(cache.items()), timeout=self.pypads.config.get(setup_timeout, None))
+            except ValueError as e:
+                logger.warning("Running setup functions sequentially. " + str(e))
+            else:
+                scheduler.run(self, _pypads_env=_pypads_env)
+                return
         fns = []
         for k, v in cache.items():
-            fns.append(v)
-        fns.sort(key=lambda f: f.order)
-        for fn in fns:
+            fns.append((k, v))
+        fns.sort(key=lambda f: f[1].order)
+        for name, fn in fns:
             if callable(fn):
-                fn(self, _pypads_env=_pypads_env)
+                with profile_span("setup", name):
+                    fn(self, _pypads_env=_pypads_env)
 
     def _get_teardown_cache(self):
         """
@@ -592,13 +699,14 @@ class PyPadsApi(IApi):
         #     self.log_mem_artifact("consolidated_log", consolidated_dict, write_format=FileFormats.json)
 
         chached_fns = self._get_teardown_cache()
-        fn_list = [v for i, v in chached_fns.items()]
-        fn_list.sort(key=lambda t: t.order)
-        for fn in fn_list:
+        fn_list = [(i, v) for i, v in chached_fns.items()]
+        fn_list.sort(key=lambda t: t[1].order)
+        for name, fn in fn_list:
             try:
-                fn(self.pypads, _pypads_env=LoggerEnv(parameter=dict(), experiment_id=run.info.experiment_id,
-                                                      run_id=run.info.run_id),
-                   data={"category": "TearDownFn"})
+                with profile_span("teardown", name):
+                    fn(self.pypads, _pypads_env=LoggerEnv(parameter=dict(), experiment_id=run.info.experiment_id,
+                                                          run_id=run.info.run_id),
+                       data={"category": "TearDownFn"})
             except (KeyboardInterrupt, Exception) as e:
                 logger.warning("Failed running post run function " + fn.__name__ + " because of exception: " + str(e))
 
@@ -613,6 +721,16 @@ class PyPadsApi(IApi):
 
     # !--- run management ---
 
+    @cmd
+    def collect_garbage(self, dry_run=False):
+        """
+        Remove the artifacts of the content addressed store which aren't referenced by any run anymore. Runs are
+        considered deleted after deleting them in mlflow. Don't call this while other runs are logging artifacts.
+        :param dry_run: Only list the artifacts which would be removed
+        :return: Paths of the removed artifacts in the store
+        """
+        return self.pypads.object_repository.collect_garbage(dry_run=dry_run)
+
     @cmd
     def help(self):
         help_text = ""
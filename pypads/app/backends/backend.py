@@ -28,11 +28,12 @@ class BackendInterface:
         return self._pypads
 
     @abstractmethod
-    def log_artifact(self, meta, local_path) -> str:
+    def log_artifact(self, meta, local_path, move=False) -> str:
         """
         Logs an artifact from disk.
         :param meta: ArtifactTracking object holding meta information
         :param local_path: Path from which to take the artifact
+        :param move: The file at local_path may be moved into the store instead of being copied
         :return: Returns a relative path to the artifact including name and file extension.
         """
         raise NotImplementedError("")
@@ -46,6 +47,35 @@ class BackendInterface:
         """
         raise NotImplementedError("")
 
+    def log_file(self, local_path, artifact_path="", move=False, run_id=None) -> str:
+        """
+        Store a file into the artifacts of a run without a metadata document.
+        :param local_path: Path of the file
+        :param artifact_path: Folder of the artifact in the run
+        :param move: The file at local_path may be moved into the store instead of being copied
+        :param run_id: Id of the run. Defaults to the active run.
+        :return: Returns a relative path to the artifact including name and file extension.
+        """
+        raise NotImplementedError("")
+
+    def set_tag(self, run_id, key, value):
+        """
+        Set a tag of a run without a metadata document.
+        :param run_id: Id of the run
+        :param key: Key of the tag
+        :param value: Value of the tag
+        :return:
+        """
+        raise NotImplementedError("")
+
+    def log_metrics(self, metrics):
+        """
+        Log a batch of metric values to the active run.
+        :param metrics: List of tuples of key, value, timestamp in milliseconds and step
+        :return:
+        """
+        raise NotImplementedError("")
+
     @abstractmethod
     def set_experiment_tag(self, experiment_id, key, value):
         raise NotImplementedError("")
@@ -119,11 +149,12 @@ class BackendInterface:
     def load_artifact_data(self, run_id, path):
         return read_artifact(self.download_tmp_artifacts(run_id, path))
 
-    def download_tmp_artifacts(self, run_id, relative_path):
+    def download_tmp_artifacts(self, run_id, relative_path, file_size=None):
         """
         Downloads the artifact at relative_path to a local temporary folder.
         :param run_id:
         :param relative_path:
+        :param file_size: Size of the artifact if it is already known (e.g. from its metadata)
         :return:
         """
         local_path = get_temp_folder(self.get_run(run_id))
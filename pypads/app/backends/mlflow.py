@@ -1,5 +1,7 @@
 import os
+import shutil
 import sys
+import time
 from abc import ABCMeta
 from typing import List, Union
 from uuid import uuid4
@@ -13,15 +15,21 @@ from pymongo.errors import DuplicateKeyError
 
 from pypads import logger
 from pypads.app.backends.backend import BackendInterface
+from pypads.app.backends.resilience import ResilientCaller, resilient
 from pypads.app.injections.tracked_object import Artifact
 from pypads.app.misc.inheritance import SuperStop
+from pypads.app.misc.profiler import profile_span
+from pypads.app.misc.wal import get_run_wal
+from pypads.exceptions import BackendUnavailableError
 from pypads.model.logger_output import FileInfo, MetricMetaModel, ParameterMetaModel, ArtifactMetaModel, TagMetaModel
 from pypads.model.metadata import ModelObject
 from pypads.model.models import ResultType, BaseStorageModel, to_reference, IdReference, PathReference, \
     ExperimentModel, get_reference, RunModel
-from pypads.utils.logging_util import FileFormats, jsonable_encoder, store_tmp_artifact
+from pypads.utils.compression import find_compression
+from pypads.utils.logging_util import FileFormats, jsonable_encoder, store_tmp_artifact, artifact_compression, \
+    find_file_format
 from pypads.utils.util import string_to_int, get_run_id
-from pypads.variables import MONGO_URL, MONGO_USER, MONGO_PW, MONGO_DB, mongo_db
+from pypads.variables import MONGO_URL, MONGO_USER, MONGO_PW, MONGO_DB, mongo_db, offline, backend_resilience
 
 
 class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
@@ -38,32 +46,42 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
         super().__init__(uri, pypads)
         # Set the tracking uri
         mlflow.set_tracking_uri(self._uri)
+        # Retries and circuit breaker of the operations
+        self.resilience = ResilientCaller.from_config(
+            pypads.config.get(backend_resilience) if pypads is not None else None)
 
     @property
     def mlf(self) -> MlflowClient:
         return MlflowClient(self.uri)
 
+    @resilient("list_run_infos")
     def list_run_infos(self, experiment_id, run_view_type=ViewType.ALL):
         return self.mlf.list_run_infos(experiment_id=experiment_id, run_view_type=run_view_type)
 
+    @resilient("get_metric_history")
     def get_metric_history(self, run_id, key):
         return self.mlf.get_metric_history(run_id, key)
 
+    @resilient("list_experiments")
     def list_experiments(self, view_type=ViewType.ALL):
         return self.mlf.list_experiments(view_type=view_type)
 
+    @resilient("get_run")
     def get_run(self, run_id):
         return mlflow.get_run(run_id)
 
+    @resilient("get_experiment")
     def get_experiment(self, experiment_id):
         return mlflow.get_experiment(experiment_id)
 
+    @resilient("get_experiment_by_name")
     def get_experiment_by_name(self, name):
         return mlflow.get_experiment_by_name(name)
 
     def delete_experiment(self, experiment_id):
         return mlflow.delete_experiment(experiment_id)
 
+    @resilient("search_runs")
     def search_runs(self, experiment_ids, filter_string="", run_view_type=ViewType.ACTIVE_ONLY,
                     max_results=SEARCH_MAX_RESULTS_PANDAS, order_by=None):
         return mlflow.search_runs(experiment_ids, filter_string=filter_string, run_view_type=run_view_type,
@@ -79,8 +97,29 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
         return mlflow.delete_run(run_id)
 
     def download_artifacts(self, run_id, relative_path, dst_path=None):
+        run_id, relative_path = self._resolve_content(run_id, relative_path)
         return self.mlf.download_artifacts(run_id, relative_path, dst_path=dst_path)
 
+    def _content_store(self):
+        """
+        :return: The object repository if artifacts should be stored by their content, None otherwise
+        """
+        objects = getattr(self.pypads, "object_repository", None)
+        return objects if objects is not None and objects.enabled else None
+
+    def _resolve_content(self, run_id, relative_path):
+        """
+        Translate the path of a content addressed artifact of a run to the path of its blob.
+        :return: Tuple of run id and path to download from
+        """
+        objects = getattr(self.pypads, "object_repository", None)
+        if objects is not None:
+            blob = objects.resolve(run_id, relative_path)
+            if blob is not None:
+                return objects.store.run_id, blob
+        return run_id, relative_path
+
+    @resilient("list_files")
     def list_files(self, run_id, path=None) -> List[FileInfo]:
         return [FileInfo(is_dir=a.is_dir, path=a.path, file_size=a.file_size) for a in
                 self.mlf.list_artifacts(run_id, path=path)]
@@ -88,10 +127,16 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
     def get_artifact_uri(self, artifact_path=""):
         return mlflow.get_artifact_uri(artifact_path=artifact_path)
 
-    def log_artifact(self, meta, local_path):
+    def log_artifact(self, meta, local_path, move=False):
         file_size = os.path.getsize(os.fspath(local_path))
         meta.file_size = file_size
-        path = self._log_artifact(local_path=local_path, artifact_path=meta.data)
+        meta.compression = find_compression(local_path)
+        objects = self._content_store()
+        if objects is not None:
+            path = os.path.join(meta.data if meta.data else "", os.path.basename(local_path))
+            meta.content_hash = objects.put(local_path, path)
+        else:
+            path = self._log_artifact(local_path=local_path, artifact_path=meta.data, move=move)
         meta.data = path
         # for file_info in self.list_files(run_id=get_run_id(), path=os.path.dirname(path)):
         #     if file_info.path == os.path.basename(path):
@@ -100,63 +145,173 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
         self.log_json(meta, uuid4())
         return path
 
-    def _log_artifact(self, local_path, artifact_path=""):
-        mlflow.log_artifact(local_path, artifact_path)
+    def log_file(self, local_path, artifact_path="", move=False, run_id=None):
+        return self._log_artifact(local_path, artifact_path=artifact_path, move=move, run_id=run_id)
+
+    @resilient("log_artifact", spool=True)
+    def _log_artifact(self, local_path, artifact_path="", move=False, run_id=None):
         path = os.path.join(artifact_path if artifact_path else "", local_path.rsplit(os.sep, 1)[1])
+        with profile_span("backend", "log_artifact"):
+            if move:
+                from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+                from mlflow.store.artifact.local_artifact_repo import LocalArtifactRepository
+                artifacts = get_artifact_repository(
+                    mlflow.get_artifact_uri() if run_id is None else self.mlf.get_run(run_id).info.artifact_uri)
+                if isinstance(artifacts, LocalArtifactRepository):
+                    # Temporary files are renamed into a local store instead of being copied
+                    target = os.path.join(artifacts.artifact_dir, path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(local_path, target)
+                    return path
+            if run_id is None:
+                mlflow.log_artifact(local_path, artifact_path)
+            else:
+                self.mlf.log_artifact(run_id, local_path, artifact_path)
         return path
 
-    def _log_mem_artifact(self, path: str, artifact, write_format, preserveFolder=True):
-        tmp_path = store_tmp_artifact(path, artifact, write_format=write_format)
+    def _log_mem_artifact(self, path: str, artifact, write_format, preserveFolder=True, compression=None,
+                          compression_threshold=0):
+        tmp_path = store_tmp_artifact(path, artifact, write_format=write_format, compression=compression,
+                                      compression_threshold=compression_threshold)
         if preserveFolder:
             artifact_path = ""
             splits = path.rsplit(os.sep, 1)
             if len(splits) > 1:
                 artifact_path = splits[0]
-            return self._log_artifact(tmp_path, artifact_path=artifact_path)
-        return self._log_artifact(tmp_path)
+            return self._log_artifact(tmp_path, artifact_path=artifact_path, move=True)
+        return self._log_artifact(tmp_path, move=True)
 
+    @resilient("set_experiment_tag")
     def set_experiment_tag(self, experiment_id, key, value):
         return self.mlf.set_experiment_tag(experiment_id, key, value)
 
+    @resilient("log_metric", spool=True)
+    def _log_metric(self, run_id, key, value, timestamp):
+        self.mlf.log_metric(run_id, key, value, timestamp=timestamp, step=0)
+
+    @resilient("log_batch", spool=True)
+    def _log_batch(self, run_id, metrics):
+        self.mlf.log_batch(run_id, metrics=metrics)
+
+    @resilient("log_param", spool=True)
+    def _log_param(self, key, value):
+        mlflow.log_param(key, value)
+
+    @resilient("set_tag", spool=True)
+    def _set_tag(self, key, value):
+        mlflow.set_tag(key, value)
+
+    @resilient("set_run_tag", spool=True)
+    def set_tag(self, run_id, key, value):
+        self.mlf.set_tag(run_id, key, value)
+
+    def _spool(self, operation, *args, **kwargs):
+        """
+        Spool a write which couldn't reach the backend into the write-ahead log of the active run. The log is replayed
+        by recover_runs.
+        :param operation: Name of the operation
+        :return: Result replacing the one of the operation
+        """
+        wal = get_run_wal(self.pypads)
+        if wal is None or wal.closed:
+            raise BackendUnavailableError("There is no write-ahead log to spool {} into.".format(operation))
+        if operation == "log_artifact":
+            return wal.spool_file(*args, **kwargs)
+        if operation == "write_document":
+            storage_type, document = args
+            return wal.spool_document(storage_type, document)
+        if operation == "set_run_tag":
+            return wal.spool_tag(*args, **kwargs)
+        # Metrics, parameters and tags are already part of the log
+        return wal.spool(operation)
+
     def log(self, obj: Union[BaseStorageModel]):
         """
         :param obj: Entry object to be logged
         :return:
         """
         rt = obj.storage_type
+        wal = get_run_wal(self.pypads)
         if rt == ResultType.metric:
             obj: MetricMetaModel
+            timestamp = int(time.time() * 1000)
+            if wal is not None:
+                wal.append("metric", key=obj.name, value=obj.data, step=0, timestamp=timestamp)
             stored_meta = self.log_json(obj, obj.uid)
-            mlflow.log_metric(obj.name, obj.data)
+            with profile_span("backend", "log_metric"):
+                # Log with the timestamp of the write-ahead record to recognize the value on recovery
+                self._log_metric(get_run_id(), obj.name, obj.data, timestamp)
             return stored_meta
 
         elif rt == ResultType.parameter:
             obj: ParameterMetaModel
+            if wal is not None:
+                wal.append("param", key=obj.name, value=obj.data)
             stored_meta = self.log_json(obj, obj.uid)
-            mlflow.log_param(obj.name, obj.data)
+            with profile_span("backend", "log_param"):
+                self._log_param(obj.name, obj.data)
             return stored_meta
 
         elif rt == ResultType.artifact:
             obj: Union[Artifact, ArtifactMetaModel]
-            path = self._log_mem_artifact(path=obj.data, artifact=obj.content(), write_format=obj.file_format)
-            # Todo maybe don't store filesize because of performance (querying for file after storing takes time)
-            for file_info in self.list_files(run_id=get_run_id(), path=os.path.dirname(path)):
-                if file_info.path == os.path.basename(path):
-                    obj.file_size = file_info.file_size
-                    break
+            compression, threshold = artifact_compression(obj.file_format, obj.compression)
+            objects = self._content_store()
+            if objects is not None:
+                tmp_path = store_tmp_artifact(obj.data, obj.content(), write_format=obj.file_format,
+                                              compression=compression, compression_threshold=threshold)
+                path = os.path.join(os.path.dirname(obj.data), os.path.basename(tmp_path))
+                obj.content_hash = objects.put(tmp_path, path)
+                obj.file_size = os.path.getsize(tmp_path)
+            else:
+                path = self._log_mem_artifact(path=obj.data, artifact=obj.content(), write_format=obj.file_format,
+                                              compression=compression, compression_threshold=threshold)
+                # Todo maybe don't store filesize because of performance (querying for file after storing takes time)
+                try:
+                    for file_info in self.list_files(run_id=get_run_id(), path=os.path.dirname(path)):
+                        if file_info.path == os.path.basename(path):
+                            obj.file_size = file_info.file_size
+                            break
+                except BackendUnavailableError:
+                    # The artifact got spooled
+                    pass
             obj.data = path
+            if find_file_format(path) != FileFormats.unknown:
+                # The format might have been chosen by the type of the content
+                obj.file_format = find_file_format(path)
+            obj.compression = find_compression(path)
             stored_meta = self.log_json(obj, obj.uid)
             return stored_meta
 
         elif rt == ResultType.tag:
             obj: TagMetaModel
+            if wal is not None:
+                wal.append("tag", key=obj.name, value=obj.data)
             stored_meta = self.log_json(obj, obj.uid)
-            mlflow.set_tag(obj.name, obj.data)
+            with profile_span("backend", "set_tag"):
+                self._set_tag(obj.name, obj.data)
             return stored_meta
 
         else:
             return self.log_json(obj, obj.uid)
 
+    def log_metrics(self, metrics):
+        """
+        Log a batch of metric values to the active run.
+        :param metrics: List of tuples of key, value, timestamp in milliseconds and step
+        :return:
+        """
+        from mlflow.entities import Metric
+        wal = get_run_wal(self.pypads)
+        if wal is not None:
+            for key, value, timestamp, step in metrics:
+                wal.append("metric", key=key, value=value, step=step, timestamp=timestamp)
+        run_id = get_run_id()
+        with profile_span("backend", "log_batch"):
+            # The tracking server accepts at most 1000 metrics per batch
+            for i in range(0, len(metrics), 1000):
+                self._log_batch(run_id, [Metric(key, value, timestamp, step) for key, value, timestamp, step in
+                                         metrics[i:i + 1000]])
+
     def log_json(self, obj, uid=None):
         """
         Log a metadata object
@@ -170,12 +325,11 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
             return obj.dict(force=False, by_alias=True)
         if uid is None:
             uid = obj.uid
+        with profile_span("serialization", "model_json", detail=obj.__class__.__name__):
+            content = obj.json(force=False, by_alias=True) if isinstance(obj, ModelObject) else obj.json(by_alias=True)
         return to_reference(
             {**obj.dict(by_alias=True),
-             **{"path": self._log_mem_artifact(str(uid),
-                                               obj.json(force=False, by_alias=True)
-                                               if isinstance(obj, ModelObject) else obj.json(by_alias=True),
-                                               write_format=FileFormats.json)}})
+             **{"path": self._log_mem_artifact(str(uid), content, write_format=FileFormats.json)}})
 
     def get(self, uid, storage_type: Union[str, ResultType], experiment_name=None, experiment_id=None, run_id=None,
             search_dict=None):
@@ -199,6 +353,7 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
         else:
             return json_data
 
+    @resilient("get_json")
     def get_json(self, reference: IdReference):
         """
         Get json stored for a certain run.
@@ -209,6 +364,7 @@ class MLFlowBackend(BackendInterface, metaclass=ABCMeta):
         return self.load_artifact_data(run_id=reference.run.uid,
                                        path=reference.path if isinstance(reference, PathReference) else reference.id)
 
+    @resilient("get_by_path")
     def get_by_path(self, run_id, path):
         return self.load_artifact_data(run_id=run_id, path=path)
 
@@ -244,10 +400,12 @@ class LocalMlFlowBackend(MLFlowBackend):
     def managed_result_git(self):
         return self._managed_result_git
 
-    def download_tmp_artifacts(self, run_id, relative_path):
+    def download_tmp_artifacts(self, run_id, relative_path, file_size=None):
+        run_id, relative_path = self._resolve_content(run_id, relative_path)
         return artifact_utils.get_artifact_uri(run_id=run_id, artifact_path=relative_path)
 
     def download_artifacts(self, run_id, relative_path, dst_path=None):
+        run_id, relative_path = self._resolve_content(run_id, relative_path)
         local_location = os.path.join(dst_path, relative_path)
         if os.path.exists(local_location):  # TODO check file digest or something similar??
             logger.debug(
@@ -334,6 +492,34 @@ class RemoteMlFlowBackend(MLFlowBackend):
         """
         super().__init__(uri, pypads)
 
+    def download_tmp_artifacts(self, run_id, relative_path, file_size=None):
+        """
+        Downloads the artifact at relative_path into the local artifact cache. Directories and artifacts which can't
+        be listed are downloaded to the temporary folder of the run.
+        :param file_size: Size of the artifact if it is already known. The remote folder is listed otherwise.
+        """
+        cache = getattr(self.pypads, "artifact_cache", None)
+        if cache is None:
+            return super().download_tmp_artifacts(run_id, relative_path)
+        resolved = self._resolve_content(run_id, relative_path)
+        if resolved != (run_id, relative_path):
+            # Blobs of the content store are addressed by the hash of their content and never change
+            run_id, relative_path = resolved
+            size = None
+        else:
+            size = file_size if file_size is not None else self._file_size(run_id, relative_path)
+            if size is None:
+                return super().download_tmp_artifacts(run_id, relative_path)
+        return cache.download(run_id, relative_path, size,
+                              lambda folder: self.mlf.download_artifacts(run_id, relative_path, dst_path=folder))
+
+    def _file_size(self, run_id, relative_path):
+        parent = os.path.dirname(relative_path)
+        for file_info in self.mlf.list_artifacts(run_id, path=parent or None):
+            if file_info.path == relative_path:
+                return None if file_info.is_dir else file_info.file_size
+        return None
+
 
 class MongoSupportMixin(BackendInterface, SuperStop, metaclass=ABCMeta):
     def __init__(self, *args, **kwargs):
@@ -375,16 +561,20 @@ class MongoSupportMixin(BackendInterface, SuperStop, metaclass=ABCMeta):
         entry["_id"] = _id
         storage_type = entry["storage_type"].value if isinstance(entry["storage_type"], ResultType) else entry[
             "storage_type"]
-        try:
-            try:
-                self._db[storage_type].insert_one(jsonable_encoder(entry))
-            except DuplicateKeyError as e:
-                self._db[storage_type].replace_one({"_id": _id}, jsonable_encoder(entry))
-        except Exception as e:
-            # TODO maybe handle duplicates
-            raise e
+        with profile_span("serialization", "jsonable_encoder", detail=storage_type):
+            document = jsonable_encoder(entry)
+        with profile_span("backend", "mongo_write", detail=storage_type):
+            self._write_document(storage_type, document)
         return reference
 
+    @resilient("write_document", spool=True)
+    def _write_document(self, storage_type, document):
+        try:
+            self._db[storage_type].insert_one(document)
+        except DuplicateKeyError:
+            self._db[storage_type].replace_one({"_id": document["_id"]}, document)
+
+    @resilient("get_json")
     def get_json(self, reference: IdReference):
         """
         Get json stored for a certain run.
@@ -394,6 +584,7 @@ class MongoSupportMixin(BackendInterface, SuperStop, metaclass=ABCMeta):
                                                              str) else reference.storage_type.value].find_one(
             {"_id": reference.id})
 
+    @resilient("list")
     def list(self, storage_type: Union[str, ResultType], experiment_name=None, experiment_id=None, run_id=None,
              search_dict=None):
         if search_dict is None:
@@ -409,6 +600,7 @@ class MongoSupportMixin(BackendInterface, SuperStop, metaclass=ABCMeta):
             self._db[storage_type if isinstance(storage_type, str) else storage_type.value].find(search_dict,
                                                                                                  chosen_columns))
 
+    @resilient("get")
     def get(self, uid, storage_type: Union[str, ResultType], experiment_name=None, experiment_id=None, run_id=None,
             search_dict=None):
         if search_dict is None:
@@ -446,6 +638,11 @@ class MLFlowBackendFactory:
     @staticmethod
     def make(uri) -> MLFlowBackend:
         from pypads.app.pypads import get_current_pads, get_current_config
+        if get_current_config().get(offline, False):
+            # Record into the local spool. The runs are replayed into the tracking store by pypads sync.
+            from pypads.app.backends.spool import spool_folder
+            return LocalMlFlowBackend(uri=spool_folder(get_current_pads().folder, get_current_config()[offline]),
+                                      pypads=get_current_pads())
         if uri.startswith("git://") or uri.startswith("/"):
             if get_current_config()[mongo_db]:
                 return MongoSupportedLocalMlFlowBackend(uri=uri, pypads=get_current_pads())
@@ -1,4 +1,7 @@
 import os
+import shutil
+import tempfile
+import threading
 from contextlib import contextmanager
 from typing import Union
 from uuid import uuid4
@@ -8,7 +11,14 @@ from pydantic import Extra
 from pypads.app.backends.mlflow import MongoSupportMixin
 from pypads.model.models import EntryModel, to_reference, BaseStorageModel, IdReference, \
     get_reference, ExperimentModel, RunModel
+from pypads.utils.fingerprint import file_digest
 from pypads.utils.logging_util import FileFormats
+from pypads.utils.util import get_run_id
+from pypads.variables import snapshot_cache, content_store
+
+# Setups run concurrently. Looking up and creating the runs representing repository objects is serialized to not
+# find half created runs of other threads or create a run for the same object twice.
+_storage_lock = threading.RLock()
 
 
 class Repository:
@@ -57,9 +67,10 @@ class Repository:
         if isinstance(self.pads.backend, MongoSupportMixin):
             return self.pads.backend.get_json(self.repo_reference(uid)) is not None
         else:
-            return len(self.pads.backend.search_runs(experiment_ids=self.id,
-                                                     filter_string="tags.`pypads_unique_uid` = \"" +
-                                                                   self.repo_reference(uid).id + "\"")) > 0
+            with _storage_lock:
+                return len(self.pads.backend.search_runs(experiment_ids=self.id,
+                                                         filter_string="tags.`pypads_unique_uid` = \"" +
+                                                                       self.repo_reference(uid).id + "\"")) > 0
 
     def repo_reference(self, uid, run_id=-1):
         """
@@ -151,26 +162,27 @@ class RepositoryObject:
     def init_run_storage(self):
         # if self._run is None:
         # UID is given. Check for existence.
-        if self._run is None:
-            runs = self.pads.backend.search_runs(experiment_ids=self.repository.id,
-                                                 filter_string="tags.`pypads_unique_uid` = \"" + self.repo_reference.id
-                                                               + "\"")
-
-            # If exists set the run_id to the existing one instead
-            if len(runs) > 0:
-                # TODO is this correct? Mlflow returns a dataframe
-                self._run = self.pads.results.get_run(run_id=runs.iloc[0][0])
-
-            # If no run_id was found with uid create a new run and get its id
+        with _storage_lock:
             if self._run is None:
-                if self._run_id is None:
-                    # If a uid is given and the tag for the run is not set already set it
-                    self._run = self.pads.backend \
-                        .create_run(experiment_id=self.repository.id,
-                                    tags={"pypads_unique_uid": self.repo_reference.id})
-                    self._run_id = self._run.info.run_id
-                else:
-                    self._run = self.pads.results.get_run(run_id=self._run_id)
+                runs = self.pads.backend.search_runs(experiment_ids=self.repository.id,
+                                                     filter_string="tags.`pypads_unique_uid` = \"" +
+                                                                   self.repo_reference.id + "\"")
+
+                # If exists set the run_id to the existing one instead
+                if len(runs) > 0:
+                    # TODO is this correct? Mlflow returns a dataframe
+                    self._run = self.pads.results.get_run(run_id=runs.iloc[0][0])
+
+                # If no run_id was found with uid create a new run and get its id
+                if self._run is None:
+                    if self._run_id is None:
+                        # If a uid is given and the tag for the run is not set already set it
+                        self._run = self.pads.backend \
+                            .create_run(experiment_id=self.repository.id,
+                                        tags={"pypads_unique_uid": self.repo_reference.id})
+                        self._run_id = self._run.info.run_id
+                    else:
+                        self._run = self.pads.results.get_run(run_id=self._run_id)
 
     def init_context(self):
         return self.repository.context(self.run_id, run_name=self._name)
@@ -281,8 +293,8 @@ class RepositoryObject:
         if isinstance(self.pads.backend, MongoSupportMixin):
             return self.pads.backend.get_json(to_reference(self.reference_dict()))
         else:
-            with self.init_context() as ctx:
-                return self.pads.backend.get_json(to_reference(self.reference_dict()))
+            # The json is stored by its uid into the artifacts of the run representing the object
+            return self.pads.backend.get_by_path(self.run_id, ".".join([str(self.uid), FileFormats.json.value]))
 
     def _extend_meta(self, meta=None):
 
@@ -349,3 +361,227 @@ class MappingRepository(Repository):
         :param kwargs:
         """
         super().__init__(*args, name="pypads_mappings", **kwargs)
+
+
+class SnapshotRepository(Repository):
+
+    def __init__(self, *args, **kwargs):
+        """
+        Repository holding references to snapshots of the environment (dependencies, hardware) by their fingerprint.
+        Runs with an unchanged environment only reference the snapshot stored by an earlier run.
+        :param args:
+        :param kwargs:
+        """
+        super().__init__(*args, name="pypads_snapshots", **kwargs)
+        self._snapshots = {}
+        self._tags = {}
+
+    @property
+    def enabled(self):
+        return self.pads.config.get(snapshot_cache, True)
+
+    def get_snapshot(self, fingerprint) -> Union[IdReference, None]:
+        """
+        Get the reference to the snapshot stored for given fingerprint.
+        :param fingerprint: Fingerprint of the environment
+        :return: Reference to the stored snapshot or None
+        """
+        if not self.enabled:
+            return None
+        if fingerprint in self._snapshots:
+            return self._snapshots[fingerprint]
+        if not self.has_object(uid=fingerprint):
+            return None
+        stored = self.get_object(uid=fingerprint).get_json()
+        if stored is None or "snapshot" not in stored:
+            return None
+        self._snapshots[fingerprint] = to_reference(dict(stored["snapshot"]))
+        self._tags[fingerprint] = dict(stored.get("tags", {}))
+        return self._snapshots[fingerprint]
+
+    def get_snapshot_tags(self, fingerprint) -> dict:
+        """
+        Get the run tags stored together with the snapshot for given fingerprint.
+        :param fingerprint: Fingerprint of the environment
+        :return: Dict mapping tag keys to dicts holding the value and description
+        """
+        if self.get_snapshot(fingerprint) is None:
+            return {}
+        return self._tags.get(fingerprint, {})
+
+    def add_snapshot(self, fingerprint, reference: IdReference, tags=None):
+        """
+        Store the reference to a snapshot for given fingerprint.
+        :param fingerprint: Fingerprint of the environment
+        :param reference: Reference to the stored snapshot
+        :param tags: Run tags set by the snapshot which are to be set again on runs reusing it. Dict mapping tag keys
+        to dicts holding the value and description.
+        :return:
+        """
+        if not self.enabled:
+            return
+        tags = tags or {}
+        self.get_object(uid=fingerprint).log_json({"snapshot": reference.dict(by_alias=True), "tags": tags})
+        self._snapshots[fingerprint] = reference
+        self._tags[fingerprint] = tags
+
+    def snapshot(self, fingerprint, collect):
+        """
+        Reuse the snapshot stored for given fingerprint or collect and store a new one.
+        :param fingerprint: Fingerprint of the environment
+        :param collect: Function collecting and storing the snapshot. It has to return the reference.
+        :return: Reference to the snapshot
+        """
+        reference = self.get_snapshot(fingerprint)
+        if reference is None:
+            reference = collect()
+            if reference is not None:
+                self.add_snapshot(fingerprint, reference)
+        return reference
+
+
+# Prefix of the run tags referencing a blob of the object repository
+OBJECT_TAG_PREFIX = "pypads.objects."
+
+
+class ObjectRepository(Repository):
+
+    def __init__(self, *args, **kwargs):
+        """
+        Content addressed store for artifacts. Each distinct content is uploaded only once into objects/<hash> of a
+        single repository object. Runs logging the content are tagged with its hash and the paths they logged it to,
+        which allows for resolving these paths and counting the references of a blob.
+        :param args:
+        :param kwargs:
+        """
+        super().__init__(*args, name="pypads_objects", **kwargs)
+        self._known = set()
+        self._references = {}
+        self._paths = {}
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self):
+        return self.pads.config.get(content_store, False)
+
+    @property
+    def store(self) -> RepositoryObject:
+        return self.get_object(uid="objects", name="objects")
+
+    @staticmethod
+    def blob_path(digest, path):
+        """
+        Path of a blob in the store. The extension of the logged path is kept to be able to read the blob.
+        :param digest: Hash of the content
+        :param path: Path the content was logged to
+        :return: Path relative to the artifacts of the store
+        """
+        return "/".join(["objects", digest[:2], digest + os.path.splitext(path)[1]])
+
+    def has_blob(self, blob):
+        if blob in self._known:
+            return True
+        found = {f.path for f in self.pads.backend.list_files(self.store.run_id, path=os.path.dirname(blob))}
+        self._known.update(found)
+        return blob in found
+
+    def put(self, local_path, path, run_id=None):
+        """
+        Store a file by the hash of its content and reference it for a run.
+        :param local_path: Path of the file to store
+        :param path: Path under which the run logs the file
+        :param run_id: Id of the referencing run. Defaults to the active run.
+        :return: Hash of the content
+        """
+        digest = file_digest(local_path)
+        blob = self.blob_path(digest, path)
+        with self._lock:
+            # Reference the blob before uploading it. The garbage collection mustn't remove a reused blob.
+            self._reference(run_id or get_run_id(), digest, path)
+            if not self.has_blob(blob):
+                tmp_dir = tempfile.mkdtemp()
+                try:
+                    tmp_path = os.path.join(tmp_dir, os.path.basename(blob))
+                    try:
+                        os.link(local_path, tmp_path)
+                    except OSError:
+                        shutil.copyfile(local_path, tmp_path)
+                    self.pads.backend.log_file(tmp_path, artifact_path=os.path.dirname(blob), run_id=self.store.run_id)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                self._known.add(blob)
+        return digest
+
+    def _reference(self, run_id, digest, path):
+        paths = self._references.setdefault(run_id, {}).setdefault(digest, [])
+        if path not in paths:
+            paths.append(path)
+            self.pads.backend.set_tag(run_id, OBJECT_TAG_PREFIX + digest, "\n".join(paths))
+        self._paths.setdefault(run_id, {})[path] = self.blob_path(digest, path)
+
+    def resolve(self, run_id, path):
+        """
+        Get the blob a run logged to the given path.
+        :param run_id: Id of the run
+        :param path: Path relative to the artifacts of the run
+        :return: Path of the blob relative to the artifacts of the store or None if the path isn't content addressed
+        """
+        with self._lock:
+            if run_id not in self._paths:
+                paths = {}
+                for key, value in self.pads.backend.get_run(run_id).data.tags.items():
+                    if key.startswith(OBJECT_TAG_PREFIX):
+                        for logged in value.split("\n"):
+                            paths[logged] = self.blob_path(key[len(OBJECT_TAG_PREFIX):], logged)
+                self._paths[run_id] = paths
+            return self._paths[run_id].get(path)
+
+    def references(self):
+        """
+        Count the references to the blobs by the runs of all experiments. Deleted runs are counted as well, because
+        they can still be restored. Their blobs are freed after the runs were deleted permanently.
+        :return: Dict of hashes to the number of references
+        """
+        from mlflow.entities import ViewType
+        experiment_ids = [e.experiment_id for e in self.pads.backend.list_experiments(ViewType.ALL)]
+        counts = {}
+        page_token = None
+        while True:
+            runs = self.pads.backend.mlf.search_runs(experiment_ids, run_view_type=ViewType.ALL,
+                                                     page_token=page_token)
+            for run in runs:
+                for key, value in run.data.tags.items():
+                    if key.startswith(OBJECT_TAG_PREFIX):
+                        digest = key[len(OBJECT_TAG_PREFIX):]
+                        counts[digest] = counts.get(digest, 0) + len(value.split("\n"))
+            page_token = runs.token
+            if not page_token:
+                return counts
+
+    def collect_garbage(self, dry_run=False):
+        """
+        Remove the blobs which aren't referenced by any run anymore. This shouldn't run while runs log artifacts.
+        :param dry_run: Only return the blobs which would be removed
+        :return: Paths of the removed blobs
+        """
+        from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+        from mlflow.store.artifact.local_artifact_repo import LocalArtifactRepository
+        referenced = self.references()
+        run = self.store.run
+        artifacts = get_artifact_repository(run.info.artifact_uri)
+        removed = []
+        with self._lock:
+            for folder in self.pads.backend.list_files(run.info.run_id, path="objects"):
+                if not folder.is_dir:
+                    continue
+                for blob in self.pads.backend.list_files(run.info.run_id, path=folder.path):
+                    if os.path.basename(blob.path).split(".", 1)[0] not in referenced:
+                        removed.append(blob.path)
+                        if not dry_run:
+                            if isinstance(artifacts, LocalArtifactRepository):
+                                # The local repository only removes directories
+                                os.remove(os.path.join(artifacts.artifact_dir, blob.path))
+                            else:
+                                artifacts.delete_artifacts(blob.path)
+                            self._known.discard(blob.path)
+        return removed
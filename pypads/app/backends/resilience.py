@@ -0,0 +1,273 @@
+"""
+Retries and a circuit breaker around the operations of a backend. Transient errors of the tracking store or MongoDB
+are retried with an exponential backoff with full jitter. After repeated failures the circuit opens and writes are
+spooled into the write-ahead log of the run instead of being attempted, until the store gets probed again. The
+retried, spooled and dropped operations are counted and reported at the end of a run.
+"""
+import errno
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from pypads import logger
+from pypads.exceptions import BackendUnavailableError
+
+DEFAULT_RESILIENCE = {
+    "retries": 3,  # Retries of a failed operation
+    "backoff": 0.5,  # Seconds to wait before the first retry. The wait doubles with every retry.
+    "max_backoff": 10,  # Maximal seconds to wait before a retry
+    "failure_threshold": 5,  # Operations failing in a row until the circuit opens
+    "reset_timeout": 60  # Seconds until an open circuit lets an operation probe the backend again
+}
+
+# Error codes of mlflow denoting a failure of the server or the connection to it
+_TRANSIENT_MLFLOW_CODES = {"INTERNAL_ERROR", "TEMPORARILY_UNAVAILABLE", "REQUEST_LIMIT_EXCEEDED"}
+
+# Error numbers of an OSError denoting an unreachable host or network. Other errors (e.g. a full disk) won't be
+# resolved by retrying.
+_TRANSIENT_ERRNOS = {errno.ETIMEDOUT, errno.EHOSTUNREACH, errno.EHOSTDOWN, errno.ENETUNREACH, errno.ENETDOWN}
+
+# Operations of a backend calling other operations are only retried as a whole
+_local = threading.local()
+
+
+def is_transient(e):
+    """
+    Check if an error might be resolved by retrying the operation.
+    :param e: Raised exception
+    :return: True if the error is caused by the connection or a temporary failure of the backend
+    """
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+    if isinstance(e, (RequestsConnectionError, Timeout)):
+        return True
+    if isinstance(e, OSError):
+        return e.errno in _TRANSIENT_ERRNOS
+    from mlflow.exceptions import MlflowException
+    if isinstance(e, MlflowException):
+        return e.error_code in _TRANSIENT_MLFLOW_CODES
+    from pymongo.errors import ConnectionFailure
+    return isinstance(e, ConnectionFailure)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter. The n-th retry waits a random time between 0 and
+    min(max_backoff, backoff * 2^n) seconds, which spreads the retries of concurrent clients.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=10, transient=is_transient):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transient = transient
+
+    def delay(self, attempt):
+        """
+        :param attempt: Number of the retry starting with 0
+        :return: Seconds to wait before the retry
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker counting failed operations in a row. The circuit opens after failure_threshold failures and
+    rejects operations for reset_timeout seconds. Afterwards a single operation may probe the backend. The circuit
+    closes again if it succeeds.
+    """
+
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return self.closed
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.half_open
+        return self.open
+
+    def allow(self):
+        """
+        :return: True if an operation may be attempted
+        """
+        with self._lock:
+            state = self.state
+            if state == self.closed:
+                return True
+            if state == self.half_open and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("The backend failed {} times in a row. Pausing its operations for {} seconds."
+                                   .format(self._failures, self.reset_timeout))
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+class ResilientCaller:
+    """
+    Calls operations of a backend with retries and a circuit breaker. Operations which couldn't be done are passed to
+    a fallback spooling them if one is given and counted as dropped otherwise.
+    """
+
+    def __init__(self, policy: RetryPolicy = None, breaker: CircuitBreaker = None, sleep=time.sleep):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    @staticmethod
+    def from_config(config):
+        """
+        Build a caller from the backend_resilience config.
+        :param config: False to disable, a number of retries or a dict with keys of DEFAULT_RESILIENCE
+        :return: ResilientCaller or None
+        """
+        if not config:
+            return None
+        if isinstance(config, bool):
+            config = {}
+        elif isinstance(config, int):
+            config = {"retries": config}
+        config = {**DEFAULT_RESILIENCE, **config}
+        return ResilientCaller(RetryPolicy(retries=config["retries"], backoff=config["backoff"],
+                                           max_backoff=config["max_backoff"]),
+                               CircuitBreaker(failure_threshold=config["failure_threshold"],
+                                              reset_timeout=config["reset_timeout"]))
+
+    def _count(self, operation, counter):
+        with self._lock:
+            self.stats.setdefault(operation, Counter())[counter] += 1
+
+    def call(self, operation, fn, *args, fallback=None, **kwargs):
+        """
+        Call an operation.
+        :param operation: Name of the operation
+        :param fn: Callable doing the operation
+        :param fallback: Callable getting the last error and spooling the operation. Its result is returned instead.
+        :return: Result of the operation
+        """
+        error = None
+        if self.breaker.allow():
+            for attempt in range(self.policy.retries + 1):
+                if attempt > 0:
+                    self._count(operation, "retried")
+                    self._sleep(self.policy.delay(attempt - 1))
+                try:
+                    out = fn(*args, **kwargs)
+                    self.breaker.success()
+                    return out
+                except Exception as e:
+                    if not self.policy.transient(e):
+                        raise e
+                    error = e
+                    if self.breaker.state != CircuitBreaker.closed:
+                        # Don't wait on a backend which is known to be down
+                        break
+            self._count(operation, "failed")
+            self.breaker.failure()
+        if fallback is not None:
+            try:
+                out = fallback(error)
+                self._count(operation, "spooled")
+                return out
+            except BackendUnavailableError:
+                pass
+        self._count(operation, "dropped")
+        if error is None:
+            raise BackendUnavailableError("Skipped {} because the backend is unavailable.".format(operation))
+        raise BackendUnavailableError("Couldn't {} after {} attempts: {}".format(
+            operation, self.policy.retries + 1, str(error))) from error
+
+    def summary(self):
+        """
+        :return: Counter of the retried, failed, spooled and dropped operations
+        """
+        with self._lock:
+            return sum(self.stats.values(), Counter())
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+
+
+def resilient(operation, spool=False):
+    """
+    Decorator for operations of a backend. The operation is called by the ResilientCaller in the resilience attribute
+    of the backend. Operations called while another one is running are called directly.
+    :param operation: Name of the operation
+    :param spool: Pass failed operations to the _spool function of the backend
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            caller = getattr(self, "resilience", None)
+            if caller is None or getattr(_local, "active", False):
+                return fn(self, *args, **kwargs)
+            _local.active = True
+            try:
+                fallback = (lambda error: self._spool(operation, *args, **kwargs)) if spool else None
+                return caller.call(operation, fn, self, *args, fallback=fallback, **kwargs)
+            finally:
+                _local.active = False
+
+        return wrapper
+
+    return decorator
+
+
+def report_resilience(pads):
+    """
+    Report the counters of the backend operations at the end of the active run.
+    :param pads: PyPads instance
+    """
+    caller = getattr(pads.backend, "resilience", None)
+    if caller is None:
+        return
+    caller.reset()
+
+    def report(pads, *args, **kwargs):
+        counts = caller.summary()
+        caller.reset()
+        if sum(counts.values()) == 0:
+            return
+        message = "Backend operations of the run: {} retried, {} failed, {} spooled, {} dropped.".format(
+            counts["retried"], counts["failed"], counts["spooled"], counts["dropped"])
+        if counts["spooled"] > 0 or counts["dropped"] > 0:
+            logger.warning(message + " Spooled operations are replayed by pypads recover.")
+        else:
+            logger.info(message)
+
+    pads.api.register_teardown_utility("backend_resilience", report,
+                                       error_message="Couldn't report the backend operations with {}, because of "
+                                                     "exception: {} \nTrace:\n{}", order=sys.maxsize - 1)
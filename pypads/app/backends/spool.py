@@ -0,0 +1,226 @@
+"""
+Offline spooling of runs. In offline mode pypads records runs into a local mlflow file store (the spool) instead of the
+tracking store. Metrics are appended to files of the run and all metadata documents are stored as json artifacts of the
+run. sync_spool replays the finished runs of a spool into a target store later on.
+"""
+import json
+import os
+
+from mlflow.entities import ViewType, Param, Metric, RunTag
+from mlflow.tracking import MlflowClient
+from mlflow.utils.file_utils import local_file_uri_to_path
+
+from pypads import logger
+from pypads.utils.util import persistent_hash
+
+# Tag of a synced run holding the id of the run in the spool
+SPOOL_RUN_TAG = "pypads.spool.run_id"
+
+# Tag marking a run as completely synced
+SPOOL_SYNCED_TAG = "pypads.spool.synced"
+
+PARENT_RUN_TAG = "mlflow.parentRunId"
+
+_BATCH_SIZE = 1000
+
+
+def spool_folder(folder, offline):
+    """
+    Get the folder of the spool.
+    :param folder: pypads folder
+    :param offline: Value of the offline config. True for the default spool in the pypads folder or a path.
+    :return: Path of the spool
+    """
+    if isinstance(offline, str):
+        return os.path.abspath(os.path.expanduser(offline))
+    return os.path.join(folder, "spool")
+
+
+def _search_all(client, experiment_ids, filter_string="", view_type=ViewType.ACTIVE_ONLY):
+    runs = []
+    token = None
+    while True:
+        page = client.search_runs(experiment_ids, filter_string=filter_string, run_view_type=view_type,
+                                  max_results=_BATCH_SIZE, order_by=["attributes.start_time ASC"], page_token=token)
+        runs.extend(page)
+        token = page.token
+        if not token:
+            return runs
+
+
+def _batches(items, size=_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SpoolSync:
+    """
+    Replays the runs of a spool into a target store. Synced runs are tagged with the id of their spooled run and
+    marked as synced after all of their data was copied. A sync is therefore idempotent: synced runs are skipped and
+    partially synced runs of an interrupted sync are replaced. The references of the metadata documents to runs and
+    experiments of the spool are rewritten to the synced runs and experiments before the documents are upserted.
+    """
+
+    def __init__(self, spool, target_uri, mongo_db=None):
+        """
+        :param spool: Folder of the spool
+        :param target_uri: Tracking uri of the target store
+        :param mongo_db: MongoDB database to upsert the metadata documents into
+        """
+        self.source = MlflowClient(tracking_uri=spool)
+        self.target = MlflowClient(tracking_uri=target_uri)
+        self.target_uri = target_uri
+        self.mongo_db = mongo_db
+        self._run_ids = {}
+        self._experiment_ids = {}
+
+    def target_run(self, experiment_id, run_id):
+        """
+        Get the synced run of a spooled run.
+        :return: The run in the target store or None
+        """
+        runs = _search_all(self.target, [experiment_id], filter_string="tags.`{}` = '{}'".format(SPOOL_RUN_TAG, run_id),
+                           view_type=ViewType.ACTIVE_ONLY)
+        return runs[0] if len(runs) > 0 else None
+
+    def sync(self, include_running=False, delete=False):
+        """
+        Replay all runs of the spool.
+        :param include_running: Also replay runs which didn't end yet
+        :param delete: Delete the replayed runs from the spool
+        :return: Dict mapping spooled run ids to the ids of the synced runs
+        """
+        runs = []
+        for experiment in self.source.search_experiments(view_type=ViewType.ACTIVE_ONLY):
+            target_experiment = self.target.get_experiment_by_name(experiment.name)
+            experiment_id = target_experiment.experiment_id if target_experiment else self.target.create_experiment(
+                experiment.name)
+            self._experiment_ids[experiment.experiment_id] = experiment_id
+            for run in _search_all(self.source, [experiment.experiment_id]):
+                if run.info.status == "RUNNING" and not include_running:
+                    logger.info("Skipping run {} of the spool which is still running.".format(run.info.run_id))
+                    continue
+                self._run_ids[run.info.run_id] = self.sync_run(run, experiment_id)
+                runs.append(run)
+        if self.mongo_db is not None:
+            # Documents reference other runs of the spool. They are upserted after all runs got their synced ids.
+            for run in runs:
+                artifacts = local_file_uri_to_path(run.info.artifact_uri)
+                if os.path.isdir(artifacts):
+                    self.sync_documents(artifacts)
+        if delete:
+            for run in runs:
+                self.source.delete_run(run.info.run_id)
+        return dict(self._run_ids)
+
+    def sync_run(self, run, experiment_id):
+        """
+        Replay a single run.
+        :param run: Spooled run
+        :param experiment_id: Id of the experiment in the target store
+        :return: Id of the synced run
+        """
+        run_id = run.info.run_id
+        existing = self.target_run(experiment_id, run_id)
+        if existing is not None:
+            if existing.data.tags.get(SPOOL_SYNCED_TAG) == "true":
+                return existing.info.run_id
+            # Remainder of an interrupted sync
+            self.target.delete_run(existing.info.run_id)
+
+        tags = dict(run.data.tags)
+        tags[SPOOL_RUN_TAG] = run_id
+        if PARENT_RUN_TAG in tags:
+            tags[PARENT_RUN_TAG] = self._parent_id(experiment_id, tags[PARENT_RUN_TAG])
+        synced = self.target.create_run(experiment_id, start_time=run.info.start_time, tags=tags)
+        synced_id = synced.info.run_id
+
+        for params in _batches([Param(k, v) for k, v in run.data.params.items()], 100):
+            self.target.log_batch(synced_id, params=params)
+        for key in run.data.metrics:
+            history = [Metric(m.key, m.value, m.timestamp, m.step) for m in
+                       self.source.get_metric_history(run_id, key)]
+            for metrics in _batches(history):
+                self.target.log_batch(synced_id, metrics=metrics)
+
+        artifacts = local_file_uri_to_path(run.info.artifact_uri)
+        if os.path.isdir(artifacts) and len(os.listdir(artifacts)) > 0:
+            self.target.log_artifacts(synced_id, artifacts)
+
+        if run.info.status != "RUNNING":
+            self.target.set_terminated(synced_id, status=run.info.status, end_time=run.info.end_time)
+        self.target.log_batch(synced_id, tags=[RunTag(SPOOL_SYNCED_TAG, "true")])
+        logger.info("Synced run {} of the spool to run {}.".format(run_id, synced_id))
+        return synced_id
+
+    def _parent_id(self, experiment_id, parent_id):
+        if parent_id not in self._run_ids:
+            parent = self.target_run(experiment_id, parent_id)
+            if parent is None:
+                return parent_id
+            self._run_ids[parent_id] = parent.info.run_id
+        return self._run_ids[parent_id]
+
+    def _rewrite(self, entry):
+        """
+        Rewrite the references of a document and its nested references to the runs and experiments of the target
+        store. The ids are recomputed from the target uri like the ids of references logged to the target directly.
+        :param entry: Document or part of it
+        :return: Rewritten entry
+        """
+        if isinstance(entry, list):
+            return [self._rewrite(e) for e in entry]
+        if not isinstance(entry, dict):
+            return entry
+        entry = {k: self._rewrite(v) for k, v in entry.items()}
+        if isinstance(entry.get("run"), dict) and entry["run"].get("uid") in self._run_ids:
+            entry["run"]["uid"] = self._run_ids[entry["run"]["uid"]]
+        if isinstance(entry.get("experiment"), dict) and entry["experiment"].get("uid") in self._experiment_ids:
+            entry["experiment"]["uid"] = self._experiment_ids[entry["experiment"]["uid"]]
+        if entry.get("backend_uri") is not None:
+            entry["backend_uri"] = self.target_uri
+            if "_id" in entry and "uid" in entry:
+                entry["_id"] = str(persistent_hash((self.target_uri, entry["uid"])))
+        return entry
+
+    def sync_documents(self, artifacts):
+        """
+        Upsert the metadata documents stored as json artifacts. Their references are rewritten to the synced runs.
+        :param artifacts: Local artifact folder of the spooled run
+        :return: Number of upserted documents
+        """
+        count = 0
+        for name in os.listdir(artifacts):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(artifacts, name)) as f:
+                    document = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(document, dict) or "storage_type" not in document or "_id" not in document:
+                continue
+            document = self._rewrite(document)
+            self.mongo_db[document["storage_type"]].replace_one({"_id": document["_id"]}, document, upsert=True)
+            count += 1
+        return count
+
+
+def sync_spool(spool, target_uri, mongo=False, include_running=False, delete=False):
+    """
+    Replay the runs of a spool into a target store.
+    :param spool: Folder of the spool
+    :param target_uri: Tracking uri of the target store
+    :param mongo: Also upsert the metadata documents into the MongoDB configured by the environment
+    :param include_running: Also replay runs which didn't end yet
+    :param delete: Delete the replayed runs from the spool
+    :return: Dict mapping spooled run ids to the ids of the synced runs
+    """
+    mongo_db = None
+    if mongo:
+        from pymongo import MongoClient
+        from pypads.variables import MONGO_URL, MONGO_USER, MONGO_PW, MONGO_DB
+        client = MongoClient(os.environ[MONGO_URL], username=os.environ[MONGO_USER],
+                             password=os.environ[MONGO_PW], authSource=os.environ[MONGO_DB])
+        mongo_db = client[os.environ[MONGO_DB]]
+    return SpoolSync(spool, target_uri, mongo_db=mongo_db).sync(include_running=include_running, delete=delete)
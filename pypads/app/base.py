@@ -1,9 +1,11 @@
 import ast
 import atexit
 import importlib
+import os
 import pkgutil
 import signal
-from typing import List, Union, Callable
+import threading
+from typing import List, Union, Callable, Optional
 
 import mlflow
 from pypads.app.env import LoggerEnv
@@ -11,8 +13,10 @@ from pypads.app.env import LoggerEnv
 from pypads import logger
 from pypads.app.actuators import ActuatorPluginManager, PyPadsActuators
 from pypads.app.api import ApiPluginManager, PyPadsApi
-from pypads.app.backends.repository import SchemaRepository, LoggerRepository, LibraryRepository, MappingRepository
+from pypads.app.backends.repository import SchemaRepository, LoggerRepository, LibraryRepository, MappingRepository, \
+    SnapshotRepository, ObjectRepository
 from pypads.app.decorators import DecoratorPluginManager, PyPadsDecorators
+from pypads.app.misc.artifact_cache import ArtifactCache
 from pypads.app.misc.caches import PypadsCache
 from pypads.app.results import ResultPluginManager, results, PyPadsResults
 from pypads.app.validators import ValidatorPluginManager, validators, PyPadsValidators
@@ -26,10 +30,13 @@ from pypads.injections.analysis.call_tracker import CallTracker
 # from pypads.injections.loggers.mlflow.mlflow_autolog import MlFlowAutoRSF
 from pypads.injections.setup.git import IGitRSF
 from pypads.injections.setup.hardware import ISystemRSF, IRamRSF, ICpuRSF, IDiskRSF, IPidRSF, ISocketInfoRSF, \
-    IMacAddressRSF, IGpuRSF
+    IMacAddressRSF, IGpuRSF, IContainerRSF
 from pypads.injections.setup.misc_setup import DependencyRSF, LoguruRSF, StdOutRSF
 from pypads.variables import CONFIG_NAME, DEFAULT_EXPERIMENT_NAME, track_sub_processes, recursion_identity, \
-    recursion_depth, log_on_failure, include_default_mappings, mongo_db
+    recursion_depth, log_on_failure, include_default_mappings, mongo_db, overhead_budget, profile, \
+    parallel_setups, setup_timeout, snapshot_cache, hardware_sampler, content_store, \
+    artifact_compression, artifact_compression_threshold, artifact_cache, artifact_cache_verify, offline, \
+    write_ahead_log, backend_resilience, metric_aggregation, metric_series_chunk_size
 
 tracking_active = None
 
@@ -70,12 +77,37 @@ DEFAULT_CONFIG = {**{
     log_on_failure: True,  # Log the stdout / stderr output when the execution of the experiment failed
     include_default_mappings: True,  # Include the default mappings additionally to the passed mapping if a mapping
     # is passed
-    mongo_db: True  # Use a mongo_db endpoint
+    mongo_db: True,  # Use a mongo_db endpoint
+    overhead_budget: None,  # Fraction of the wall time the injection loggers may take before the tracking gets
+    # degraded. E.g. 0.05 for 5%. A dict with the keys budget, sample_rate and window can also be given.
+    profile: False,  # Profile the time spent in the components of pypads and store a report at the end of each run
+    parallel_setups: True,  # Run independent setup functions concurrently on start of a run
+    setup_timeout: 30,  # Seconds to wait for a single setup function when running them concurrently
+    snapshot_cache: True,  # Reference the environment snapshots of earlier runs if the environment didn't change
+    hardware_sampler: None,  # Resolution of the hardware sampler in seconds or a dict with the keys period, capacity,
+    # reservoir and percentiles
+    content_store: False,  # Store artifacts only once by the hash of their content in a repository shared by all runs
+    artifact_compression: None,  # Compression of logged artifacts (gzip, zstd or lz4). A dict maps file formats
+    # (e.g. pickle) to their compression.
+    artifact_compression_threshold: 1 << 16,  # Artifacts smaller than this number of bytes are stored uncompressed
+    artifact_cache: 1 << 30,  # Bytes of downloaded artifacts of remote stores kept in a local cache. 0 to disable.
+    artifact_cache_verify: True,  # Validate the checksum of a cached artifact on every read. False to only compare its
+    # size and modification time
+    offline: False,  # Record runs into a local spool (True for <folder>/spool or a path) to replay them later on with
+    # pypads sync
+    write_ahead_log: True,  # Append tracking data to a log per run and finalize runs of killed processes on start
+    backend_resilience: True,  # Retry failed backend operations and spool writes into the write-ahead log while the
+    # backend is unavailable. A number of retries or a dict with the keys retries, backoff, max_backoff,
+    # failure_threshold and reset_timeout can also be given. False to disable.
+    metric_aggregation: None,  # Aggregate the values of metrics and store them in batches. The flush interval in
+    # seconds or a dict with the keys interval and series (mean, last, min, max or None) can be given.
+    metric_series_chunk_size: 1000  # Number of values of an array valued metric written into a chunk of its series
 }, **PARSED_CONFIG}
 
 DEFAULT_SETUP_FNS = {DependencyRSF(), LoguruRSF(), StdOutRSF(), IGitRSF(_pypads_timeout=3),
                      ISystemRSF(), IRamRSF(), ICpuRSF(),
-                     IDiskRSF(), IPidRSF(), ISocketInfoRSF(), IMacAddressRSF(),IGpuRSF()}
+                     IDiskRSF(), IPidRSF(), ISocketInfoRSF(), IMacAddressRSF(),IGpuRSF(),
+                     IContainerRSF()}
 
 # List of exit functions already called. This is used to stop multiple execution on SIGNAL and atexit etc.
 executed_exit_fns = set()
@@ -151,6 +183,11 @@ class PyPads:
         from pypads.app.misc.managed_git import ManagedGitFactory
         self._managed_git_factory = ManagedGitFactory(self)
 
+        # Enable the self profiling of pypads
+        if self.config.get(profile, False):
+            from pypads.app.misc.profiler import enable_profiling
+            enable_profiling(self)
+
         from pypads.app.backends.mlflow import MLFlowBackendFactory
         self._backend = MLFlowBackendFactory.make(self.uri)
 
@@ -166,6 +203,9 @@ class PyPads:
         self._library_repository = LibraryRepository()
         self._schema_repository = SchemaRepository()
         self._logger_repository = LoggerRepository()
+        self._snapshot_repository = SnapshotRepository()
+        self._object_repository = ObjectRepository()
+        self._artifact_cache = None
 
         # Activate the discovered plugins
         if disable_plugins is None:
@@ -217,6 +257,13 @@ class PyPads:
 
         self.add_exit_fn(cleanup)
 
+        # Finalize the runs of killed processes from their write-ahead logs. This is done in the background to not
+        # block the start on an unavailable backend. Logs of spooled operations are left to pypads recover.
+        if self.config.get(write_ahead_log, False):
+            from pypads.app.misc.wal import recover_runs
+            threading.Thread(target=recover_runs, args=(self.folder,), kwargs={"spooled": False},
+                             name="PyPadsRecovery", daemon=True).start()
+
         # SIGKILL and SIGSTOP are not catchable
         signal.signal(signal.SIGTERM, self.run_exit_fns)
         signal.signal(signal.SIGINT, self.run_exit_fns)
@@ -328,6 +375,26 @@ class PyPads:
     def mapping_repository(self) -> MappingRepository:
         return self._mapping_repository
 
+    @property
+    def snapshot_repository(self) -> SnapshotRepository:
+        return self._snapshot_repository
+
+    @property
+    def object_repository(self) -> ObjectRepository:
+        return self._object_repository
+
+    @property
+    def artifact_cache(self) -> Optional[ArtifactCache]:
+        """
+        Return the local cache of downloaded artifacts or None if it is disabled.
+        :return:
+        """
+        if self._artifact_cache is None and self.config.get(artifact_cache, 0):
+            self._artifact_cache = ArtifactCache(os.path.join(self.folder, "artifact_cache"),
+                                                 max_bytes=self.config[artifact_cache],
+                                                 verify=self.config.get(artifact_cache_verify, True))
+        return self._artifact_cache
+
     def add_instance_modifier(self, fn: Callable):
         """
         This function allows plugins to modify the pypads instance on __init__ shortly after the base initialisation.
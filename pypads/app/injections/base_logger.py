@@ -13,6 +13,7 @@ from pypads.app.injections.tracked_object import LoggerCall, TrackedObject, Logg
 from pypads.app.misc.mixins import DependencyMixin, DefensiveCallableMixin, TimedCallableMixin, \
     IntermediateCallableMixin, ConfigurableCallableMixin, LibrarySpecificMixin, \
     FunctionHolderMixin, BaseDefensiveCallableMixin, ResultDependentMixin, CacheDependentMixin
+from pypads.app.misc.profiler import profile_span
 from pypads.exceptions import PassThroughException, NoCallAllowedError
 from pypads.importext.versioning import all_libs
 from pypads.model.logger_model import LoggerModel
@@ -48,6 +49,13 @@ class LoggerExecutor(DefensiveCallableMixin, FunctionHolderMixin, TimedCallableM
     @abstractmethod
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        fn = self.fn
+        self._span_name = ".".join([fn.__self__.__class__.__name__, fn.__name__]) if hasattr(fn, "__self__") \
+            else getattr(fn, "__name__", str(fn))
+
+    def __real_call__(self, *args, **kwargs):
+        with profile_span("logger", self._span_name):
+            return super().__real_call__(*args, **kwargs)
 
     def _handle_error(self, *args, ctx, _pypads_env, error, **kwargs):
         """
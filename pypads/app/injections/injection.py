@@ -9,6 +9,7 @@ from pypads.app.call import Call
 from pypads.app.env import InjectionLoggerEnv
 from pypads.app.injections.base_logger import Logger, LoggerExecutor, OriginalExecutor, env_cache
 from pypads.app.injections.tracked_object import LoggerCall, FallibleMixin
+from pypads.app.misc.budget import get_overhead_budget
 from pypads.app.misc.inheritance import SuperStop
 from pypads.app.misc.mixins import OrderMixin, MissingDependencyError
 from pypads.exceptions import NoCallAllowedError
@@ -34,6 +35,9 @@ class InjectionLogger(Logger, OrderMixin, SuperStop, metaclass=ABCMeta):
     """
     category: str = "InjectionLogger"
 
+    # Flag loggers which are costly per call. These are the first to be disabled if an overhead budget is exceeded.
+    _expensive = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -46,6 +50,24 @@ class InjectionLogger(Logger, OrderMixin, SuperStop, metaclass=ABCMeta):
     def get_model_cls(cls) -> Type[BaseModel]:
         return InjectionLoggerModel
 
+    @property
+    def expensive(self):
+        return self._expensive
+
+    def __call__(self, ctx, *args, _pypads_env=None, **kwargs):
+        if _pypads_env is not None:
+            budget = get_overhead_budget(_pypads_env.pypads)
+            if budget is not None and not budget.allows(self):
+                # The logger was throttled. Execute the next callback directly.
+                return _pypads_env.callback(*args, **kwargs)
+        return super().__call__(ctx, *args, _pypads_env=_pypads_env, **kwargs)
+
+    @staticmethod
+    def _account_overhead(_pypads_env, pre_time, post_time, child_time):
+        budget = get_overhead_budget(_pypads_env.pypads)
+        if budget is not None:
+            budget.account(pre_time, post_time, child_time)
+
     def __pre__(self, ctx, *args,
                 _logger_call, _logger_output, _args, _kwargs, **kwargs):
         """
@@ -121,6 +143,7 @@ class InjectionLogger(Logger, OrderMixin, SuperStop, metaclass=ABCMeta):
                                                  _args=args,
                                                  _kwargs=kwargs, **kwargs_)
             logger_call.post_time = post_time
+            self._account_overhead(_pypads_env, pre_time, post_time, time)
 
             _environment_information.update({"_post_result": _post_result})
         except Exception as e:
@@ -324,6 +347,7 @@ class MultiInjectionLogger(DelayedResultsMixin, InjectionLogger, SuperStop, meta
                                                  _args=args,
                                                  _kwargs=kwargs, **{**self.static_parameters, **_pypads_hook_params})
             logger_call.post_time += post_time
+            self._account_overhead(_pypads_env, pre_time, post_time, time)
 
             _environment_information.update({"_post_result": _post_result})
         except Exception as e:
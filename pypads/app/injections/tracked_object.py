@@ -137,6 +137,16 @@ class ResultHolderMixin(ProducedMixin, ModelObject, SuperStop, metaclass=ABCMeta
         return pads.api.log_metric(key, value, description=description, step=step, additional_data=additional_data,
                                    holder=self)
 
+    def store_array_metric(self: Union['ResultHolderMixin', ResultHolderModel], key, value, description="", step=None,
+                           additional_data: dict = None):
+        """
+        Function to append a vector or array valued metric relevant to this logger to the series of the metric.
+        """
+        from pypads.app.pypads import get_current_pads
+        pads = get_current_pads()
+        return pads.api.log_array_metric(key, value, description=description, step=step,
+                                         additional_data=additional_data, holder=self)
+
     def store_param(self: Union['ResultHolderMixin', ResultHolderModel], key, value, param_type=None, description="",
                     additional_data: dict = None):
         """
@@ -160,13 +170,18 @@ class ResultHolderMixin(ProducedMixin, ModelObject, SuperStop, metaclass=ABCMeta
 
     def store_mem_artifact(self: Union['ResultHolderMixin', ResultHolderModel], path, obj,
                            write_format=FileFormats.text,
-                           description="", additional_data: dict = None):
+                           description="", additional_data: dict = None, compression=None):
         """
-        Function to store a artifact relevant to this logger.
+        Function to store a artifact relevant to this logger. The compression defaults to the
+        _pypads_artifact_compression parameter of the logger.
         """
         from pypads.app.pypads import get_current_pads
+        if compression is None:
+            creator = getattr(getattr(self, "producer", None), "creator", None)
+            compression = getattr(creator, "static_parameters", {}).get("_pypads_artifact_compression", None)
         return get_current_pads().api.log_mem_artifact(path, obj, write_format=write_format, description=description,
-                                                       additional_data=additional_data, holder=self)
+                                                       additional_data=additional_data, holder=self,
+                                                       compression=compression)
 
     def store_tag(self: Union['ResultHolderMixin', ResultHolderModel], key, value, value_format="string",
                   description="",
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from pypads import logger
+from pypads.utils.fingerprint import file_digest
+
+ENTRY_FILE = "entry.json"
+
+
+class ArtifactCache:
+    """
+    Persistent read-through cache for downloaded artifacts. An entry is keyed by run id, artifact path and size of the
+    remote file. The checksum of a file is computed when it is put into the cache and validated on every read to detect
+    corrupted files. Without verify reads only compare the size and modification time of the cached file. The least
+    recently used entries are evicted if the cached files exceed max_bytes.
+    """
+
+    def __init__(self, folder, max_bytes=1 << 30, verify=True):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(run_id, path, size):
+        return hashlib.sha256("\0".join([str(run_id), path.replace(os.sep, "/"), str(size)]).encode()).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.folder, key[:2], key)
+
+    def get(self, run_id, path, size, verify=None):
+        """
+        Get the cached file of an artifact.
+        :param run_id: Id of the run holding the artifact
+        :param path: Path of the artifact in the run
+        :param size: Size of the remote file
+        :param verify: Validate the checksum of the cached file. Defaults to the verify setting of the cache.
+        :return: Local path of the cached file or None if it isn't cached (or was corrupted)
+        """
+        entry_dir = self._entry_dir(self.key(run_id, path, size))
+        entry_path = os.path.join(entry_dir, ENTRY_FILE)
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        local_path = os.path.join(entry_dir, entry["file"])
+        if verify is None:
+            verify = self.verify
+        try:
+            stat = os.stat(local_path)
+            valid = stat.st_size == entry["size"] and stat.st_mtime_ns == entry.get("mtime_ns")
+            if valid and verify:
+                valid = file_digest(local_path) == entry["sha256"]
+        except OSError:
+            valid = False
+        if not valid:
+            logger.warning("Cached artifact {} of run {} is corrupted. Downloading it again.".format(path, run_id))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        # The modification time of the entry marks its last access
+        os.utime(entry_path)
+        return local_path
+
+    def put(self, run_id, path, size, local_path):
+        """
+        Move a downloaded file into the cache.
+        :param run_id: Id of the run holding the artifact
+        :param path: Path of the artifact in the run
+        :param size: Size of the remote file or None if the file at the path never changes
+        :param local_path: Path of the downloaded file
+        :return: Local path of the cached file
+        """
+        entry_dir = self._entry_dir(self.key(run_id, path, size))
+        os.makedirs(entry_dir, exist_ok=True)
+        cached_path = os.path.join(entry_dir, os.path.basename(path))
+        shutil.move(local_path, cached_path)
+        stat = os.stat(cached_path)
+        if size is not None and stat.st_size != size:
+            logger.warning("Downloaded artifact {} of run {} has {} bytes instead of {}.".format(
+                path, run_id, stat.st_size, size))
+        entry = {"run_id": run_id, "path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                 "file": os.path.basename(path), "sha256": file_digest(cached_path)}
+        tmp_path = os.path.join(entry_dir, ENTRY_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, os.path.join(entry_dir, ENTRY_FILE))
+        self.evict(keep=entry_dir)
+        return cached_path
+
+    def entries(self):
+        """
+        :return: List of tuples of last access, size and folder of all cached entries
+        """
+        entries = []
+        if not os.path.isdir(self.folder):
+            return entries
+        for prefix in os.scandir(self.folder):
+            if not prefix.is_dir():
+                continue
+            for entry_dir in os.scandir(prefix.path):
+                try:
+                    accessed = os.path.getmtime(os.path.join(entry_dir.path, ENTRY_FILE))
+                except OSError:
+                    continue
+                size = sum(f.stat().st_size for f in os.scandir(entry_dir.path) if f.is_file())
+                entries.append((accessed, size, entry_dir.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries until the cache fits into max_bytes.
+        :param keep: Folder of an entry which isn't removed
+        :return: Number of removed entries
+        """
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, entry_dir in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry_dir == keep:
+                    continue
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def download(self, run_id, path, size, fetch):
+        """
+        Get an artifact from the cache or download it.
+        :param run_id: Id of the run holding the artifact
+        :param path: Path of the artifact in the run
+        :param size: Size of the remote file or None if the file at the path never changes
+        :param fetch: Function downloading the artifact into the given folder and returning the local path
+        :return: Local path of the cached file
+        """
+        cached = self.get(run_id, path, size)
+        if cached is not None:
+            return cached
+        os.makedirs(os.path.join(self.folder, "downloads"), exist_ok=True)
+        download_dir = tempfile.mkdtemp(dir=os.path.join(self.folder, "downloads"))
+        try:
+            return self.put(run_id, path, size, fetch(download_dir))
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
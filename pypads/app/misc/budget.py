@@ -0,0 +1,135 @@
+import json
+import time
+
+from pypads import logger
+from pypads.variables import overhead_budget
+
+# Degradation levels of the tracking. Each level includes the restrictions of the ones before.
+FULL = 0  # All loggers are executed
+NO_EXPENSIVE = 1  # Loggers flagged as expensive are skipped
+SAMPLED = 2  # The remaining loggers are only executed on every n-th call
+
+LEVEL_NAMES = {FULL: "full", NO_EXPENSIVE: "no_expensive", SAMPLED: "sampled"}
+
+BUDGET_CACHE = "overhead_budget"
+OVERHEAD_TAG = "pypads.overhead"
+
+
+class OverheadBudget:
+    """
+    Run scoped bookkeeping of the time spent in the __pre__ and __post__ functions of the injection loggers. The
+    overhead is compared to the wall time passed in a measurement window. If the overhead exceeds the configured
+    fraction the tracking is degraded by one level and a new window is started.
+    """
+
+    def __init__(self, budget, sample_rate=10, window=1.0):
+        """
+        :param budget: Allowed fraction of overhead. 0.05 means 5% of the wall time may be spent in loggers.
+        :param sample_rate: Execute only every n-th call of a logger when degraded to sampling.
+        :param window: Minimal duration of a measurement window in seconds before a decision is taken.
+        """
+        self._budget = budget
+        self._sample_rate = max(int(sample_rate), 1)
+        self._window = window
+        self._level = FULL
+        self._start = time.time()
+        self._window_start = self._start
+        self._window_overhead = 0.
+        self._overhead = 0.
+        self._child_time = 0.
+        self._calls = {}
+        self._skipped = {}
+        self._decisions = []
+
+    @classmethod
+    def from_config(cls, value):
+        if isinstance(value, dict):
+            return cls(**value)
+        return cls(budget=float(value))
+
+    @property
+    def level(self):
+        return self._level
+
+    @property
+    def overhead(self):
+        return self._overhead
+
+    def allows(self, injection_logger) -> bool:
+        """
+        Decide if the given logger is to be executed in the current degradation level.
+        :param injection_logger: Logger which wants to be executed
+        :return: True if the logger is allowed to run
+        """
+        name = injection_logger.__class__.__name__
+        count = self._calls.get(name, 0)
+        self._calls[name] = count + 1
+        if (self._level >= NO_EXPENSIVE and injection_logger.expensive) or (
+                self._level >= SAMPLED and count % self._sample_rate != 0):
+            self._skipped[name] = self._skipped.get(name, 0) + 1
+            return False
+        return True
+
+    def account(self, pre_time, post_time, child_time):
+        """
+        Add the measured times of an executed logger and degrade the tracking if the budget is exceeded.
+        :param pre_time: Time spent in __pre__
+        :param post_time: Time spent in __post__
+        :param child_time: Time spent in the wrapped callback
+        """
+        overhead = (pre_time or 0) + (post_time or 0)
+        self._overhead += overhead
+        self._window_overhead += overhead
+        self._child_time += child_time or 0
+
+        now = time.time()
+        elapsed = now - self._window_start
+        if elapsed < self._window or self._level == SAMPLED:
+            return
+        ratio = self._window_overhead / elapsed
+        if ratio > self._budget:
+            self._level += 1
+            self._decisions.append({"timestamp": now, "level": LEVEL_NAMES[self._level], "overhead": ratio})
+            logger.warning(
+                "Tracking overhead of {:.1%} exceeds the budget of {:.1%}. Degrading tracking to level '{}'.".format(
+                    ratio, self._budget, LEVEL_NAMES[self._level]))
+        self._window_start = now
+        self._window_overhead = 0.
+
+    def summary(self):
+        elapsed = time.time() - self._start
+        return {
+            "budget": self._budget,
+            "level": LEVEL_NAMES[self._level],
+            "overhead": self._overhead,
+            "child_time": self._child_time,
+            "ratio": self._overhead / elapsed if elapsed > 0 else 0.,
+            "decisions": self._decisions,
+            "skipped": self._skipped
+        }
+
+
+def get_overhead_budget(pads):
+    """
+    Get the overhead budget of the active run. The budget gets created on first access if configured.
+    :param pads: PyPads instance
+    :return: OverheadBudget or None if no budget was configured
+    """
+    value = pads.config.get(overhead_budget, None)
+    if value is None:
+        return None
+    budget = pads.cache.run_get(BUDGET_CACHE)
+    if budget is None:
+        budget = OverheadBudget.from_config(value)
+        pads.cache.run_add(BUDGET_CACHE, budget)
+
+        def report(pads, *args, **kwargs):
+            summary = pads.cache.run_get(BUDGET_CACHE).summary()
+            pads.api.set_tag(OVERHEAD_TAG, json.dumps(summary),
+                             description="Measured overhead of the injection loggers and the degradation decisions "
+                                         "taken to stay within the overhead budget.")
+
+        pads.api.register_teardown_utility("overhead_budget_report", report,
+                                           error_message="Couldn't report the tracking overhead with {}, because of "
+                                                         "exception: {} \nTrace:\n{}")
+    return budget
@@ -64,8 +64,9 @@ class ManagedGit:
         return self.repo.active_branch.name
 
     def has_changes(self):
-        return len(self.repo.index.diff('HEAD')) > 0 or len(
-            self.repo.index.diff(None)) > 0 or len(self.repo.untracked_files) > 0
+        # A single git status is much faster than diffing the index and listing untracked files via GitPython. It
+        # mustn't refresh the index, which would change the git fingerprint of the next run.
+        return len(self.repo.git.execute(["git", "--no-optional-locks", "status", "--porcelain"])) > 0
 
     def create_patch(self):
         """
@@ -97,6 +98,34 @@ class ManagedGit:
         diff_hash = persistent_hash(patch)
         return patch, diff_hash
 
+    def snapshot_tree(self):
+        """
+        Write the current content of the tracked files into a tree object. A copy of the index is used, which leaves the
+        index and working tree untouched.
+        :return: Hash of the tree or None if the tracked files don't differ from HEAD
+        """
+        import shutil
+        import tempfile
+        tmp_dir = tempfile.mkdtemp()
+        index = os.path.join(tmp_dir, "index")
+        try:
+            if os.path.isfile(os.path.join(self.repo.git_dir, "index")):
+                shutil.copyfile(os.path.join(self.repo.git_dir, "index"), index)
+            env = {"GIT_INDEX_FILE": index}
+            self.repo.git.add("-u", env=env)
+            tree = self.repo.git.write_tree(env=env)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return None if tree == self.repo.head.commit.tree.hexsha else tree
+
+    def create_tree_patch(self, tree, version="HEAD"):
+        """
+        Creates a patch between a commit and a tree created by snapshot_tree
+        :return: patch and it's hash
+        """
+        patch = self.repo.git.diff(version, tree)
+        return patch, persistent_hash(patch)
+
     def restore_patch(self, patch):
         """
         Takes a pypads created patch and apply it on the current repository
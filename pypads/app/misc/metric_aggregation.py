@@ -0,0 +1,210 @@
+"""
+Aggregation of high-frequency metrics. In aggregation mode logged metric values only update an accumulator per metric
+in the run cache. The accumulators are flushed together in a single batch after an interval, storing one point per
+metric into its series, and at the end of the run. The metadata document of a metric is stored once with the
+aggregation policy and the statistics of all of its values.
+"""
+import sys
+import threading
+import time
+
+from pypads.model.logger_output import MetricAggregationModel
+from pypads.variables import metric_aggregation
+
+AGGREGATOR_CACHE = "metric_aggregator"
+
+DEFAULT_AGGREGATION_CONFIG = {
+    "interval": 10.0,  # Seconds after which the aggregated values are flushed
+    "series": "mean"  # Statistic of the values of an interval stored as point of the series (mean, last, min, max)
+    # or None to only store the statistics of the whole run
+}
+
+SERIES_STATISTICS = {"mean", "last", "min", "max"}
+
+
+class MetricAccumulator:
+    """
+    Running statistics of the values of a metric over the whole run and over the current interval.
+    """
+
+    def __init__(self, metric, series="mean"):
+        """
+        :param metric: Metric tracking object holding the metadata of the metric
+        :param series: Statistic of the interval stored as point of the series
+        """
+        self.metric = metric
+        self.series = series
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.
+        self.last = None
+        self.step = 0
+        # Reference to the metadata document of the metric
+        self.reference = None
+        self._reset_interval()
+
+    def _reset_interval(self):
+        self._interval_count = 0
+        self._interval_sum = 0.
+        self._interval_min = None
+        self._interval_max = None
+        self._interval_last = None
+        self._interval_timestamp = None
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count > 0 else None
+
+    def add(self, value, timestamp, step=None):
+        """
+        Add a value.
+        :param value: Value of the metric
+        :param timestamp: Time of the value in milliseconds
+        :param step: Step of the value. Defaults to the number of the value.
+        """
+        value = float(value)
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sum += value
+        self.last = value
+        self.step = step if step else self.count
+        self._interval_count += 1
+        self._interval_sum += value
+        self._interval_min = value if self._interval_min is None else min(self._interval_min, value)
+        self._interval_max = value if self._interval_max is None else max(self._interval_max, value)
+        self._interval_last = value
+        self._interval_timestamp = timestamp
+
+    def pop(self):
+        """
+        Get the point of the series aggregating the values added since the last call.
+        :return: Tuple of value, timestamp and step or None
+        """
+        if self._interval_count == 0 or self.series is None:
+            self._reset_interval()
+            return None
+        value = {"mean": self._interval_sum / self._interval_count, "last": self._interval_last,
+                 "min": self._interval_min, "max": self._interval_max}[self.series]
+        point = (value, self._interval_timestamp, self.step)
+        self._reset_interval()
+        return point
+
+
+class MetricAggregator:
+    """
+    Accumulators of all metrics of a run logged in aggregation mode.
+    """
+
+    def __init__(self, pads, interval=10.0, series="mean"):
+        if series is not None and series not in SERIES_STATISTICS:
+            raise ValueError("Unknown statistic {} for the series of aggregated metrics. Use one of {}.".format(
+                series, ", ".join(sorted(SERIES_STATISTICS))))
+        self.pads = pads
+        self.interval = interval
+        self.series = series
+        self._accumulators = {}
+        self._lock = threading.RLock()
+        self._flushed_at = time.time()
+
+    @classmethod
+    def from_config(cls, pads, value):
+        if isinstance(value, dict):
+            return cls(pads, **{**DEFAULT_AGGREGATION_CONFIG, **value})
+        if value is not None and not isinstance(value, bool):
+            return cls(pads, **{**DEFAULT_AGGREGATION_CONFIG, "interval": float(value)})
+        return cls(pads, **DEFAULT_AGGREGATION_CONFIG)
+
+    @property
+    def accumulators(self):
+        return self._accumulators
+
+    def policy(self, accumulator: MetricAccumulator):
+        return MetricAggregationModel(interval=self.interval, series=self.series, count=accumulator.count,
+                                      min=accumulator.min, max=accumulator.max, mean=accumulator.mean,
+                                      last=accumulator.last)
+
+    def add(self, key, value, step=None, description="", additional_data=None, holder=None):
+        """
+        Add a value of a metric. The metadata document of the metric is stored on its first value.
+        :return: Reference to the metadata document of the metric
+        """
+        from pypads.app.injections.tracked_object import Metric
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            if key not in self._accumulators:
+                metric = Metric(name=key, step=step or 0, data=value, description=description,
+                                additional_data=additional_data, parent=holder)
+                accumulator = MetricAccumulator(metric, series=self.series)
+                accumulator.add(value, timestamp, step)
+                metric.aggregation = self.policy(accumulator)
+                holder.add_result(metric)
+                accumulator.reference = self.pads.backend.log_json(metric, metric.uid)
+                self._accumulators[key] = accumulator
+            else:
+                accumulator = self._accumulators[key]
+                accumulator.add(value, timestamp, step)
+                if holder is not accumulator.metric.parent:
+                    holder.add_result(accumulator.metric)
+            if time.time() - self._flushed_at >= self.interval:
+                self.flush()
+            return accumulator.reference
+
+    def flush(self):
+        """
+        Store the points aggregating the values since the last flush of all metrics in a single batch.
+        :return: Number of stored points
+        """
+        with self._lock:
+            self._flushed_at = time.time()
+            points = []
+            for key, accumulator in self._accumulators.items():
+                point = accumulator.pop()
+                if point is not None:
+                    points.append((key,) + point)
+            if len(points) > 0:
+                self.pads.backend.log_metrics(points)
+            return len(points)
+
+    def close(self):
+        """
+        Flush the remaining values and store the metadata documents with the statistics of the whole run.
+        """
+        with self._lock:
+            self.flush()
+            for accumulator in self._accumulators.values():
+                metric = accumulator.metric
+                metric.data = accumulator.last
+                metric.step = accumulator.step
+                metric.aggregation = self.policy(accumulator)
+                self.pads.backend.log_json(metric, metric.uid)
+
+
+def is_aggregated(pads):
+    """
+    :return: True if metrics of the active run are to be aggregated by default
+    """
+    return bool(pads.config.get(metric_aggregation, None))
+
+
+def get_metric_aggregator(pads):
+    """
+    Get the metric aggregator of the active run. The aggregator gets created on first access and closed at the end of
+    the run.
+    :param pads: PyPads instance
+    :return: MetricAggregator
+    """
+    aggregator = pads.cache.run_get(AGGREGATOR_CACHE)
+    if aggregator is None:
+        aggregator = MetricAggregator.from_config(pads, pads.config.get(metric_aggregation, None))
+        pads.cache.run_add(AGGREGATOR_CACHE, aggregator)
+
+        def close(pads, *args, **kwargs):
+            aggregator.close()
+
+        # Close after the teardowns of the loggers which might log metrics
+        pads.api.register_teardown_utility("metric_aggregator", close,
+                                           error_message="Couldn't store the aggregated metrics with {}, because of "
+                                                         "exception: {} \nTrace:\n{}", order=sys.maxsize - 2)
+    return aggregator
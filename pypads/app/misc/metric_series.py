@@ -0,0 +1,221 @@
+"""
+Store of vector and array valued metrics. The values of a metric are appended to a buffer together with their step and
+timestamp and written as numbered npz chunks holding the columns step, timestamp and value into a folder of the run.
+A metric gets a single metadata document instead of one artifact per logged value.
+"""
+import os
+import sys
+import threading
+import time
+
+from pypads.model.logger_output import MetricSeriesModel
+from pypads.variables import metric_series_chunk_size
+
+SERIES_CACHE = "metric_series"
+
+SERIES_FOLDER = "metric_series"
+
+
+def series_folder(key):
+    return os.path.join(SERIES_FOLDER, key)
+
+
+def is_array_metric(value):
+    """
+    :return: True if the value is a vector or array of numbers
+    """
+    import numpy as np
+    if isinstance(value, (str, bytes, dict)) or np.isscalar(value):
+        return False
+    try:
+        array = np.asarray(value)
+    except Exception:
+        return False
+    return array.ndim > 0 and (np.issubdtype(array.dtype, np.number) or np.issubdtype(array.dtype, np.bool_))
+
+
+class MetricSeries:
+    """
+    Buffer of the values of a single metric. All values of a metric need to have the same shape.
+    """
+
+    def __init__(self, metric, folder, chunk_size=1000):
+        """
+        :param metric: Metric tracking object holding the metadata of the metric
+        :param folder: Local folder to write the chunks to
+        :param chunk_size: Number of values written into a chunk
+        """
+        self.metric = metric
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.shape = None
+        self.dtype = None
+        self.count = 0
+        self.chunks = 0
+        # Reference to the metadata document of the metric
+        self.reference = None
+        self._steps = []
+        self._timestamps = []
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def append(self, value, timestamp, step=None):
+        """
+        Append a value.
+        :param value: Vector or array
+        :param timestamp: Time of the value in milliseconds
+        :param step: Step of the value. Defaults to the number of the value.
+        """
+        import numpy as np
+        value = np.array(value)
+        if self.shape is None:
+            self.shape = value.shape
+            self.dtype = value.dtype
+        elif value.shape != self.shape:
+            raise ValueError("Values of the metric {} need to have the shape {} instead of {}.".format(
+                self.metric.name, self.shape, value.shape))
+        self.count += 1
+        self._steps.append(step if step is not None else self.count)
+        self._timestamps.append(timestamp)
+        self._values.append(value)
+
+    def write_chunk(self):
+        """
+        Write the buffered values into the next chunk.
+        :return: Path of the chunk or None if no values are buffered
+        """
+        import numpy as np
+        if len(self._values) == 0:
+            return None
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, "{}.{:05d}.npz".format(self.metric.name, self.chunks))
+        with open(path, "wb") as f:
+            np.savez_compressed(f, step=np.asarray(self._steps, dtype=np.int64),
+                                timestamp=np.asarray(self._timestamps, dtype=np.int64),
+                                value=np.stack(self._values).astype(self.dtype))
+        self.chunks += 1
+        self._steps, self._timestamps, self._values = [], [], []
+        return path
+
+    def model(self):
+        return MetricSeriesModel(count=self.count, chunks=self.chunks,
+                                 shape=list(self.shape) if self.shape is not None else [],
+                                 dtype=str(self.dtype) if self.dtype is not None else None)
+
+
+class MetricSeriesStore:
+    """
+    Series of all array valued metrics of a run.
+    """
+
+    def __init__(self, pads, chunk_size=1000):
+        self.pads = pads
+        self.chunk_size = chunk_size
+        self._series = {}
+        self._lock = threading.RLock()
+
+    @property
+    def series(self):
+        return self._series
+
+    def append(self, key, value, step=None, description="", additional_data=None, holder=None):
+        """
+        Append a value to the series of a metric. The metadata document of the metric is stored on its first value.
+        :return: Reference to the metadata document of the metric
+        """
+        from pypads.app.injections.tracked_object import Metric
+        from pypads.utils.logging_util import get_temp_folder
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            if key not in self._series:
+                metric = Metric(name=key, step=step or 0, data=series_folder(key), description=description,
+                                additional_data=additional_data, parent=holder)
+                series = MetricSeries(metric, os.path.join(get_temp_folder(), series_folder(key)),
+                                      chunk_size=self.chunk_size)
+                series.append(value, timestamp, step)
+                metric.series = series.model()
+                holder.add_result(metric)
+                series.reference = self.pads.backend.log_json(metric, metric.uid)
+                self._series[key] = series
+            else:
+                series = self._series[key]
+                series.append(value, timestamp, step)
+                if holder is not series.metric.parent:
+                    holder.add_result(series.metric)
+            if len(series) >= series.chunk_size:
+                self._store_chunk(series)
+            return series.reference
+
+    def _store_chunk(self, series: MetricSeries):
+        path = series.write_chunk()
+        if path is not None:
+            self.pads.backend.log_file(path, artifact_path=series.metric.data, move=True)
+
+    def flush(self):
+        """
+        Store the buffered values of all metrics.
+        """
+        with self._lock:
+            for series in self._series.values():
+                self._store_chunk(series)
+
+    def close(self):
+        """
+        Store the buffered values and update the metadata documents with the final number of values and chunks.
+        """
+        with self._lock:
+            self.flush()
+            for series in self._series.values():
+                metric = series.metric
+                metric.step = series.count
+                metric.series = series.model()
+                self.pads.backend.log_json(metric, metric.uid)
+
+
+def read_series(paths, expand=False):
+    """
+    Read the chunks of a series into a data frame.
+    :param paths: Local paths of the chunks in the order they were written
+    :param expand: Add a column per element of the values instead of a single column holding the values
+    :return: DataFrame with the columns step, timestamp and value
+    """
+    import numpy as np
+    import pandas as pd
+    from pypads.utils.logging_util import read_numpy_archive
+    chunks = [read_numpy_archive(p) for p in paths]
+    if len(chunks) == 0:
+        return pd.DataFrame(columns=["step", "timestamp", "value"])
+    steps = np.concatenate([c["step"] for c in chunks])
+    timestamps = np.concatenate([c["timestamp"] for c in chunks])
+    values = np.concatenate([c["value"] for c in chunks])
+    df = pd.DataFrame({"step": steps, "timestamp": pd.to_datetime(timestamps, unit="ms")})
+    if expand:
+        flat = values.reshape(len(values), -1)
+        names = ["value[{}]".format(",".join(str(i) for i in idx)) for idx in np.ndindex(*values.shape[1:])]
+        return pd.concat([df, pd.DataFrame(flat, columns=names)], axis=1)
+    df["value"] = list(values)
+    return df
+
+
+def get_metric_series_store(pads):
+    """
+    Get the metric series store of the active run. The store gets created on first access and closed at the end of
+    the run.
+    :param pads: PyPads instance
+    :return: MetricSeriesStore
+    """
+    store = pads.cache.run_get(SERIES_CACHE)
+    if store is None:
+        store = MetricSeriesStore(pads, chunk_size=pads.config.get(metric_series_chunk_size, 1000))
+        pads.cache.run_add(SERIES_CACHE, store)
+
+        def close(pads, *args, **kwargs):
+            store.close()
+
+        # Close after the teardowns of the loggers which might log metrics but before the temporary files are removed
+        pads.api.register_teardown_utility("metric_series", close,
+                                           error_message="Couldn't store the metric series with {}, because of "
+                                                         "exception: {} \nTrace:\n{}", order=sys.maxsize - 2)
+    return store
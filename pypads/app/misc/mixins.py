@@ -122,11 +122,16 @@ class CacheDependentMixin(CallableMixin, metaclass=ABCMeta):
     :return:
     """
     _needed_cached: List[str] = []
+    _provided_cached: List[str] = []  # Cache names written by this callable. Used to schedule the setup functions.
 
     @property
     def needed_cached(self) -> List:
         return self._needed_cached
 
+    @property
+    def provided_cached(self) -> List:
+        return self._provided_cached
+
     def __call__(self, *args, **kwargs):
         cached = self._check_cache_dependencies()
         return super().__call__(*args, _pypads_cached_results=cached, **kwargs)
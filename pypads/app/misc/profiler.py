@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from pypads import logger
+
+# Maximal number of single spans kept for the trace. Cumulative timings are kept for all spans.
+MAX_TRACE_EVENTS = 100000
+
+PROFILE_SUMMARY = "pypads_profile"
+PROFILE_TRACE = "pypads_profile_trace"
+
+
+class _NoSpan:
+    """
+    Context doing nothing. This is returned if profiling is disabled to keep the instrumentation cheap.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """
+    Collects the wall and cpu time spent in the components of pypads. Spans are measured with perf_counter_ns and
+    thread_time_ns. Cumulative timings are kept per category and name. Single spans are kept to be exported as
+    chrome trace.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter_ns()
+        self._totals = {}
+        self._events = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, category, name, detail=None):
+        start = time.perf_counter_ns()
+        cpu_start = time.thread_time_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            cpu = time.thread_time_ns() - cpu_start
+            self._add(category, name, detail, start, duration, cpu)
+
+    def _add(self, category, name, detail, start, duration, cpu):
+        with self._lock:
+            total = self._totals.get((category, name))
+            if total is None:
+                self._totals[(category, name)] = [1, duration, cpu]
+            else:
+                total[0] += 1
+                total[1] += duration
+                total[2] += cpu
+            if len(self._events) < MAX_TRACE_EVENTS:
+                self._events.append((category, name, detail, start, duration, threading.get_ident()))
+            else:
+                self._dropped += 1
+
+    def reset(self):
+        """
+        Drop all collected timings. This returns the old state as a new profiler.
+        :return: Profiler holding the collected timings
+        """
+        with self._lock:
+            collected = Profiler()
+            collected._origin, collected._totals, collected._events, collected._dropped = \
+                self._origin, self._totals, self._events, self._dropped
+            self._origin = time.perf_counter_ns()
+            self._totals = {}
+            self._events = []
+            self._dropped = 0
+        return collected
+
+    def summary(self):
+        """
+        Builds a table of the cumulative timings sorted by wall time.
+        :return: Summary as string
+        """
+        rows = sorted(self._totals.items(), key=lambda item: item[1][1], reverse=True)
+        header = "{:<14} {:<60} {:>10} {:>14} {:>14} {:>14}".format("category", "name", "calls", "wall [ms]",
+                                                                    "cpu [ms]", "mean [us]")
+        lines = [header, "-" * len(header)]
+        for (category, name), (count, wall, cpu) in rows:
+            lines.append("{:<14} {:<60} {:>10} {:>14.3f} {:>14.3f} {:>14.3f}".format(
+                category, str(name)[:60], count, wall / 1e6, cpu / 1e6, wall / count / 1e3))
+        if self._dropped > 0:
+            lines.append("")
+            lines.append("{} spans were not kept for the trace.".format(self._dropped))
+        return "\n".join(lines)
+
+    def trace(self):
+        """
+        Builds a chrome trace of the collected spans. This can also be loaded into speedscope.
+        :return: Trace as dict
+        """
+        pid = os.getpid()
+        events = []
+        for category, name, detail, start, duration, tid in self._events:
+            event = {"name": str(name), "cat": category, "ph": "X", "ts": (start - self._origin) / 1e3,
+                     "dur": duration / 1e3, "pid": pid, "tid": tid}
+            if detail is not None:
+                event["args"] = {"detail": str(detail)}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_profiler = None
+
+
+def profile_span(category, name, detail=None):
+    """
+    Get a context measuring the contained block if profiling is enabled.
+    :param category: Component of pypads like import, call_tracking, logger, serialization, backend, setup, teardown
+    :param name: Name of the measured function
+    :param detail: Optional detail added to the single span of the trace
+    :return: Context manager
+    """
+    if _profiler is None:
+        return _NO_SPAN
+    return _profiler.span(category, name, detail)
+
+
+def get_profiler():
+    return _profiler
+
+
+def enable_profiling(pads):
+    """
+    Enable the self profiling of pypads. At the end of each run a summary table and a chrome trace are stored as
+    artifacts.
+    :param pads: PyPads instance
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+
+    def write_profile(pads, *args, **kwargs):
+        from pypads.utils.logging_util import FileFormats
+        collected = _profiler.reset()
+        pads.api.log_mem_artifact(PROFILE_SUMMARY, collected.summary(), write_format=FileFormats.text,
+                                  description="Cumulative time spent in the components of pypads.")
+        pads.api.log_mem_artifact(PROFILE_TRACE, collected.trace(), write_format=FileFormats.json,
+                                  description="Chrome trace of the time spent in the components of pypads.")
+        # Spans created by storing the profile itself are not of interest
+        _profiler.reset()
+
+    def register_profile_writer(*args, **kwargs):
+        from pypads.app.pypads import get_current_pads
+        get_current_pads().api.register_teardown_utility("profile_writer", write_profile,
+                                                         error_message="Couldn't store the profile of pypads with "
+                                                                       "{}, because of exception: {} \nTrace:\n{}",
+                                                         order=sys.maxsize - 2)
+
+    pads.api.register_setup_utility("profile_writer_registration", register_profile_writer)
+    if pads.api.active_run():
+        register_profile_writer()
+    logger.info("Profiling of pypads is enabled.")
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
@@ -0,0 +1,231 @@
+import random
+import threading
+import time
+
+from pypads import logger
+from pypads.app.misc.wal import get_run_wal
+from pypads.utils.util import PeriodicThread
+from pypads.variables import hardware_sampler
+
+SAMPLER_CACHE = "hardware_sampler"
+
+DEFAULT_SAMPLER_CONFIG = {
+    "period": 1.0,  # Resolution of the sampler in seconds
+    "capacity": 3600,  # Number of latest samples kept per probe and stored at the end of the run
+    "reservoir": 1024,  # Number of samples drawn uniformly over the whole run to compute the percentiles
+    "percentiles": [50, 90, 99]
+}
+
+
+class RingBuffer:
+    """
+    Preallocated buffer holding the latest samples of a probe. Minimum, maximum and mean are kept exactly for all
+    samples ever added. Percentiles are computed from a reservoir sample drawn uniformly over the whole run.
+    """
+
+    def __init__(self, columns, capacity=3600, reservoir=1024):
+        import numpy as np
+        self.columns = list(columns)
+        width = len(self.columns)
+        self._capacity = max(int(capacity), 1)
+        self._times = np.zeros(self._capacity)
+        self._data = np.full((self._capacity, width), np.nan)
+        self._count = 0
+        self._min = np.full(width, np.inf)
+        self._max = np.full(width, -np.inf)
+        self._sum = np.zeros(width)
+        self._valid = np.zeros(width)
+        self._reservoir = np.full((max(int(reservoir), 1), width), np.nan)
+        self._random = random.Random(0)
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    @property
+    def count(self):
+        """
+        :return: Number of samples added over the whole run
+        """
+        return self._count
+
+    def append(self, timestamp, values):
+        import numpy as np
+        values = np.asarray(values, dtype=float)
+        idx = self._count % self._capacity
+        self._times[idx] = timestamp
+        self._data[idx] = values
+
+        valid = ~np.isnan(values)
+        self._min = np.where(valid, np.fmin(self._min, values), self._min)
+        self._max = np.where(valid, np.fmax(self._max, values), self._max)
+        self._sum += np.where(valid, values, 0.)
+        self._valid += valid
+
+        # Reservoir sampling (Algorithm R)
+        if self._count < len(self._reservoir):
+            self._reservoir[self._count] = values
+        else:
+            j = self._random.randint(0, self._count)
+            if j < len(self._reservoir):
+                self._reservoir[j] = values
+        self._count += 1
+
+    def samples(self):
+        """
+        Get the kept samples in chronological order. The first column holds the timestamps.
+        :return: Array of shape (samples, 1 + columns)
+        """
+        import numpy as np
+        n = len(self)
+        start = self._count % self._capacity if self._count > self._capacity else 0
+        order = (np.arange(n) + start) % self._capacity
+        return np.column_stack([self._times[order], self._data[order]])
+
+    def aggregates(self, percentiles=(50, 90, 99)):
+        """
+        Aggregates per column over the whole run.
+        :param percentiles: Percentiles to compute
+        :return: Dict of column names to dicts of aggregates
+        """
+        import numpy as np
+        out = {}
+        reservoir = self._reservoir[:min(self._count, len(self._reservoir))]
+        for i, column in enumerate(self.columns):
+            if self._valid[i] == 0:
+                continue
+            values = reservoir[:, i]
+            values = values[~np.isnan(values)]
+            aggregate = {"min": float(self._min[i]), "max": float(self._max[i]),
+                         "mean": float(self._sum[i] / self._valid[i]), "count": int(self._valid[i])}
+            for p in percentiles:
+                aggregate["p" + str(p)] = float(np.percentile(values, p)) if len(values) > 0 else None
+            out[column] = aggregate
+        return out
+
+
+class Probe:
+    """
+    Function sampled by the hardware sampler. It has to return one value per column.
+    """
+
+    def __init__(self, name, fn, columns, buffer, every=1, on_flush=None):
+        self.name = name
+        self.fn = fn
+        self.columns = columns
+        self.buffer = buffer
+        self.every = max(int(every), 1)
+        self.on_flush = on_flush
+        self.failed = False
+
+
+class HardwareSampler:
+    """
+    Single thread per run collecting the values of all registered probes on each tick into ring buffers.
+    """
+
+    def __init__(self, period=1.0, capacity=3600, reservoir=1024, percentiles=(50, 90, 99)):
+        self.period = period
+        self.percentiles = list(percentiles)
+        self._capacity = capacity
+        self._reservoir = reservoir
+        self._probes = {}
+        self._ticks = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        # Write-ahead log keeping the samples if the process gets killed
+        self.wal = None
+
+    @classmethod
+    def from_config(cls, value):
+        if isinstance(value, dict):
+            return cls(**{**DEFAULT_SAMPLER_CONFIG, **value})
+        if value is not None:
+            return cls(**{**DEFAULT_SAMPLER_CONFIG, "period": float(value)})
+        return cls(**DEFAULT_SAMPLER_CONFIG)
+
+    @property
+    def probes(self):
+        return self._probes
+
+    def add_probe(self, name, fn, columns, period=None, on_flush=None):
+        """
+        Register a new probe. The sampler thread is started on the first probe.
+        :param name: Name of the probe
+        :param fn: Function returning one value per column
+        :param columns: Names of the columns
+        :param period: Period in seconds in which the probe is to be sampled. This is rounded to a multiple of the
+        sampler period.
+        :param on_flush: Function called with the probe at the end of the run
+        :return: The probe
+        """
+        every = round(period / self.period) if period else 1
+        probe = Probe(name, fn, columns, RingBuffer(columns, capacity=self._capacity, reservoir=self._reservoir),
+                      every=every, on_flush=on_flush)
+        with self._lock:
+            self._probes[name] = probe
+        if self.wal is not None:
+            self.wal.append("probe", name=name, columns=list(columns))
+        if self._thread is None:
+            self._thread = PeriodicThread(target=self.tick, sleep=self.period, name="PyPadsHardwareSampler")
+            self._thread.start()
+        return probe
+
+    def tick(self):
+        """
+        Sample all probes due in this tick.
+        """
+        timestamp = time.time()
+        with self._lock:
+            probes = list(self._probes.values())
+        for probe in probes:
+            if probe.failed or self._ticks % probe.every != 0:
+                continue
+            try:
+                values = probe.fn()
+                probe.buffer.append(timestamp, values)
+                if self.wal is not None:
+                    self.wal.append("sample", probe=probe.name, timestamp=timestamp, values=list(values))
+            except Exception as e:
+                # Don't retry a broken probe on every tick
+                probe.failed = True
+                logger.warning("Disabling hardware probe {} because of exception: {}".format(probe.name, str(e)))
+        self._ticks += 1
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self):
+        """
+        Stop sampling and pass the collected samples to the registered flush functions.
+        """
+        self.stop()
+        for probe in self._probes.values():
+            if probe.on_flush is not None:
+                try:
+                    probe.on_flush(probe)
+                except Exception as e:
+                    logger.error("Couldn't store samples of hardware probe {}: {}".format(probe.name, str(e)))
+
+
+def get_hardware_sampler(pads):
+    """
+    Get the hardware sampler of the active run. The sampler gets created on first access and flushed at the end of
+    the run.
+    :param pads: PyPads instance
+    :return: HardwareSampler
+    """
+    sampler = pads.cache.run_get(SAMPLER_CACHE)
+    if sampler is None:
+        sampler = HardwareSampler.from_config(pads.config.get(hardware_sampler, None))
+        sampler.wal = get_run_wal(pads)
+        pads.cache.run_add(SAMPLER_CACHE, sampler)
+
+        def flush(pads, *args, **kwargs):
+            pads.cache.run_get(SAMPLER_CACHE).flush()
+
+        pads.api.register_teardown_utility("hardware_sampler", flush,
+                                           error_message="Couldn't store the hardware samples with {}, because of "
+                                                         "exception: {} \nTrace:\n{}")
+    return sampler
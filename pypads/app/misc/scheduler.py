@@ -0,0 +1,262 @@
+import threading
+
+from pypads import logger
+from pypads.app.misc.profiler import profile_span
+
+
+class ThreadRunStack:
+    """
+    Replacement for the active run stack of mlflow. Mlflow keeps a global stack which would let concurrently running
+    setups switch the active run of each other (e.g. by storing into a repository). Threads which forked the stack
+    work on their own copy. All other threads keep using the shared stack.
+    """
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        return getattr(self._local, "stack", self._shared)
+
+    def fork(self, stack):
+        self._local.stack = list(stack)
+
+    def __len__(self):
+        return len(self._stack)
+
+    def __getitem__(self, item):
+        return self._stack[item]
+
+    def __iter__(self):
+        return iter(self._stack)
+
+    def append(self, run):
+        self._stack.append(run)
+
+    def pop(self, *args):
+        return self._stack.pop(*args)
+
+
+# Number of threads using the replaced run stack of mlflow
+_run_stack_users = 0
+_run_stack_lock = threading.Lock()
+
+
+def _acquire_run_stack():
+    """
+    Replace the active run stack of mlflow for a thread of a setup. The stack of mlflow is only replaced while such
+    threads are running. Each call has to be followed by a call of _release_run_stack.
+    :return: The replaced run stack
+    """
+    global _run_stack_users
+    import mlflow.tracking.fluent as fluent
+    with _run_stack_lock:
+        if not isinstance(fluent._active_run_stack, ThreadRunStack):
+            fluent._active_run_stack = ThreadRunStack(fluent._active_run_stack)
+        _run_stack_users += 1
+        return fluent._active_run_stack
+
+
+def _release_run_stack():
+    """
+    Restore the active run stack of mlflow after the last thread of a setup finished.
+    """
+    global _run_stack_users
+    import mlflow.tracking.fluent as fluent
+    with _run_stack_lock:
+        _run_stack_users -= 1
+        if _run_stack_users == 0 and isinstance(fluent._active_run_stack, ThreadRunStack):
+            fluent._active_run_stack = fluent._active_run_stack._shared
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+class _SetupTask:
+    """
+    Single setup function to be executed by the scheduler.
+    """
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.requires = []
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.timed_out = False
+        self.skipped = False
+
+    @property
+    def order(self):
+        return getattr(self.fn, "order", 0)
+
+    @property
+    def needed(self):
+        return _as_list(getattr(self.fn, "needed_cached", None))
+
+    @property
+    def provided(self):
+        return _as_list(getattr(self.fn, "provided_cached", None))
+
+    @property
+    def failed(self):
+        return self.timed_out or self.skipped
+
+
+class SetupScheduler:
+    """
+    Runs the setup functions of a run concurrently. A dependency graph is build from the cache entries the setups
+    provide (_provided_cached) and need (_needed_cached). A setup is only started after all providers of its needed
+    cache entries finished. Setups needing the same cache entry are run one after another in their order, because
+    they update the same cached object. Setups without declared cache relations are considered independent.
+    """
+
+    def __init__(self, setups, timeout=None):
+        """
+        :param setups: Dict of registration names to setup functions
+        :param timeout: Time in seconds to wait for a single setup. A timed out setup keeps running in the background
+        but setups depending on it are skipped.
+        """
+        self._timeout = timeout
+        self._tasks = self._build_graph([_SetupTask(name, fn) for name, fn in setups.items() if callable(fn)])
+
+    @staticmethod
+    def _build_graph(tasks):
+        tasks.sort(key=lambda t: t.order)
+        providers = {}
+        consumers = {}
+        for task in tasks:
+            for entry in task.provided:
+                providers.setdefault(entry, []).append(task)
+            for entry in task.needed:
+                consumers.setdefault(entry, []).append(task)
+
+        for entry, needing in consumers.items():
+            previous = None
+            for task in needing:
+                task.requires.extend([p for p in providers.get(entry, []) if p is not task and p not in task.requires])
+                if previous is not None and previous not in task.requires:
+                    task.requires.append(previous)
+                previous = task
+        return SetupScheduler._topological_sort(tasks)
+
+    @staticmethod
+    def _topological_sort(tasks):
+        ordered = []
+        visiting = set()
+        visited = set()
+
+        def visit(task):
+            if task in visited:
+                return
+            if task in visiting:
+                raise ValueError("Setup functions have cyclic cache dependencies at " + task.name + ".")
+            visiting.add(task)
+            for required in task.requires:
+                visit(required)
+            visiting.remove(task)
+            visited.add(task)
+            ordered.append(task)
+
+        for t in tasks:
+            visit(t)
+        return ordered
+
+    def _execute(self, task, run_stack, active_runs, *args, **kwargs):
+        run_stack.fork(active_runs)
+        for required in task.requires:
+            required.done.wait()
+        try:
+            missing = [r.name for r in task.requires if r.failed]
+            if len(missing) > 0:
+                task.skipped = True
+                logger.warning("Skipping setup function " + task.name + " because the setup functions it depends "
+                                                                       "on didn't finish: " + ", ".join(missing))
+                return
+            task.started.set()
+            with profile_span("setup", task.name):
+                task.fn(*args, **kwargs)
+        except Exception as e:
+            logger.error("Setup function " + task.name + " failed with: " + str(e))
+        finally:
+            task.started.set()
+            task.done.set()
+            _release_run_stack()
+
+    def run(self, *args, **kwargs):
+        """
+        Execute all setup functions and wait for them to finish or time out.
+        :param args: Arguments passed to each setup function
+        :param kwargs: Kwargs passed to each setup function
+        :return: Names of the setup functions which timed out
+        """
+        active_runs = None
+        for task in self._tasks:
+            # Timed out setups keep the replaced stack until they finish
+            run_stack = _acquire_run_stack()
+            if active_runs is None:
+                active_runs = list(run_stack)
+            thread = threading.Thread(target=self._execute, args=(task, run_stack, active_runs, *args), kwargs=kwargs,
+                                      name="PyPadsSetup-" + task.name)
+            thread.daemon = True
+            thread.start()
+
+        timed_out = []
+        # Tasks are sorted topologically. Setups being waited for have finished or timed out before.
+        for task in self._tasks:
+            task.started.wait()
+            if not task.done.wait(self._timeout):
+                task.timed_out = True
+                task.done.set()
+                timed_out.append(task.name)
+                logger.warning("Setup function {} didn't finish in {}s. It is left running in the background.".format(
+                    task.name, self._timeout))
+        return timed_out
+
+
+def run_in_background(pads, name, fn, output=None, timeout=None):
+    """
+    Run a part of a setup function in a background thread instead of blocking the start of the run. The teardown of
+    the run waits for the thread to finish.
+    :param pads: PyPads instance
+    :param name: Name of the background task
+    :param fn: Function to execute
+    :param output: Output of the setup function. It is stored again after fn attached its results.
+    :param timeout: Time in seconds the teardown waits for the thread. Results of a thread not finishing in time are
+    lost.
+    :return: The started thread
+    """
+    run_stack = _acquire_run_stack()
+    active_runs = list(run_stack)
+
+    def execute():
+        run_stack.fork(active_runs)
+        try:
+            with profile_span("setup", name):
+                fn()
+        except Exception as e:
+            logger.error("Background setup " + name + " failed with: " + str(e))
+            if output is not None:
+                output.set_failure_state(e)
+        finally:
+            if output is not None:
+                output.store()
+            _release_run_stack()
+
+    thread = threading.Thread(target=execute, name="PyPadsBackground-" + name)
+    thread.daemon = True
+    thread.start()
+
+    def join(pads, *args, **kwargs):
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("Background setup {} didn't finish in {}s. Its results are lost.".format(name, timeout))
+
+    pads.api.register_teardown_utility(name + "_join", join,
+                                       error_message="Couldn't wait for the background setup with {}, because of "
+                                                     "exception: {} \nTrace:\n{}", order=-1)
+    return thread
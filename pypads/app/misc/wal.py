@@ -0,0 +1,316 @@
+"""
+Write-ahead log of a run. Tracking data is appended to the log before it is written to the backend or while it is
+still buffered in memory. The log is flushed on every record, which keeps it intact if the process gets killed, and
+synced to disk in batches. Runs whose process died are finalized from their logs and marked as KILLED by
+recover_runs. Operations which couldn't reach an unavailable backend are spooled into the log and replayed by
+recover_runs as well.
+"""
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+
+from pypads import logger
+
+WAL_CACHE = "write_ahead_log"
+
+RECOVERED_FOLDER = "recovered"
+
+# Records of operations spooled while the backend was unavailable
+SPOOLED_KINDS = {"spooled", "document", "artifact"}
+
+
+def _json_default(o):
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+def wal_folder(folder):
+    return os.path.join(folder, "wal")
+
+
+class WriteAheadLog:
+    """
+    Append-only log of json records. Every record is flushed to the operating system, which survives the process
+    being killed. An fsync guarding against losing records on a crash of the machine is done at most every
+    sync_interval seconds or sync_records records.
+    """
+
+    def __init__(self, path, sync_interval=1.0, sync_records=100):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_records = sync_records
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.time()
+        self.spooled = 0
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    @property
+    def files(self):
+        """
+        :return: Folder holding the artifacts spooled into the log
+        """
+        return os.path.splitext(self.path)[0] + ".files"
+
+    def append(self, kind, **data):
+        """
+        Append a record to the log.
+        :param kind: Kind of the record (run, metric, param, tag, probe, sample, spooled, document, artifact)
+        :param data: Content of the record
+        """
+        line = json.dumps({"kind": kind, **data}, default=_json_default) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_records or time.time() - self._synced_at >= self.sync_interval:
+                self._sync()
+
+    def spool(self, operation):
+        """
+        Mark an operation writing a metric, parameter or tag as spooled. Its value is already part of the log.
+        :param operation: Name of the operation
+        """
+        self.spooled += 1
+        self.append("spooled", operation=operation)
+
+    def spool_document(self, storage_type, document):
+        """
+        Spool a metadata document which couldn't be written to the backend.
+        :param storage_type: Type of the document
+        :param document: Json encodable document
+        """
+        self.spooled += 1
+        self.append("document", storage_type=storage_type, document=document)
+
+    def spool_tag(self, run_id, key, value):
+        """
+        Spool a tag of another run (e.g. of a repository) which couldn't be written to the backend.
+        :param run_id: Id of the run
+        :param key: Key of the tag
+        :param value: Value of the tag
+        """
+        self.append("tag", key=key, value=value, run_id=run_id)
+        self.spool("set_run_tag")
+
+    def spool_file(self, local_path, artifact_path="", move=False, run_id=None):
+        """
+        Spool an artifact which couldn't be written to the backend.
+        :param local_path: Path of the file
+        :param artifact_path: Folder of the artifact in the run
+        :param move: Move the file instead of copying it
+        :param run_id: Id of the run if it isn't the run of the log
+        :return: Path of the artifact in the run
+        """
+        path = os.path.join(artifact_path if artifact_path else "", os.path.basename(local_path))
+        target = os.path.join(self.files, run_id, path) if run_id else os.path.join(self.files, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            shutil.move(local_path, target)
+        else:
+            shutil.copy2(local_path, target)
+        self.spooled += 1
+        self.append("artifact", file=target, path=artifact_path if artifact_path else None, run_id=run_id)
+        return path
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.time()
+
+    def close(self, remove=True):
+        """
+        Close the log. The log is removed if the run was stored completely.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+            shutil.rmtree(self.files, ignore_errors=True)
+
+    @staticmethod
+    def read(path):
+        """
+        Read the records of a log. A last record which was only partially written is ignored.
+        :return: List of records
+        """
+        records = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+
+def open_run_wal(pads, run):
+    """
+    Open the write-ahead log of a run and close it after the run was stored.
+    :param pads: PyPads instance
+    :param run: Started mlflow run
+    :return: WriteAheadLog
+    """
+    from pypads.utils.logging_util import get_temp_folder
+    wal = WriteAheadLog(os.path.join(wal_folder(pads.folder), run.info.run_id + ".wal"))
+    wal.append("run", run_id=run.info.run_id, experiment_id=run.info.experiment_id, uri=pads.backend.uri,
+               pid=os.getpid(), host=socket.gethostname(), tmp_folder=get_temp_folder(run), started=time.time())
+    pads.cache.run_add(WAL_CACHE, wal)
+
+    def close_wal(pads, *args, **kwargs):
+        # Keep the log if operations were spooled into it
+        wal.close(remove=wal.spooled == 0)
+
+    import sys
+    # Close after everything else was stored
+    pads.api.register_teardown_utility("write_ahead_log", close_wal,
+                                       error_message="Couldn't close the write-ahead log with {}, because of "
+                                                     "exception: {} \nTrace:\n{}", order=sys.maxsize)
+    return wal
+
+
+def get_run_wal(pads):
+    """
+    :return: The write-ahead log of the active run or None
+    """
+    if pads is None or not pads.cache.run_exists(WAL_CACHE):
+        return None
+    return pads.cache.run_get(WAL_CACHE)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove(path):
+    os.remove(path)
+    shutil.rmtree(os.path.splitext(path)[0] + ".files", ignore_errors=True)
+
+
+def recover_run(path):
+    """
+    Finalize the run of a write-ahead log. Parameters, tags and metrics which didn't reach the backend are logged,
+    collected hardware samples and files left in the temporary folder of the run are stored as artifacts and the run
+    gets marked as KILLED. Operations spooled into the log of a finished run are replayed as well.
+    :param path: Path of the log
+    :return: Id of the recovered run or None if the run was already finished
+    """
+    from mlflow.entities import Metric, Param, RunTag
+    from mlflow.tracking import MlflowClient
+    records = WriteAheadLog.read(path)
+    if len(records) == 0 or records[0]["kind"] != "run":
+        _remove(path)
+        return None
+    header = records[0]
+    run_id = header["run_id"]
+    client = MlflowClient(tracking_uri=header["uri"])
+    run = client.get_run(run_id)
+    spooled = any(r["kind"] in SPOOLED_KINDS for r in records)
+    if run.info.status != "RUNNING" and not spooled:
+        _remove(path)
+        return None
+
+    params = [Param(r["key"], str(r["value"])) for r in records if r["kind"] == "param"
+              and r["key"] not in run.data.params]
+    tags = [RunTag(r["key"], str(r["value"])) for r in records if r["kind"] == "tag" and
+            r.get("run_id", run_id) == run_id]
+    logged = set()
+    for key in {r["key"] for r in records if r["kind"] == "metric"} & set(run.data.metrics.keys()):
+        logged.update((m.key, m.step, m.timestamp, m.value) for m in client.get_metric_history(run_id, key))
+    metrics = [Metric(r["key"], r["value"], r["timestamp"], r["step"]) for r in records if r["kind"] == "metric"
+               and (r["key"], r["step"], r["timestamp"], r["value"]) not in logged]
+    for i in range(0, max(len(params), len(tags), len(metrics)), 100):
+        client.log_batch(run_id, metrics=metrics[i:i + 100], params=params[i:i + 100], tags=tags[i:i + 100])
+
+    for r in records:
+        if r["kind"] == "tag" and r.get("run_id", run_id) != run_id:
+            # Tags of other runs (e.g. the references of the content store)
+            client.set_tag(r["run_id"], r["key"], str(r["value"]))
+        if r["kind"] == "artifact" and os.path.exists(r["file"]):
+            client.log_artifact(r.get("run_id") or run_id, r["file"], r["path"])
+    documents = [r["document"] for r in records if r["kind"] == "document"]
+    if len(documents) > 0:
+        # Documents of a MongoDB are stored as json artifacts like in the mlflow backend
+        import tempfile
+        folder = tempfile.mkdtemp()
+        try:
+            for document in documents:
+                with open(os.path.join(folder, str(document.get("uid", document.get("_id"))) + ".json"), "w") as f:
+                    json.dump(document, f)
+            client.log_artifacts(run_id, folder)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    tmp_folder = header.get("tmp_folder")
+    probes = {r["name"]: {"columns": r["columns"], "samples": []} for r in records if r["kind"] == "probe"}
+    for r in records:
+        if r["kind"] == "sample" and r["probe"] in probes:
+            probes[r["probe"]]["samples"].append([r["timestamp"]] + r["values"])
+    if len(probes) > 0 and tmp_folder and run.info.status == "RUNNING":
+        os.makedirs(os.path.join(tmp_folder, "hardware"), exist_ok=True)
+        for name, probe in probes.items():
+            with open(os.path.join(tmp_folder, "hardware", name + ".json"), "w") as f:
+                json.dump(probe, f)
+    if tmp_folder and os.path.isdir(tmp_folder) and len(os.listdir(tmp_folder)) > 0:
+        client.log_artifacts(run_id, tmp_folder, RECOVERED_FOLDER)
+
+    if run.info.status == "RUNNING":
+        client.set_terminated(run_id, status="KILLED")
+    if tmp_folder:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+    _remove(path)
+    return run_id
+
+
+def recover_runs(folder, spooled=True):
+    """
+    Recover all runs of write-ahead logs whose process on this machine isn't running anymore.
+    :param folder: pypads folder
+    :param spooled: Also replay the logs holding operations spooled while the backend was unavailable
+    :return: List of ids of the recovered runs
+    """
+    recovered = []
+    folder = wal_folder(folder)
+    if not os.path.isdir(folder):
+        return recovered
+    host = socket.gethostname()
+    for name in os.listdir(folder):
+        if not name.endswith(".wal"):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            records = WriteAheadLog.read(path)
+            if len(records) > 0 and (records[0].get("host") != host or records[0].get("pid") == os.getpid() or
+                                     _is_alive(records[0].get("pid"))):
+                # The process might still be running
+                continue
+            if not spooled and any(r["kind"] in SPOOLED_KINDS for r in records):
+                # The backend might still be unavailable. These logs are replayed by pypads recover.
+                continue
+            run_id = recover_run(path)
+            if run_id is not None:
+                logger.warning("Recovered run {} from its write-ahead log.".format(run_id))
+                recovered.append(run_id)
+        except Exception as e:
+            logger.error("Couldn't recover the run of the write-ahead log {}: {}".format(path, str(e)))
+    return recovered
@@ -82,12 +82,76 @@ class PyPadsResults(IResults):
         return self.pypads.backend.list_experiments(view_type)
 
     @result
-    def load_artifact(self, relative_path, run_id=None, read_format: FileFormats = None):
+    def load_artifact(self, relative_path, run_id=None, read_format: FileFormats = None, mmap_mode=None,
+                      file_size=None):
+        """
+        Load the content of an artifact of a run.
+        :param relative_path: Path of the artifact in the run
+        :param run_id: Id of the run. Defaults to the active run.
+        :param read_format: Format of the artifact. Derived from the file extension if not given.
+        :param mmap_mode: Memory map numpy arrays instead of loading them into memory (e.g. "r"). Only uncompressed
+        arrays of a local store are mapped without a copy.
+        :param file_size: Size of the artifact if it is already known (e.g. from its metadata). Saves listing the
+        artifacts of a remote store.
+        :return: Content of the artifact
+        """
         if not run_id:
             run_id = self.pypads.api.active_run().info.run_id
         return read_artifact(
-            self.pypads.backend.download_tmp_artifacts(run_id=run_id, relative_path=relative_path),
-            read_format=read_format)
+            self.pypads.backend.download_tmp_artifacts(run_id=run_id, relative_path=relative_path,
+                                                       file_size=file_size),
+            read_format=read_format, mmap_mode=mmap_mode)
+
+    @result
+    def tail_logs(self, lines=100, run_id=None):
+        """
+        Get the last lines of the logs of a run. Only closed (and therefore uploaded) log chunks are considered, which
+        allows for tailing the logs of a running job.
+        :param lines: Number of lines to return
+        :param run_id: Id of the run. Defaults to the active run.
+        :return: List of log lines
+        """
+        import os
+        from pypads.utils.log_chunks import LOG_INDEX_TAG, tail_chunks
+        if not run_id:
+            run_id = self.pypads.api.active_run().info.run_id
+        index_path = self.get_run(run_id).data.tags.get(LOG_INDEX_TAG)
+        if index_path is None:
+            return []
+        index = self.load_artifact(index_path, run_id=run_id, read_format=FileFormats.json)
+        # Only fetch the chunks holding the requested lines
+        chunks, count = [], 0
+        for chunk in reversed(index["chunks"]):
+            if count >= lines:
+                break
+            chunks.insert(0, chunk)
+            count += chunk["lines"]
+        folder = os.path.dirname(index_path)
+        return tail_chunks([self.pypads.backend.download_tmp_artifacts(
+            run_id=run_id, relative_path=os.path.join(folder, chunk["file"]), file_size=chunk.get("compressed_size"))
+            for chunk in chunks], lines=lines)
+
+    @result
+    def get_metric_series(self, name, run_id=None, expand=False):
+        """
+        Load the series of a vector or array valued metric.
+        :param name: Name of the metric
+        :param run_id: Id of the run. Defaults to the active run.
+        :param expand: Add a column per element of the values instead of a single column holding the values
+        :return: DataFrame with the columns step, timestamp and value
+        """
+        from pypads.app.misc.metric_series import SERIES_CACHE, series_folder, read_series
+        active = self.pypads.api.active_run()
+        if not run_id:
+            run_id = active.info.run_id
+        if active is not None and active.info.run_id == run_id and self.pypads.cache.run_exists(SERIES_CACHE):
+            # Store the values buffered by the running job
+            self.pypads.cache.run_get(SERIES_CACHE).flush()
+        chunks = sorted((f.path, f.file_size) for f in self.pypads.backend.list_files(run_id, path=series_folder(name))
+                        if not f.is_dir and f.path.endswith(".npz"))
+        return read_series([self.pypads.backend.download_tmp_artifacts(run_id=run_id, relative_path=chunk,
+                                                                       file_size=size)
+                            for chunk, size in chunks], expand=expand)
 
     @result
     def list_run_infos(self, experiment_name=None, experiment_id=None, run_view_type: ViewType = ViewType.ALL):
@@ -167,7 +231,7 @@ class PyPadsResults(IResults):
 
     @result
     def get_run(self, run_id):
-        self.pypads.backend.get_run(run_id=run_id)
+        return self.pypads.backend.get_run(run_id=run_id)
 
     @result
     def get_experiment(self, experiment_name=None, experiment_id=None):
@@ -42,6 +42,7 @@ DEFAULT_EVENT_TYPES = [EventType("parameters", "Track the parameters for given m
                        EventType("output", "Track the output of the function."),
                        EventType("input", "Track the input of the function."),
                        EventType("hardware", "Track current hardware load on function execution."),
+                       EventType("memory", "Track the memory allocated by python on function execution."),
                        EventType("metric", "Track a metric."),
                        EventType("autolog", "Activate mlflow autologging."),
                        EventType("pipeline", "Track a pipeline step."),
@@ -5,6 +5,8 @@ from pypads.bindings.hooks import Hook
 from pypads.importext.versioning import LibSelector
 from pypads.injections.analysis.parameters import ParametersILF
 from pypads.injections.loggers.debug import Log, LogInit
+from pypads.injections.loggers.hardware import ResourceILF
+from pypads.injections.loggers.memory import MemoryILF
 from pypads.injections.loggers.metric import MetricILF
 # maps events to loggers
 # Default event mappings. We allow to log parameters, output defor input
@@ -15,8 +17,8 @@ DEFAULT_LOGGING_FNS = {
     "parameters": ParametersILF(),
     # "output": OutputILF(_pypads_write_format=FileFormats.text),
     # "input": InputILF(_pypads_write_format=FileFormats.text),
-    # "hardware": [CpuILF(_pypads_write_format=FileFormats.text), RamILF(_pypads_write_format=FileFormats.text),
-    #             DiskILF(_pypads_write_format=FileFormats.text)],
+    "hardware": ResourceILF(),
+    "memory": MemoryILF(),
     "metric": MetricILF(),
     "autolog": MlFlowAutoIL(),
     "pipeline": PipelineTrackerILF(),
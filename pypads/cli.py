@@ -0,0 +1,56 @@
+import argparse
+import sys
+
+
+def sync(args):
+    """
+    Replay the runs of an offline spool into the tracking store given by --uri (or the pypads configuration).
+    """
+    from pypads.app.backends.spool import spool_folder, sync_spool
+    from pypads.arguments import PYPADS_FOLDER, PYPADS_URI
+    spool = spool_folder(PYPADS_FOLDER, args.spool or True)
+    synced = sync_spool(spool, PYPADS_URI, mongo=args.mongo, include_running=args.include_running,
+                        delete=args.delete)
+    for source, target in synced.items():
+        print("{} -> {}".format(source, target))
+    return 0
+
+
+def recover(args):
+    """
+    Finalize the runs of killed processes and replay spooled operations from the write-ahead logs in the pypads
+    folder.
+    """
+    from pypads.app.misc.wal import recover_runs
+    from pypads.arguments import PYPADS_FOLDER
+    for run_id in recover_runs(PYPADS_FOLDER):
+        print(run_id)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pypads", epilog="The options of the pypads configuration like --uri, "
+                                                           "--folder, --config and the MongoDB settings apply.")
+    commands = parser.add_subparsers(dest="command")
+    sync_parser = commands.add_parser("sync", help="Replay the runs recorded in offline mode into the tracking store.")
+    sync_parser.add_argument("--spool", default=None, help="Path of the spool. Defaults to the spool in the pypads "
+                                                           "folder.")
+    sync_parser.add_argument("--mongo", action="store_true", help="Also upsert the metadata documents into MongoDB.")
+    sync_parser.add_argument("--include-running", action="store_true", help="Also replay runs which didn't end.")
+    sync_parser.add_argument("--delete", action="store_true", help="Delete replayed runs from the spool.")
+    sync_parser.set_defaults(fn=sync)
+    recover_parser = commands.add_parser("recover", help="Finalize the runs of killed processes and replay "
+                                                         "operations spooled while the backend was unavailable from "
+                                                         "the write-ahead logs.")
+    recover_parser.set_defaults(fn=recover)
+
+    # Unknown arguments are parsed by the pypads configuration
+    args, _ = parser.parse_known_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
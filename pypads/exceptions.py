@@ -30,3 +30,12 @@ class VersionNotFoundException(Exception):
     Exception warning about a missing version number.
     """
     pass
+
+
+class BackendUnavailableError(Exception):
+    """
+    Exception denoting that an operation of the backend couldn't be done, because the backend is unavailable.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
@@ -10,6 +10,7 @@ from importlib._bootstrap_external import PathFinder
 from multiprocessing import Value
 
 from pypads import logger
+from pypads.app.misc.profiler import profile_span
 from pypads.importext.mappings import Mapping, MatchedMapping
 from pypads.importext.package_path import PackagePath, PackagePathMatcher, Package
 from pypads.importext.wrapping.base_wrapper import Context
@@ -197,7 +198,8 @@ def duck_punch_loader(spec):
 
         out = execute(module)
 
-        add_wrappings(self, module)
+        with profile_span("import", "add_wrappings", detail=module.__name__):
+            add_wrappings(self, module)
 
         return out
 
@@ -6,6 +6,7 @@ from typing import Set
 from pypads import logger
 from pypads.app.call import FunctionReference, CallAccessor, Call
 from pypads.app.env import InjectionLoggerEnv
+from pypads.app.misc.profiler import profile_span
 from pypads.importext.mappings import MatchedMapping
 from pypads.importext.wrapping.base_wrapper import BaseWrapper, Context
 from pypads.injections.analysis.call_tracker import add_call, finish_call
@@ -152,12 +153,14 @@ class FunctionWrapper(BaseWrapper):
                 call = current_call
                 logger.debug(f"Reused existing call {call} in {fn_reference} of {instance_str}.")
             else:
-                call = add_call(accessor)
+                with profile_span("call_tracking", "add_call"):
+                    call = add_call(accessor)
                 logger.debug(f"Created new call to track {call} in {fn_reference} of {instance_str}.")
             yield call
         finally:
             if call and not current_call == call:
-                finish_call(call)
+                with profile_span("call_tracking", "finish_call"):
+                    finish_call(call)
 
     def wrap_method_helper(self, fn_reference: FunctionReference, context, mappings: Set[MatchedMapping]):
         """
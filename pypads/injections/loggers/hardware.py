@@ -1,3 +1,67 @@
+import math
+from typing import Type, Optional
+
+from pypads.app.injections.injection import InjectionLogger
+from pypads.model.logger_output import OutputModel
+from pypads.utils.resources import get_resource_probe
+
+_probe = None
+
+
+def _get_probe():
+    global _probe
+    if _probe is None:
+        _probe = get_resource_probe()
+    return _probe
+
+
+class ResourceILF(InjectionLogger):
+    """
+    Injection logger attributing the resources used by the process to the hooked call. Cheap snapshots of the cpu
+    time, peak memory, io and context switches are taken before and after the call. All threads of the process are
+    accounted.
+    """
+    name = "Resource Injection Logger"
+    type: str = "ResourceLogger"
+
+    class ResourceILFOutput(OutputModel):
+        type: str = "ResourceILF-Output"
+        name: str = "ResourceUsage"
+        cpu_time: Optional[float] = None  # User and system cpu time in seconds
+        cpu_user: Optional[float] = None
+        cpu_system: Optional[float] = None
+        peak_rss_delta: Optional[int] = None  # Bytes the peak resident memory of the process grew during the call
+        read_bytes: Optional[int] = None
+        write_bytes: Optional[int] = None
+        voluntary_switches: Optional[int] = None
+        involuntary_switches: Optional[int] = None
+
+        class Config:
+            orm_mode = True
+
+    @classmethod
+    def output_schema_class(cls) -> Type[OutputModel]:
+        return cls.ResourceILFOutput
+
+    def __pre__(self, ctx, *args, _logger_call, _logger_output, _args, _kwargs, **kwargs):
+        return _get_probe().usage()
+
+    def __post__(self, ctx, *args, _logger_call, _pypads_pre_return, _pypads_result, _logger_output, _args, _kwargs,
+                 **kwargs):
+        before, after = _pypads_pre_return, _get_probe().usage()
+        delta = {k: after[k] - before[k] for k in after.keys()}
+        # Io counters might not be available
+        delta = {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in delta.items()}
+        _logger_output.cpu_user = delta["cpu_user"]
+        _logger_output.cpu_system = delta["cpu_system"]
+        _logger_output.cpu_time = delta["cpu_user"] + delta["cpu_system"]
+        _logger_output.peak_rss_delta = delta["max_rss"]
+        _logger_output.read_bytes = delta["read_bytes"]
+        _logger_output.write_bytes = delta["write_bytes"]
+        _logger_output.voluntary_switches = delta["voluntary_switches"]
+        _logger_output.involuntary_switches = delta["involuntary_switches"]
+
+
 # def _get_cpu_usage():
 #     import psutil
 #     """
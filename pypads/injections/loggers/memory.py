@@ -0,0 +1,121 @@
+import os
+from typing import Type, Optional, List
+
+from pydantic import BaseModel
+
+from pypads.app.env import InjectionLoggerEnv
+from pypads.app.injections.injection import InjectionLogger
+from pypads.app.injections.tracked_object import TrackedObject
+from pypads.model.logger_output import OutputModel, TrackedObjectModel
+from pypads.model.models import IdReference
+
+
+class MemoryProfileTO(TrackedObject):
+    """
+    Tracked object holding the memory python allocated during a call and the sites allocating most of it.
+    """
+
+    class MemoryProfileTOModel(TrackedObjectModel):
+        type: str = "MemoryProfile"
+        description: str = "Memory allocated by python during the call. Sizes are given in bytes."
+
+        class AllocationSiteModel(BaseModel):
+            file: str = ...
+            line: int = ...
+            size: int = ...  # Bytes allocated by the site and still held at the end of the call
+            count: int = ...  # Number of memory blocks allocated by the site
+
+            class Config:
+                orm_mode = True
+
+        peak: int = ...  # Peak of the allocated memory during the call
+        allocated: int = ...  # Memory still allocated at the end of the call
+        sites: List[AllocationSiteModel] = []
+
+        class Config:
+            orm_mode = True
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.MemoryProfileTOModel
+
+
+class MemoryILF(InjectionLogger):
+    """
+    Injection logger tracing the memory allocations of the hooked call with tracemalloc. Nested hooked calls are
+    accounted in the outermost call, which is the only one tracing. This logger is expensive and therefore not hooked
+    by default. Add a hook for the memory event (e.g. {"memory": {"on": ["pypads_fit"]}}) to activate it.
+    """
+    name = "Memory Injection Logger"
+    type: str = "MemoryLogger"
+
+    class MemoryILFOutput(OutputModel):
+        type: str = "MemoryILF-Output"
+        memory_profile: Optional[IdReference] = None  # MemoryProfileTO
+
+        class Config:
+            orm_mode = True
+
+    @classmethod
+    def output_schema_class(cls) -> Type[OutputModel]:
+        return cls.MemoryILFOutput
+
+    def _is_nested(self, _pypads_env: InjectionLoggerEnv):
+        return any(self in call.active_hooks for call in _pypads_env.pypads.call_tracker.call_stack
+                   if call is not _pypads_env.call)
+
+    def __pre__(self, ctx, *args, _pypads_env: InjectionLoggerEnv, _pypads_frames=1, _logger_call, _logger_output,
+                _args, _kwargs, **kwargs):
+        """
+        :param _pypads_frames: Number of frames stored per allocation. More frames are more expensive.
+        :return: Tuple of tracing state before the call
+        """
+        import tracemalloc
+        if self._is_nested(_pypads_env):
+            return None
+
+        before = None
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(_pypads_frames)
+
+            def stop_tracing(logger, _logger_call):
+                tracemalloc.stop()
+
+            # Stop tracing even if the call failed
+            self.register_cleanup_fn(_logger_call, fn=stop_tracing)
+        else:
+            # Somebody else is already tracing. Only the difference to the state before the call is of interest.
+            before = tracemalloc.take_snapshot()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        return before, tracemalloc.get_traced_memory()[0]
+
+    def __post__(self, ctx, *args, _pypads_env: InjectionLoggerEnv, _pypads_top=10, _logger_call,
+                 _pypads_pre_return, _pypads_result, _logger_output, _args, _kwargs, **kwargs):
+        """
+        :param _pypads_top: Number of allocation sites to store
+        """
+        import tracemalloc
+        if _pypads_pre_return is None or not tracemalloc.is_tracing():
+            return
+        before, baseline = _pypads_pre_return
+        current, peak = tracemalloc.get_traced_memory()
+
+        # Ignore the allocations of the tracking itself
+        import pypads
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(pypads.__file__), "*"))])
+        if before is not None:
+            stats = [s for s in snapshot.compare_to(before, "lineno") if s.size_diff > 0]
+            sites = [(s.traceback[0], s.size_diff, s.count_diff) for s in stats[:_pypads_top]]
+        else:
+            sites = [(s.traceback[0], s.size, s.count) for s in snapshot.statistics("lineno")[:_pypads_top]]
+
+        profile = MemoryProfileTO(peak=max(peak - baseline, 0), allocated=current - baseline,
+                                  sites=[MemoryProfileTO.MemoryProfileTOModel.AllocationSiteModel(
+                                      file=frame.filename, line=frame.lineno, size=size, count=count)
+                                      for frame, size, count in sites],
+                                  parent=_logger_output)
+        _logger_output.memory_profile = profile.store()
@@ -6,6 +6,7 @@ from pypads import logger
 from pypads.app.env import InjectionLoggerEnv
 from pypads.app.injections.injection import InjectionLogger
 from pypads.app.injections.tracked_object import TrackedObject
+from pypads.app.misc.metric_series import is_array_metric
 from pypads.model.logger_output import OutputModel, TrackedObjectModel
 from pypads.model.models import IdReference
 from pypads.utils.logging_util import data_path, FileFormats
@@ -90,6 +91,13 @@ class MetricILF(InjectionLogger):
             metric_to.metric = metric_to.store_metric(key=name, value=result,
                                                       description="The metric returned by {}".format(self.name),
                                                       step=step, additional_data=_pypads_env.data)
+        elif is_array_metric(result):
+            # Vectors and arrays like confusion matrices are appended to a single series per metric
+            metric_to.as_artifact = False
+            metric_to.metric = metric_to.store_array_metric(key=name, value=result,
+                                                            description="The metric returned by {}".format(
+                                                                self.name),
+                                                            step=step, additional_data=_pypads_env.data)
         else:
 
             # If value is not a valid double
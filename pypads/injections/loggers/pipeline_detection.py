@@ -1,5 +1,8 @@
+import json
 import os
 import pathlib
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Type, Union
 
@@ -11,6 +14,7 @@ from pypads.app.injections.injection import InjectionLoggerCall, MultiInjectionL
 from pypads.app.injections.tracked_object import TrackedObject
 from pypads.model.logger_call import InjectionLoggerCallModel
 from pypads.model.logger_output import OutputModel, TrackedObjectModel
+from pypads.utils.fingerprint import data_fingerprint
 from pypads.utils.logging_util import get_temp_folder
 from pypads.utils.util import is_package_available
 
@@ -126,6 +130,133 @@ DATA_ID_EDGE = "data_id"
 CALL_ORDER_EDGE = "call_order"
 
 
+class CompactGraph:
+    """
+    Graph store interning its nodes to integer ids. Repeated edges are aggregated into a counter holding the first and
+    last step and timestamp instead of being added again. Each added edge is additionally appended to an edge log
+    on disk, which keeps the whole sequence of the run without holding it in memory. A networkx graph is only built
+    on request.
+    """
+
+    def __init__(self, log_path=None):
+        self._ids = {}
+        self._labels = []
+        self._counts = []
+        self._parents = {}
+        self._edges = {}
+        self._steps = 0
+        self._log_path = log_path
+        self._log = None
+
+    @property
+    def log_path(self):
+        return self._log_path
+
+    @property
+    def number_of_nodes(self):
+        return len(self._labels)
+
+    @property
+    def number_of_edges(self):
+        return len(self._edges)
+
+    def _write(self, *record):
+        if self._log_path is None:
+            return
+        if self._log is None:
+            pathlib.Path(os.path.dirname(self._log_path)).mkdir(parents=True, exist_ok=True)
+            self._log = open(self._log_path, "a")
+        self._log.write(json.dumps(record) + "\n")
+
+    def node_id(self, node):
+        """
+        :return: Id of the node or None if the node isn't part of the graph
+        """
+        return self._ids.get(node)
+
+    def intern(self, node, parent=None):
+        """
+        Get the id of given node. Unknown nodes are added.
+        :param node: Hashable node
+        :param parent: Id of the node this node is part of
+        :return: Id of the node
+        """
+        idx = self._ids.get(node)
+        if idx is None:
+            idx = len(self._labels)
+            self._ids[node] = idx
+            self._labels.append(str(node))
+            self._counts.append(0)
+            if parent is not None:
+                self._parents[idx] = parent
+            self._write("node", idx, self._labels[idx], parent)
+        return idx
+
+    def count(self, idx):
+        """
+        Increment the counter of a node. This is used to count the calls of a function.
+        """
+        self._counts[idx] += 1
+
+    def add_edge(self, source, target, edge_type, timestamp=None):
+        """
+        Add an edge or increment the counter of an existing edge of same type between the nodes.
+        :return: Step number of the edge
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        step = self._steps
+        self._steps += 1
+        entry = self._edges.get((source, target, edge_type))
+        if entry is None:
+            self._edges[(source, target, edge_type)] = [1, step, step, timestamp, timestamp]
+        else:
+            entry[0] += 1
+            entry[2] = step
+            entry[4] = timestamp
+        self._write("edge", step, source, target, edge_type, timestamp)
+        return step
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _edge_data(self, edge_type, entry):
+        count, first_step, last_step, first_time, last_time = entry
+        return dict(plain_label=edge_type, label=f"{first_step}:{edge_type}" if count == 1 else
+                    f"{first_step}-{last_step}:{edge_type} ({count}x)", count=count, first_step=first_step,
+                    last_step=last_step, first_time=first_time, last_time=last_time)
+
+    def _all_edges(self):
+        for child, parent in self._parents.items():
+            yield child, parent, OF_EDGE, dict(plain_label=OF_EDGE, label=OF_EDGE)
+        for (source, target, edge_type), entry in self._edges.items():
+            yield source, target, edge_type, self._edge_data(edge_type, entry)
+
+    def to_dict(self):
+        """
+        :return: Dict of dicts of the graph with the node labels as keys. This equals the representation of
+        networkx.to_dict_of_dicts for the materialized graph.
+        """
+        out = {label: {} for label in self._labels}
+        for source, target, edge_type, data in self._all_edges():
+            out[self._labels[source]].setdefault(self._labels[target], {})[edge_type] = data
+        return out
+
+    def to_networkx(self):
+        """
+        Materialize the graph.
+        :return: networkx MultiDiGraph
+        """
+        import networkx as nx
+        network = nx.MultiDiGraph()
+        for idx, label in enumerate(self._labels):
+            network.add_node(label, label=label, count=self._counts[idx])
+        for source, target, edge_type, data in self._all_edges():
+            network.add_edge(self._labels[source], self._labels[target], key=edge_type, **data)
+        return network
+
+
 class PipelineTO(TrackedObject):
     """
        Tracking object class for execution workflow/ computational graph.
@@ -147,12 +278,17 @@ class PipelineTO(TrackedObject):
     def get_model_cls(cls) -> Type[BaseModel]:
         return cls.PipelineModel
 
-    def __init__(self, *args, network=None, pipeline_type="", **kwargs):
-        self._data_flow = {}
-        self._data_id_flow = {}
+    # Number of call results (ids and fingerprints) remembered to detect data flowing into later calls
+    MAX_DATA_IDS = 4096
+
+    def __init__(self, *args, graph: CompactGraph = None, pipeline_type="", graphml=False, **kwargs):
+        self._graphml = graphml
+        self._data_flow = OrderedDict()
+        self._data_id_flow = OrderedDict()
         self._last_tracked = None
         self._number_of_steps = 0
-        self._network = network
+        self._graph = graph if graph is not None else CompactGraph()
+        self._functions = {}
         super().__init__(*args, pipeline_type=pipeline_type, **kwargs)
 
     def _get_network(self):
@@ -163,32 +299,30 @@ class PipelineTO(TrackedObject):
 
     @property
     def network(self):
-        import networkx as nx
-        return self._convert_nodes_to_str(nx.to_dict_of_dicts(self._network))
-
-    def _convert_nodes_to_str(self, network_dict):
-        out = {}
-        for k, v in network_dict.items():
-            if isinstance(v, dict):
-                out[self._convert_node_to_str(k)] = self._convert_nodes_to_str(v)
-            else:
-                out[self._convert_node_to_str(k)] = v
-        return out
+        return self._graph.to_dict()
 
-    @staticmethod
-    def _convert_node_to_str(node):
-        if isinstance(node, str):
-            return node
-        else:
-            return str(node)
+    @network.setter
+    def network(self, value):
+        pass
+
+    @property
+    def graph(self):
+        return self._graph
+
+    @property
+    def pipeline_graphml(self):
+        return self._graphml
 
     @property
     def nx_network(self):
-        return self._network
+        return self._graph.to_networkx()
 
-    @network.setter
-    def network(self, value):
-        self._network = value
+    @property
+    def functions(self):
+        """
+        :return: Dict of (process, thread, class, instance, function) to the id of the function node
+        """
+        return self._functions
 
     @property
     def last_tracked(self):
@@ -212,6 +346,9 @@ class PipelineTO(TrackedObject):
 
     def add_data_hash(self, hash, node):
         self._data_flow[hash] = node
+        self._data_flow.move_to_end(hash)
+        if len(self._data_flow) > self.MAX_DATA_IDS:
+            self._data_flow.popitem(last=False)
 
     @property
     def data_id_flow(self):
@@ -219,17 +356,21 @@ class PipelineTO(TrackedObject):
 
     def add_data_id(self, uid, node):
         self._data_id_flow[uid] = node
+        self._data_id_flow.move_to_end(uid)
+        if len(self._data_id_flow) > self.MAX_DATA_IDS:
+            self._data_id_flow.popitem(last=False)
 
 
 class PipelineTrackerILF(MultiInjectionLogger):
     """
-    Injection logger to track the execution graph of calls themselves. The logger itself uses networkx to build a
-    call graph.
+    Injection logger to track the execution graph of calls themselves. Functions are added as nodes to a compact
+    graph. Repeated calls only increment the counters of the nodes and edges. The sequence of all calls is written to
+    an edge log stored at the end of the run. networkx is only needed to draw the graph.
     """
     name = "Generic Pipeline Logger"
     type: str = "PipelineLogger"
 
-    _dependencies = {"networkx"}
+    _expensive = True
 
     class PipelineTrackerILFOutput(OutputModel):
         type: str = "PipelineILF-Output"
@@ -257,18 +398,30 @@ class PipelineTrackerILF(MultiInjectionLogger):
     @staticmethod
     def finalize_output(pads, logger_call, output, *args, **kwargs):
         pipeline: PipelineTO = pads.cache.run_get("pipeline")
-
-        from networkx import MultiDiGraph
-        network: MultiDiGraph = pipeline.nx_network
+        graph = pipeline.graph
+        graph.close()
 
         base_folder = get_temp_folder()
-        path = os.path.join(base_folder, "pipeline_graph.png")
         if not os.path.exists(base_folder):
             pathlib.Path(base_folder).mkdir(parents=True, exist_ok=True)
 
+        if graph.log_path is not None and os.path.isfile(graph.log_path):
+            pipeline.store_artifact(graph.log_path, "pipeline_edges.jsonl",
+                                    description="Log of all nodes and edges added to the pipeline in order. Each line "
+                                                "is a json list of either node, id, label, parent or edge, step, "
+                                                "source, target, type, timestamp.")
+
+        if pipeline.pipeline_graphml and is_package_available("networkx"):
+            import networkx as nx
+            path = os.path.join(base_folder, "pipeline_graph.graphml")
+            nx.write_graphml(pipeline.nx_network, path)
+            pipeline.store_artifact(path, "pipeline_graph.graphml",
+                                    description="The underlying pipeline of the experiment as GraphML.")
+
         if is_package_available("agraph") and is_package_available("graphviz") and is_package_available("pygraphviz"):
             from networkx.drawing.nx_agraph import to_agraph
-            agraph = to_agraph(network)
+            path = os.path.join(base_folder, "pipeline_graph.png")
+            agraph = to_agraph(pipeline.nx_network)
             agraph.layout('dot')
             agraph.draw(path)
             pipeline.store_artifact(path, "pipeline_graph.png",
@@ -353,107 +506,93 @@ class PipelineTrackerILF(MultiInjectionLogger):
         # call.store()
 
     @staticmethod
-    def _add_to_network(node, network):
-        if not network.has_node(node):
-            network.add_node(node, label=str(node))
-
-    @staticmethod
-    def _add_of_edge(child, parent, network):
-        if not network.has_edge(child, parent, OF_EDGE):
-            network.add_edge(child, parent, plain_label=OF_EDGE, label=OF_EDGE)
+    def _function_node(ctx, call_id, pipeline):
+        """
+        Get the id of the function node of given call. The nodes of the process, thread, class, instance and function
+        are only built if the function wasn't seen before.
+        """
+        key = (call_id.process, call_id.thread, ctx.__class__.__name__, call_id.instance_id, call_id.fn_name)
+        function_id = pipeline.functions.get(key)
+        if function_id is None:
+            graph = pipeline.graph
+            process_node = ProcessNode(process=call_id.process)
+            thread_node = ThreadNode(thread=call_id.thread, process_node=process_node)
+            class_node = ClassNode(clazz=ctx.__class__.__name__, thread_node=thread_node)
+            instance_node = InstanceNode(instance=call_id.instance_id, class_node=class_node)
+            function_node = FunctionNode(function=call_id.fn_name, instance_node=instance_node)
+
+            # Interlink nodes via of_edges
+            parent = None
+            for node in [process_node, thread_node, class_node, instance_node, function_node]:
+                parent = graph.intern(node, parent=parent)
+            function_id = parent
+            pipeline.functions[key] = function_id
+        return function_id
 
     def __pre__(self, ctx, *args, _logger_call: Union[MultiInjectionLoggerCall, InjectionLoggerCallModel],
-                _pypads_pipeline_type="normal", _pypads_pipeline_args=False, _pypads_env: LoggerEnv, _logger_output,
-                **kwargs):
+                _pypads_pipeline_type="normal", _pypads_pipeline_args=False, _pypads_pipeline_graphml=False,
+                _pypads_pipeline_full_hash=False, _pypads_env: LoggerEnv, _logger_output, **kwargs):
         """
-        Add entry to the pipeline network.
+        Add entry to the pipeline graph.
+        :param _pypads_pipeline_graphml: Store the graph additionally as GraphML at the end of the run
+        :param _pypads_pipeline_full_hash: Hash the whole data instead of a sample to find data flowing between calls
         """
 
         # Initialized the pipeline_tracker by adding itself to the cache
         pads = _pypads_env.pypads
 
-        # Get the network from the shared logger output
-        import networkx as nx
         if not pads.cache.run_exists("pipeline"):
-            pipeline = PipelineTO(network=nx.MultiDiGraph(), parent=_logger_output, pipeline_type=_pypads_pipeline_type)
+            graph = CompactGraph(log_path=os.path.join(get_temp_folder(), "pipeline_edges.jsonl"))
+            pipeline = PipelineTO(graph=graph, parent=_logger_output, pipeline_type=_pypads_pipeline_type,
+                                  graphml=_pypads_pipeline_graphml)
             pads.cache.run_add("pipeline", pipeline)
         else:
             pipeline = pads.cache.run_get("pipeline")
+        graph = pipeline.graph
 
-        network = pipeline.nx_network
-
-        # Convert current call to a nodes
+        # Convert current call to a node
         # TODO original call references the first call of the multi_injection_logger
-        process_node = ProcessNode(process=_logger_call.call_stack[-1].call_id.process)
-        thread_node = ThreadNode(thread=_logger_call.call_stack[-1].call_id.thread, process_node=process_node)
-        class_node = ClassNode(clazz=ctx.__class__.__name__, thread_node=thread_node)
-        instance_node = InstanceNode(instance=_logger_call.call_stack[-1].call_id.instance_id, class_node=class_node)
-        function_node = FunctionNode(function=_logger_call.call_stack[-1].call_id.fn_name, instance_node=instance_node)
-        call_node = CallNode(call=_logger_call.call_stack[-1].call_id.call_number, function_node=function_node)
-
-        # Add nodes to network
-        self._add_to_network(process_node, network)
-        self._add_to_network(thread_node, network)
-        self._add_to_network(class_node, network)
-        self._add_to_network(instance_node, network)
-        self._add_to_network(function_node, network)
-        self._add_to_network(call_node, network)
-
-        # Interlink nodes via of_edges
-        self._add_of_edge(thread_node, process_node, network)
-        self._add_of_edge(class_node, thread_node, network)
-        self._add_of_edge(instance_node, class_node, network)
-        self._add_of_edge(function_node, instance_node, network)
-        self._add_of_edge(call_node, function_node, network)
-
-        # Add entry edge if needed
-        if len(network.nodes) == 6:
-            network.add_node(-1, label="entry")
-            network.add_edge(-1, call_node, plain_label=CALL_ORDER_EDGE,
-                             label=f"{pipeline.number_of_steps}:{CALL_ORDER_EDGE}")
-
-        # Add order edge
-        if pipeline.last_tracked is not None:
-            network.add_edge(pipeline.last_tracked, call_node, plain_label=CALL_ORDER_EDGE,
-                             label=f"{pipeline.increment_step()}:{CALL_ORDER_EDGE}")
+        call_node = self._function_node(ctx, _logger_call.call_stack[-1].call_id, pipeline)
+        graph.count(call_node)
+
+        # Add order edge. The first call is connected to the entry node.
+        if pipeline.last_tracked is None:
+            pipeline.last_tracked = graph.intern("entry")
+        else:
+            pipeline.increment_step()
+        graph.add_edge(pipeline.last_tracked, call_node, CALL_ORDER_EDGE)
 
         # Add data edges
         for val in kwargs["_args"]:
-            self._check_data_edge(val, call_node, pipeline)
+            self._check_data_edge(val, call_node, pipeline, _pypads_pipeline_full_hash)
 
         # Add data edges
         for _, val in kwargs["_kwargs"].items():
-            self._check_data_edge(val, call_node, pipeline)
+            self._check_data_edge(val, call_node, pipeline, _pypads_pipeline_full_hash)
 
         pipeline.last_tracked = call_node
         return call_node
 
     @staticmethod
-    def _check_data_edge(val, call_node, pipeline):
+    def _check_data_edge(val, call_node, pipeline, full_hash=False):
         """
-        Add data flow edges depending on the hash of the data and the id of the data
+        Add data flow edges depending on the fingerprint of the data. Objects which can't be fingerprinted are
+        linked by their id.
         """
-        network = pipeline.nx_network
-        if id(val) in pipeline.data_flow:
-            network.add_edge(pipeline.data_flow[id(val)], call_node, plain_label=DATA_ID_EDGE,
-                             label=DATA_ID_EDGE)
-            # try:
-            #     data_hash = persistent_hash(val)
-            #     if data_hash in pipeline.data_flow:
-            #         network.add_edge(pipeline.data_flow[data_hash], call_node, plain_label=DATA_EDGE,
-            #                          label=DATA_EDGE)
-            # except Exception:
-            #     pass
-
-    def __post__(self, ctx, *args, _pypads_pipeline_args=False, _logger_call: InjectionLoggerCall, _logger_output,
-                 _pypads_pre_return, _pypads_result, _pypads_env, **kwargs):
+        fingerprint = data_fingerprint(val, full=full_hash)
+        if fingerprint is not None and fingerprint in pipeline.data_flow:
+            pipeline.graph.add_edge(pipeline.data_flow[fingerprint], call_node, DATA_EDGE)
+        elif id(val) in pipeline.data_id_flow:
+            pipeline.graph.add_edge(pipeline.data_id_flow[id(val)], call_node, DATA_ID_EDGE)
+
+    def __post__(self, ctx, *args, _pypads_pipeline_args=False, _pypads_pipeline_full_hash=False,
+                 _logger_call: InjectionLoggerCall, _logger_output, _pypads_pre_return, _pypads_result, _pypads_env,
+                 **kwargs):
         pads = _pypads_env.pypads
         pipeline = pads.cache.run_get("pipeline")
-        # try:
-        #     pipeline.add_data_hash(persistent_hash(_pypads_result), _pypads_pre_return)
-        # except Exception:
-        #     pass
-        if isinstance(_pypads_result, tuple):
-            for val in _pypads_result:
-                pipeline.add_data_id(id(val), _pypads_pre_return)
-        pipeline.add_data_id(id(_pypads_result), _pypads_pre_return)
+        results = list(_pypads_result) if isinstance(_pypads_result, tuple) else []
+        for val in results + [_pypads_result]:
+            pipeline.add_data_id(id(val), _pypads_pre_return)
+            fingerprint = data_fingerprint(val, full=_pypads_pipeline_full_hash)
+            if fingerprint is not None:
+                pipeline.add_data_hash(fingerprint, _pypads_pre_return)
@@ -6,8 +6,10 @@ from pypads.app.env import LoggerEnv
 from pypads.app.injections.run_loggers import RunSetup
 from pypads.app.injections.tracked_object import TrackedObject
 from pypads.app.misc.managed_git import ManagedGit
+from pypads.app.misc.scheduler import run_in_background
 from pypads.model.logger_output import OutputModel, TrackedObjectModel
 from pypads.model.models import IdReference
+from pypads.utils.fingerprint import git_fingerprint
 from pypads.utils.logging_util import FileFormats
 
 PYPADS_SOURCE_COMMIT_HASH = "pypads.source.git.commit_hash"
@@ -36,9 +38,18 @@ class GitTO(TrackedObject):
 
     def __init__(self, *args, source, parent, **kwargs):
         super().__init__(*args, source=source, parent=parent, **kwargs)
+        self._run_tags = {}
 
-    def add_tag(self, *args, **kwargs):
-        self.store_tag(*args, **kwargs)
+    @property
+    def run_tags(self):
+        """
+        :return: Tags set on the run by this object
+        """
+        return self._run_tags
+
+    def add_tag(self, key, value, description=""):
+        self._run_tags[key] = {"value": value, "description": description}
+        self.store_tag(key, value, description=description)
 
     def store_git_log(self, name, value, format=FileFormats.text):
         self.git_log = self.store_mem_artifact(name, value,
@@ -61,7 +72,15 @@ class IGitRSF(RunSetup):
     def output_schema_class(cls) -> Type[OutputModel]:
         return cls.IGitRSFOutput
 
-    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, **kwargs):
+    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, _pypads_log_limit=100,
+              _pypads_log_since=None, _pypads_async=False, _pypads_async_timeout=60, **kwargs):
+        """
+        :param _pypads_log_limit: Maximal number of commits stored in the git log. None stores the full history.
+        :param _pypads_log_since: Only store commits more recent than this date (e.g. "2 weeks ago")
+        :param _pypads_async: Capture the git information in the background instead of blocking the start of the run.
+        The state of the working tree is still taken at the start of the run.
+        :param _pypads_async_timeout: Seconds the teardown of the run waits for the background capture
+        """
         pads = _pypads_env.pypads
         _pypads_timeout = kwargs.get("_pypads_timeout") if kwargs.get("_pypads_timeout") else 5
         run = pads.api.active_run()
@@ -73,32 +92,77 @@ class IGitRSF(RunSetup):
                 repo = managed_git.repo
 
                 try:
-                    git_info = GitTO(parent=_logger_output, source=source_name or repo.working_dir,
-                                     version=repo.head.commit.hexsha)
-                    # Persist local changes into a patch file
-                    if managed_git.has_changes():
-                        patch, patch_hash = managed_git.create_patch()
-                        git_info.add_tag(PYPADS_GIT_UNCOMMITTED_CHANGES, patch_hash,
-                                         description="A hash of the patch including uncommitted changes.")
-                        git_info.patch = git_info.store_mem_artifact("git_stash", patch, write_format="patch",
-                                                                     description="A patch file including uncommitted "
-                                                                                 "changes")
-
-                    # Disable pager for returns
-                    repo.git.set_persistent_git_options(no_pager=True)
-                    git_info.add_tag(PYPADS_SOURCE_COMMIT_HASH, managed_git.commit_hash)
-                    git_info.add_tag(PYPADS_GIT_BRANCH, managed_git.branch)
-                    git_info.add_tag(PYPADS_GIT_DESC, repo.description, description="Repository description")
-                    git_info.add_tag("pypads.git.describe", repo.git.describe("--all"), description="")
-                    git_info.store_git_log(PYPADS_GIT_REMOTES, repo.git.log(kill_after_timeout=_pypads_timeout))
-                    remotes = repo.remotes
-                    remote_out = "No remotes existing"
-                    if len(remotes) > 0:
-                        remote_out = ""
-                        for remote in remotes:
-                            remote_out += remote.name + ": " + remote.url + "\n"
-                    git_info.add_tag(PYPADS_GIT_REMOTES, remote_out, description="Remotes of the repositories")
-
-                    _logger_output.git_info = git_info.store()
+                    # Reference the git information of an earlier run if neither HEAD nor the index changed since
+                    fingerprint = git_fingerprint(repo)
+                    reference = pads.snapshot_repository.get_snapshot(fingerprint)
+                    if reference is not None:
+                        _logger_output.git_info = reference
+                        # Runs are still searchable by their git tags
+                        for key, tag in pads.snapshot_repository.get_snapshot_tags(fingerprint).items():
+                            _logger_output.store_tag(key, tag["value"], description=tag["description"])
+                        return
+
+                    version = repo.head.commit.hexsha
+                    if _pypads_async:
+                        # Edits done while the capture is running mustn't leak into the patch
+                        tree = managed_git.snapshot_tree()
+
+                        def capture():
+                            self._capture(pads, managed_git, source_name, version, fingerprint, _logger_output,
+                                          tree=tree, timeout=_pypads_timeout, log_limit=_pypads_log_limit,
+                                          log_since=_pypads_log_since)
+
+                        run_in_background(pads, "git", capture, output=_logger_output, timeout=_pypads_async_timeout)
+                    else:
+                        self._capture(pads, managed_git, source_name, version, fingerprint, _logger_output,
+                                      timeout=_pypads_timeout, log_limit=_pypads_log_limit, log_since=_pypads_log_since)
                 except Exception as e:
                     _logger_output.set_failure_state(e)
+
+    @staticmethod
+    def _capture(pads, managed_git: ManagedGit, source_name, version, fingerprint, _logger_output, tree=False,
+                 timeout=5, log_limit=None, log_since=None):
+        """
+        Store the git information of the repository.
+        :param version: Commit of HEAD at the start of the run
+        :param tree: Tree holding the tracked files at the start of the run. None if there were no changes. False to
+        use the current working tree.
+        """
+        repo = managed_git.repo
+        git_info = GitTO(parent=_logger_output, source=source_name or repo.working_dir, version=version)
+        # Persist local changes into a patch file
+        patch = None
+        if tree is False:
+            if managed_git.has_changes():
+                patch, patch_hash = managed_git.create_patch()
+        elif tree is not None:
+            patch, patch_hash = managed_git.create_tree_patch(tree, version)
+        if patch is not None:
+            git_info.add_tag(PYPADS_GIT_UNCOMMITTED_CHANGES, patch_hash,
+                             description="A hash of the patch including uncommitted changes.")
+            git_info.patch = git_info.store_mem_artifact("git_stash", patch, write_format="patch",
+                                                         description="A patch file including uncommitted "
+                                                                     "changes")
+
+        # Disable pager for returns
+        repo.git.set_persistent_git_options(no_pager=True)
+        git_info.add_tag(PYPADS_SOURCE_COMMIT_HASH, version, description="Commit of HEAD at the start of the run.")
+        git_info.add_tag(PYPADS_GIT_BRANCH, managed_git.branch)
+        git_info.add_tag(PYPADS_GIT_DESC, repo.description, description="Repository description")
+        git_info.add_tag("pypads.git.describe", repo.git.describe("--all", version), description="")
+        log_args = []
+        if log_limit is not None:
+            log_args.append("-n{}".format(log_limit))
+        if log_since is not None:
+            log_args.append("--since={}".format(log_since))
+        git_info.store_git_log(PYPADS_GIT_REMOTES, repo.git.log(*log_args, version, kill_after_timeout=timeout))
+        remotes = repo.remotes
+        remote_out = "No remotes existing"
+        if len(remotes) > 0:
+            remote_out = ""
+            for remote in remotes:
+                remote_out += remote.name + ": " + remote.url + "\n"
+        git_info.add_tag(PYPADS_GIT_REMOTES, remote_out, description="Remotes of the repositories")
+
+        _logger_output.git_info = git_info.store()
+        pads.snapshot_repository.add_snapshot(fingerprint, _logger_output.git_info, tags=git_info.run_tags)
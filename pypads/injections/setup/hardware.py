@@ -1,4 +1,4 @@
-from typing import Type, Union, Optional, List
+from typing import Type, Union, Optional, List, Dict
 
 from pydantic import BaseModel
 
@@ -7,9 +7,13 @@ from pypads.app.env import LoggerEnv
 from pypads.app.injections.run_loggers import RunSetup
 from pypads.app.injections.tracked_object import TrackedObject
 from pypads.app.misc.mixins import DEFAULT_ORDER
+from pypads.app.misc.sampler import get_hardware_sampler
 from pypads.model.logger_output import OutputModel, TrackedObjectModel
 from pypads.model.models import IdReference
-from pypads.utils.util import sizeof_fmt, uri_to_path, PeriodicThread
+from pypads.utils.fingerprint import machine_fingerprint
+from pypads.utils.logging_util import FileFormats
+from pypads.utils.resources import get_resource_probe, PROCESS_COLUMNS, CGROUP_COLUMNS
+from pypads.utils.util import sizeof_fmt, uri_to_path
 
 
 class SystemStatsTO(TrackedObject):
@@ -30,6 +34,7 @@ class SystemStatsTO(TrackedObject):
         system: Optional[IdReference] = None  # System TrackedObject
         process: Optional[IdReference] = None  # Process TrackedObject
         network: Optional[IdReference] = None  # Network TrackedObject
+        container: Optional[IdReference] = None  # Container TrackedObject
 
     @classmethod
     def get_model_cls(cls) -> Type[BaseModel]:
@@ -40,6 +45,7 @@ class IMacAddressRSF(RunSetup):
     """
     Run setup function to create the SystemStatsTO and store it for further additions into the cache.
     """
+    _provided_cached = SystemStatsTO.__name__
     name = "Generic MacAddress Run Setup Logger"
     type: str = "MacAddressRunLogger"
 
@@ -86,33 +92,65 @@ class ISystemRSF(RunSetup):
         import platform
         system = platform.uname()
         computer_to: SystemStatsTO = _pypads_cached_results[0]
-        system_info = SystemTO(system=system.system, node=system.node, release=system.release, version=system.version,
-                               machine=system.machine, processor=system.processor, parent=_logger_output)
+
+        def collect():
+            return SystemTO(system=system.system, node=system.node, release=system.release, version=system.version,
+                            machine=system.machine, processor=system.processor, parent=_logger_output).store()
 
         # Update computer to
-        computer_to.system = system_info.store()
+        computer_to.system = _pypads_env.pypads.snapshot_repository.snapshot(machine_fingerprint("system"), collect)
         computer_to.store()
 
 
-class GpuUsageTO(TrackedObject):
+class SampledUsageTO(TrackedObject):
     """
-    Tracked object to be updated live on the gpu usage.
+    Tracked object holding the samples a probe of the hardware sampler collected over the run.
     """
 
-    class GpuUsageTOModel(TrackedObjectModel):
-        type: str = "GpuUsage"
-        description: str = "Timeline about the usage of the in the experiment used gpu."
+    class SampledUsageTOModel(TrackedObjectModel):
+        columns: List[str] = []
+        samples: Optional[IdReference] = None  # Npy artifact. First column holds the timestamps.
+        aggregates: Dict[str, Dict[str, Optional[float]]] = {}  # Aggregates over the whole run per column
+        period: float = 0.0
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.SampledUsageTOModel
 
-        class GpuCoreModel(BaseModel):
-            device: int = ...
-            memory: float = ...
-            memoryAllocated: List[float] = ...
-            temperature: List[int] = ...
-            power_usage: List[float] = ...
+    def add_samples(self: Union['SampledUsageTO', SampledUsageTOModel], name, probe, percentiles):
+        self.columns = probe.columns
+        self.samples = self.store_mem_artifact(name, probe.buffer.samples(), write_format=FileFormats.numpy,
+                                               description="Samples of " + name + ". The first column holds the "
+                                                                                  "timestamps.")
+        self.aggregates = probe.buffer.aggregates(percentiles)
 
-            class Config:
-                orm_mode = True
 
+def _track_usage(pads, name, to: SampledUsageTO, fn, columns, period):
+    """
+    Register a probe to the hardware sampler of the run. The samples are stored into the tracked object at the end
+    of the run.
+    :return: Reference to the tracked object
+    """
+    sampler = get_hardware_sampler(pads)
+    to.columns = columns
+    to.period = period
+
+    def flush(probe):
+        to.add_samples(name, probe, sampler.percentiles)
+        to.store()
+
+    sampler.add_probe(name, fn, columns, period=period, on_flush=flush)
+    return to.store()
+
+
+class GpuUsageTO(SampledUsageTO):
+    """
+    Tracked object holding the usage of the in the experiment used gpus.
+    """
+
+    class GpuUsageTOModel(SampledUsageTO.SampledUsageTOModel):
+        type: str = "GpuUsage"
+        description: str = "Timeline about the usage of the in the experiment used gpu."
         gpu_count: int = 0
         gpu_arch: str = ""
         gpu_name= []
@@ -121,8 +159,6 @@ class GpuUsageTO(TrackedObject):
         gpu_serial_number=[]
         gpu_total_memory = []
         cuda_version = []
-        gpu_cores: List[GpuCoreModel] = []
-        period: float = 0.0
 
     @classmethod
     def get_model_cls(cls) -> Type[BaseModel]:
@@ -164,20 +200,8 @@ class GpuUsageTO(TrackedObject):
         except Exception as e:
             print("Error occured while fetching GPU details - " ,e)
 
-    def add_gpu_usage(self: Union['GpuUsageTO', GpuUsageTOModel]):
-        gpu_cores = _get_gpu_usage(self.gpu_count)
-        if gpu_cores is not None:
-            for idx, (handle, gpu, memory, memory_allocated, temp, power_usage) in enumerate(gpu_cores):
-                if idx >= len(self.gpu_cores):
-                    self.gpu_cores.append(
-                        self.GpuUsageTOModel.GpuCoreModel(device=gpu, memory=memory,
-                                                          memoryAllocated=[memory_allocated], temperature=[temp],
-                                                          power_usage=[power_usage]))
-                else:
-                    core = self.gpu_cores[idx]
-                    core.memoryAllocated.append(memory_allocated)
-                    core.temperature.append(temp)
-                    core.power_usage.append(power_usage)
+
+GPU_COLUMNS = ["utilization", "memory_utilization", "memory_allocated", "temperature", "power_usage"]
 
 
 def _get_gpu_usage(gpu_count):
@@ -194,7 +218,7 @@ def _get_gpu_usage(gpu_count):
                         pynvml.nvmlDeviceGetEnforcedPowerLimit(handle) / 1000.0) * 100
             except pynvml.NVMLError as e:
                 logger.error("Coudln't extract power usage due to NVML exception: {}".format(str(e)))
-                power_usage = -9999
+                power_usage = float("nan")
             gpus.append((handle, util.gpu, util.memory, (
                     memory.used / float(memory.total)
             ) * 100, temp, power_usage))
@@ -204,6 +228,13 @@ def _get_gpu_usage(gpu_count):
     return gpus
 
 
+def _get_gpu_sample(gpu_count):
+    gpus = _get_gpu_usage(gpu_count)
+    if gpus is None:
+        return [float("nan")] * (gpu_count * len(GPU_COLUMNS))
+    return [value for gpu in gpus for value in gpu[1:]]
+
+
 class IGpuRSF(RunSetup):
     _dependencies = {"pynvml","pycuda","pycuda.driver","GPUtil"}
     _needed_cached = SystemStatsTO.__name__
@@ -215,31 +246,20 @@ class IGpuRSF(RunSetup):
 
     class IGpuRSFOutput(OutputModel):
         type: str = "IGpuRSF-Output"
-        gpu_usage: Optional[IdReference] = ...  # GpuUsageTO
+        gpu_usage: Optional[IdReference] = None  # GpuUsageTO
 
     @classmethod
     def output_schema_class(cls) -> Type[OutputModel]:
         return cls.IGpuRSFOutput
 
     def _call(self, *args, _pypads_period=1.0, _pypads_env: LoggerEnv, _logger_call, _logger_output,
-    _pypads_cached_results=None, **kwargs):
-            if _pypads_period > 0:
-                gpu_usage_info = GpuUsageTO(parent=_logger_output)
-                gpu_usage_info.period = _pypads_period
-
-            def track_gpu_usage(to: GpuUsageTO):
-                to.add_gpu_usage()
-                to.store()
-
-            _logger_output.gpu_usage = gpu_usage_info.store()
-            thread = PeriodicThread(target=track_gpu_usage, sleep=_pypads_period, args=(gpu_usage_info,))
-            thread.start()
-
-            # stop thread store disk_usage object
-            def cleanup_thread(*args, **kwargs):
-                thread.join()
-
-            _pypads_env.pypads.api.register_teardown_utility(_logger_call, fn=cleanup_thread)
+              _pypads_cached_results=None, **kwargs):
+        if _pypads_period > 0:
+            gpu_usage_info = GpuUsageTO(parent=_logger_output)
+            gpu_count = gpu_usage_info.gpu_count
+            columns = ["gpu_" + str(i) + "." + c for i in range(gpu_count) for c in GPU_COLUMNS]
+            _logger_output.gpu_usage = _track_usage(_pypads_env.pypads, "gpu_usage", gpu_usage_info,
+                                                    lambda: _get_gpu_sample(gpu_count), columns, _pypads_period)
 
 
 class CpuTO(TrackedObject):
@@ -256,55 +276,20 @@ class CpuTO(TrackedObject):
         return cls.CpuTOModel
 
 
-class CpuUsageTO(TrackedObject):
+class CpuUsageTO(SampledUsageTO):
     """
-    Tracked object to be updated live on the cpu usage.
+    Tracked object holding the usage of the in the experiment used cpu.
     """
 
-    class CpuUsageTOModel(TrackedObjectModel):
+    class CpuUsageTOModel(SampledUsageTO.SampledUsageTOModel):
         type: str = "CpuUsage"
-        description: str = "Timeline about the usage of the in the experiment used cpu."
-
-        class CpuCoreModel(BaseModel):
-            index: int = ...
-            usage: List[float] = ...
-
-            class Config:
-                orm_mode = True
-
-        cpu_cores: List[CpuCoreModel] = []
-        total_usage: List[str] = []
-        period: float = ...
+        description: str = "Timeline about the usage of the in the experiment used cpu. Holds one column per core " \
+                           "and the total usage."
 
     @classmethod
     def get_model_cls(cls) -> Type[BaseModel]:
         return cls.CpuUsageTOModel
 
-    def add_cpu_usage(self: Union['CpuUsageTO', CpuUsageTOModel]):
-        cores = _get_cpu_usage()
-        for idx, usage in enumerate(cores[:-1]):
-            if idx >= len(self.cpu_cores):
-                self.cpu_cores.append(self.__class__.CpuUsageTOModel.CpuCoreModel(index=idx, usage=[usage]))
-            else:
-                core = self.cpu_cores[idx]
-                core.usage.append(usage)
-        self.total_usage.append(cores[-1])
-
-
-def _get_cpu_usage():
-    import psutil
-    """
-    cpu_usage = "CPU usage for cores:"
-    for i, percentage in enumerate(psutil.cpu_percent(percpu=True)):
-        cpu_usage += f"\nCore {i}: {percentage}%"
-    cpu_usage += f"\nTotal CPU usage: {psutil.cpu_percent()}%"
-    """
-    cpu_usage = []
-    for i, percentage in enumerate(psutil.cpu_percent(percpu=True)):
-        cpu_usage.append(percentage)
-    cpu_usage.append(psutil.cpu_percent())
-    return cpu_usage
-
 
 class ICpuRSF(RunSetup):
     _dependencies = {"psutil"}
@@ -329,32 +314,22 @@ class ICpuRSF(RunSetup):
         import psutil
         freq = psutil.cpu_freq()
         computer_to: SystemStatsTO = _pypads_cached_results[0]
-        cpu_info = CpuTO(physical_cores=psutil.cpu_count(logical=False), total_cores=psutil.cpu_count(logical=True),
-                         max_freq=f"{freq.max:2f}Mhz", min_freq=f"{freq.min:2f}Mhz", parent=_logger_output)
+        cpu = dict(physical_cores=psutil.cpu_count(logical=False), total_cores=psutil.cpu_count(logical=True),
+                   max_freq=f"{freq.max:2f}Mhz", min_freq=f"{freq.min:2f}Mhz")
 
         # Update computer to
-        cpu_ref = cpu_info.store()
+        cpu_ref = _pypads_env.pypads.snapshot_repository.snapshot(
+            machine_fingerprint("cpu", sorted(cpu.items())), lambda: CpuTO(**cpu, parent=_logger_output).store())
         _logger_output.cpu = cpu_ref
         computer_to.cpu = cpu_ref
         computer_to.store()
 
         if _pypads_period > 0:
-            cpu_usage_info = CpuUsageTO(parent=_logger_output)
-            cpu_usage_info.period = _pypads_period
-
-            def track_cpu_usage(to: CpuUsageTO):
-                to.add_cpu_usage()
-                to.store()
-
-            _logger_output.cpu_usage = cpu_usage_info.store()
-            thread = PeriodicThread(target=track_cpu_usage, sleep=_pypads_period, args=(cpu_usage_info,))
-            thread.start()
-
-            # stop thread store disk_usage object
-            def cleanup_thread(*args, **kwargs):
-                thread.join()
-
-            _pypads_env.pypads.api.register_teardown_utility(_logger_call, fn=cleanup_thread)
+            probe = get_resource_probe()
+            columns = ["core_" + str(i) for i in range(probe.cpu_count())] + ["total"]
+            _logger_output.cpu_usage = _track_usage(_pypads_env.pypads, "cpu_usage",
+                                                    CpuUsageTO(parent=_logger_output), probe.cpu_usage, columns,
+                                                    _pypads_period)
 
 
 class RamTO(TrackedObject):
@@ -369,6 +344,20 @@ class RamTO(TrackedObject):
         return cls.RamTOModel
 
 
+class MemoryUsageTO(SampledUsageTO):
+    """
+    Tracked object holding the usage of the ram and swap.
+    """
+
+    class MemoryUsageTOModel(SampledUsageTO.SampledUsageTOModel):
+        type: str = "MemoryUsage"
+        description: str = "Timeline about the usage of the ram and swap in percent."
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.MemoryUsageTOModel
+
+
 class IRamRSF(RunSetup):
     _dependencies = {"psutil"}
     _needed_cached = SystemStatsTO.__name__
@@ -378,25 +367,39 @@ class IRamRSF(RunSetup):
     def __init__(self, *args, order=None, **kwargs):
         super().__init__(*args, order=order if order is not None else DEFAULT_ORDER + 1, **kwargs)
 
+    class IRamRSFOutput(OutputModel):
+        type: str = "IRamRSF-Output"
+        memory_usage: Optional[IdReference] = None  # MemoryUsageTO
+
+    @classmethod
+    def output_schema_class(cls) -> Type[OutputModel]:
+        return cls.IRamRSFOutput
+
     def _call(self, *args, _pypads_period=1.0, _pypads_env: LoggerEnv, _logger_call, _logger_output,
               _pypads_cached_results=None, **kwargs):
         import psutil
         memory = psutil.virtual_memory()
         swap = psutil.swap_memory()
         computer_to: SystemStatsTO = _pypads_cached_results[0]
-        memory_info = RamTO(total_memory=sizeof_fmt(memory.total), total_swap=sizeof_fmt(swap.total),
-                            parent=_logger_output)
+        ram = dict(total_memory=sizeof_fmt(memory.total), total_swap=sizeof_fmt(swap.total))
 
-        computer_to.memory = memory_info.store()
+        computer_to.memory = _pypads_env.pypads.snapshot_repository.snapshot(
+            machine_fingerprint("memory", sorted(ram.items())), lambda: RamTO(**ram, parent=_logger_output).store())
         computer_to.store()
 
+        if _pypads_period > 0:
+            _logger_output.memory_usage = _track_usage(_pypads_env.pypads, "memory_usage",
+                                                       MemoryUsageTO(parent=_logger_output),
+                                                       get_resource_probe().memory_usage,
+                                                       ["memory", "swap"], _pypads_period)
+
 
 class DiskTO(TrackedObject):
     class DiskTOModel(TrackedObjectModel):
         type: str = "DiskInformation"
         description: str = "Information about the in the experiment used disk."
         total_size: str = ...
-        free: str = ...
+        free: Optional[str] = None
 
     @classmethod
     def get_model_cls(cls) -> Type[BaseModel]:
@@ -418,9 +421,13 @@ class IDiskRSF(RunSetup):
         path = uri_to_path(pads.backend.uri)
         disk_usage = psutil.disk_usage(path)
         computer_to: SystemStatsTO = _pypads_cached_results[0]
-        disk_info = DiskTO(total_size=disk_usage.total, free=disk_usage.free, parent=_logger_output)
 
-        computer_to.disk = disk_info.store()
+        # The free space changes on every run and is therefore not part of the snapshot
+        computer_to.disk = pads.snapshot_repository.snapshot(
+            machine_fingerprint("disk", path, disk_usage.total),
+            lambda: DiskTO(total_size=disk_usage.total, parent=_logger_output).store())
+        _logger_output.store_metric("pypads.disk.free", float(disk_usage.free), step=0,
+                                    description="Free space of the disk holding the results in bytes.")
         computer_to.store()
 
 
@@ -436,8 +443,23 @@ class ProcessTO(TrackedObject):
         return cls.ProcessTOModel
 
 
+class ProcessUsageTO(SampledUsageTO):
+    """
+    Tracked object holding the resource usage of the main process.
+    """
+
+    class ProcessUsageTOModel(SampledUsageTO.SampledUsageTOModel):
+        type: str = "ProcessUsage"
+        description: str = "Timeline about the resource usage of the main process. Holds the cpu usage in percent of " \
+                           "a core, the resident memory and the read and written bytes."
+        probe: str = ...  # Backend used to read the values
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.ProcessUsageTOModel
+
+
 class IPidRSF(RunSetup):
-    _dependencies = {"psutil"}
     _needed_cached = SystemStatsTO.__name__
     name = "Process Run Setup Logger"
     type: str = "ProcessRunLogger"
@@ -445,17 +467,100 @@ class IPidRSF(RunSetup):
     def __init__(self, *args, order=None, **kwargs):
         super().__init__(*args, order=order if order is not None else DEFAULT_ORDER + 1, **kwargs)
 
-    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, _pypads_cached_results=None, **kwargs):
-        import psutil
+    class IPidRSFOutput(OutputModel):
+        type: str = "IPidRSF-Output"
+        process_usage: Optional[IdReference] = None  # ProcessUsageTO
+
+    @classmethod
+    def output_schema_class(cls) -> Type[OutputModel]:
+        return cls.IPidRSFOutput
+
+    def _call(self, *args, _pypads_period=1.0, _pypads_env: LoggerEnv, _logger_call, _logger_output,
+              _pypads_cached_results=None, **kwargs):
         import os
-        pid = os.getpid()
-        process = psutil.Process(pid=pid)
         computer_to: SystemStatsTO = _pypads_cached_results[0]
-        process_info = ProcessTO(id=pid, cwd=process.cwd(), parent=_logger_output)
+        process_info = ProcessTO(id=os.getpid(), cwd=os.getcwd(), parent=_logger_output)
 
         computer_to.process = process_info.store()
         computer_to.store()
 
+        if _pypads_period > 0:
+            probe = get_resource_probe()
+            _logger_output.process_usage = _track_usage(_pypads_env.pypads, "process_usage",
+                                                        ProcessUsageTO(probe=probe.name, parent=_logger_output),
+                                                        probe.process_sample, PROCESS_COLUMNS, _pypads_period)
+
+
+class ContainerTO(TrackedObject):
+    class ContainerTOModel(TrackedObjectModel):
+        type: str = "ContainerInformation"
+        description: str = "Information about the cgroup (e.g. docker container) the experiment runs in."
+        cgroup_version: int = ...
+        path: str = ...
+        cpu_limit: Optional[float] = None  # Number of cores the cgroup may use. None if unlimited.
+        memory_limit: Optional[int] = None  # Bytes the cgroup may use. None if unlimited.
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.ContainerTOModel
+
+
+class ContainerUsageTO(SampledUsageTO):
+    """
+    Tracked object holding the resource usage and throttling of the cgroup.
+    """
+
+    class ContainerUsageTOModel(SampledUsageTO.SampledUsageTOModel):
+        type: str = "ContainerUsage"
+        description: str = "Timeline about the resource usage of the cgroup the experiment runs in. Holds the used " \
+                           "memory, the cpu time and the throttling counters."
+
+    @classmethod
+    def get_model_cls(cls) -> Type[BaseModel]:
+        return cls.ContainerUsageTOModel
+
+
+class IContainerRSF(RunSetup):
+    """
+    Run setup function storing the limits of the cgroup of the process and sampling its usage. Inside of containers
+    the numbers of the host are misleading. This is only available on linux.
+    """
+    _needed_cached = SystemStatsTO.__name__
+    name = "Container Run Setup Logger"
+    type: str = "ContainerRunLogger"
+
+    def __init__(self, *args, order=None, **kwargs):
+        super().__init__(*args, order=order if order is not None else DEFAULT_ORDER + 1, **kwargs)
+
+    class IContainerRSFOutput(OutputModel):
+        type: str = "IContainerRSF-Output"
+        container: Optional[IdReference] = None  # ContainerTO
+        container_usage: Optional[IdReference] = None  # ContainerUsageTO
+
+    @classmethod
+    def output_schema_class(cls) -> Type[OutputModel]:
+        return cls.IContainerRSFOutput
+
+    def _call(self, *args, _pypads_period=1.0, _pypads_env: LoggerEnv, _logger_call, _logger_output,
+              _pypads_cached_results=None, **kwargs):
+        probe = get_resource_probe()
+        cgroup = probe.cgroup()
+        if cgroup is None:
+            logger.debug("Process doesn't run in a cgroup. Skipping container information.")
+            return
+        computer_to: SystemStatsTO = _pypads_cached_results[0]
+        container_info = ContainerTO(cgroup_version=cgroup["version"], path=cgroup["path"],
+                                     cpu_limit=cgroup["cpu_limit"], memory_limit=cgroup["memory_limit"],
+                                     parent=_logger_output)
+        _logger_output.container = container_info.store()
+        computer_to.container = _logger_output.container
+        computer_to.store()
+
+        if _pypads_period > 0:
+            _logger_output.container_usage = _track_usage(_pypads_env.pypads, "container_usage",
+                                                          ContainerUsageTO(parent=_logger_output),
+                                                          probe.cgroup_sample, CGROUP_COLUMNS, _pypads_period)
+
 
 class SocketTO(TrackedObject):
     class SocketTOModel(TrackedObjectModel):
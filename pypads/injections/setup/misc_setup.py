@@ -1,4 +1,8 @@
+import logging
 import os
+import re
+import sys
+import threading
 from typing import List, Type, Union
 
 from pydantic import BaseModel
@@ -8,9 +12,12 @@ from pypads.app.env import LoggerEnv
 from pypads.app.injections.injection import DelayedResultsMixin
 from pypads.app.injections.run_loggers import RunSetup
 from pypads.app.injections.tracked_object import TrackedObject
+from pypads.app.misc.scheduler import run_in_background
 from pypads.model.domain import LibraryModel
 from pypads.model.logger_output import OutputModel, TrackedObjectModel
 from pypads.model.models import IdReference
+from pypads.utils.fingerprint import environment_fingerprint
+from pypads.utils.log_chunks import LogChunker, LOG_INDEX_TAG
 from pypads.utils.logging_util import FileFormats, get_artifact_dir, get_temp_folder
 
 
@@ -69,10 +76,32 @@ class DependencyRSF(RunSetup):
     def output_schema_class(cls) -> Type[OutputModel]:
         return cls.DependencyRSFOutput
 
-    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, **kwargs):
+    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, _pypads_async=False,
+              _pypads_async_timeout=60, **kwargs):
+        """
+        :param _pypads_async: Collect the dependencies in the background instead of blocking the start of the run
+        :param _pypads_async_timeout: Seconds the teardown of the run waits for the background collection
+        """
         pads = _pypads_env.pypads
         logger.info("Tracking execution to run with id " + pads.api.active_run().info.run_id)
+
+        # Reference the dependencies of an earlier run if no package was installed or removed since
+        fingerprint = environment_fingerprint()
+        reference = pads.snapshot_repository.get_snapshot(fingerprint)
+        if reference is not None:
+            _logger_output.dependencies = reference
+            return
+
+        if _pypads_async:
+            run_in_background(pads, "dependencies", lambda: self._collect(pads, fingerprint, _logger_output),
+                              output=_logger_output, timeout=_pypads_async_timeout)
+        else:
+            self._collect(pads, fingerprint, _logger_output)
+
+    @staticmethod
+    def _collect(pads, fingerprint, _logger_output):
         dependencies = DependencyTO(parent=_logger_output)
+        failed = False
         try:
             # Execute pip freeze
             try:
@@ -83,9 +112,12 @@ class DependencyRSF(RunSetup):
                 from pip.operations import freeze
             dependencies.add_dependency(list(freeze.freeze()))
         except Exception as e:
+            failed = True
             _logger_output.set_failure_state(e)
         finally:
             _logger_output.dependencies = dependencies.store()
+        if not failed:
+            pads.snapshot_repository.add_snapshot(fingerprint, _logger_output.dependencies)
 
 
 class LogTO(TrackedObject):
@@ -114,22 +146,31 @@ class LogTO(TrackedObject):
 
 
 class LoguruRSF(DelayedResultsMixin, RunSetup):
-    """Store all logs of the current run into a file."""
+    """
+    Store all logs of the current run into compressed chunks. Closed chunks are uploaded by the background writer of
+    the sink while the run is going on. An index of the chunks allows for tailing the logs of a running job.
+    """
 
     @staticmethod
     def finalize_output(pads, logger_call, output, *args, **kwargs):
         logs = pads.cache.run_get("loguru_logger")
         lid = pads.cache.run_get("loguru_logger_lid")
-        folder = get_temp_folder()
+        chunker: LogChunker = pads.cache.run_get("loguru_chunker")
         try:
             from pypads.pads_loguru import logger_manager
             logger_manager.remove(lid)
         except Exception:
             pass
+        # Compress and upload the last chunk
+        chunker.close(os.path.join(chunker.folder, chunker.name + ".log"))
 
-        import glob
-        for file in glob.glob(os.path.join(folder, "run_*.log")):
-            pads.api.log_artifact(file, description="Logs of the current run", artifact_path=logs.path)
+        # Retry chunks of which the upload failed while running
+        uploaded = pads.cache.run_get("loguru_uploaded_chunks")
+        run_id = pads.api.active_run().info.run_id
+        for chunk in chunker.chunks:
+            if chunk["file"] not in uploaded:
+                _upload_log_chunk(pads, run_id, logs, uploaded, os.path.join(chunker.folder, chunk["file"]),
+                                  chunker.index_path)
 
         output.logs = logs.store()
 
@@ -149,24 +190,149 @@ class LoguruRSF(DelayedResultsMixin, RunSetup):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, **kwargs):
+    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, _pypads_chunk_size=10 * 1024 * 1024,
+              _pypads_chunk_interval=300.0, _pypads_compression="gzip", **kwargs):
+        """
+        :param _pypads_chunk_size: Size in bytes after which a chunk is closed
+        :param _pypads_chunk_interval: Seconds after which a chunk is closed
+        :param _pypads_compression: Compression of the chunks. Either "gzip" or "zstd" (if zstandard is installed).
+        """
         pads = _pypads_env.pypads
 
         if not pads.cache.run_exists("loguru_logger"):
             std_out_logger = LogTO(parent=_logger_output)
             pads.cache.run_add("loguru_logger", std_out_logger)
+            uploaded = set()
+            pads.cache.run_add("loguru_uploaded_chunks", uploaded)
 
             from pypads.utils.logging_util import get_temp_folder
             folder = get_temp_folder()
+            # The chunks are uploaded by the worker thread of the sink. They are bound to the run registering the sink
+            # instead of the run active on that thread.
+            run_id = pads.api.active_run().info.run_id
+            name = "run_" + run_id
+            chunker = LogChunker(folder, name,
+                                 on_chunk=lambda chunk_path, index_path: _upload_log_chunk(pads, run_id,
+                                                                                          std_out_logger, uploaded,
+                                                                                          chunk_path, index_path),
+                                 chunk_size=_pypads_chunk_size, chunk_interval=_pypads_chunk_interval,
+                                 compression=_pypads_compression)
+            pads.cache.run_add("loguru_chunker", chunker)
+            pads.api.set_tag(LOG_INDEX_TAG, os.path.join(std_out_logger.path, os.path.basename(chunker.index_path)),
+                             description="Artifact path of the index of the log chunks of the run.")
+
             from pypads.pads_loguru import logger_manager
-            lid = logger_manager.add(os.path.join(folder, "run_" + pads.api.active_run().info.run_id + ".log"),
-                                     rotation="50 MB",
-                                     enqueue=True)
+            lid = logger_manager.add(os.path.join(folder, name + ".log"), rotation=chunker.rotation,
+                                     compression=chunker.compression_function, enqueue=True)
             pads.cache.run_add("loguru_logger_lid", lid)
         else:
             logger.warning("LoguruRSF already registered")
 
 
+def _upload_log_chunk(pads, run_id, logs: LogTO, uploaded, chunk_path, index_path):
+    """
+    Upload a closed log chunk and the current index of the chunks into the given run.
+    :param run_id: Id of the run the sink was registered for
+    :param uploaded: Set of the names of the uploaded chunks
+    """
+    try:
+        pads.backend.log_file(chunk_path, artifact_path=logs.path, run_id=run_id)
+        pads.backend.log_file(index_path, artifact_path=logs.path, run_id=run_id)
+        uploaded.add(os.path.basename(chunk_path))
+    except Exception as e:
+        # Don't log to loguru here. This is called by the sink itself.
+        logging.getLogger(__name__).warning("Couldn't upload log chunk %s: %s", chunk_path, e)
+
+
+ANSI_ESCAPE = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
+
+
+class BufferedLogWriter:
+    """
+    Writer collecting raw messages in memory. A background thread writes them to the file if more than flush_size
+    characters are buffered or every flush_interval seconds. ANSI escape sequences and lines overwritten with carriage
+    returns (progress bars) are cleaned once per written batch instead of once per message.
+    """
+
+    def __init__(self, path, flush_size=1 << 16, flush_interval=1.0):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._size = 0
+        # Last line of the written batches which wasn't terminated yet
+        self._pending = ""
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._file = open(path, "a")
+        self._thread = threading.Thread(target=self._run, name="StdOutFlushThread", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def clean(text):
+        """
+        Remove ANSI escape sequences and keep only the last version of lines overwritten by carriage returns.
+        :param text: Raw text
+        :return: Cleaned text
+        """
+        text = ANSI_ESCAPE.sub('', text)
+        if "\r" not in text:
+            return text
+        lines = text.split("\n")
+        return "\n".join(line.rstrip("\r").rsplit("\r", 1)[-1] for line in lines)
+
+    def write(self, message):
+        if self._closed.is_set():
+            return
+        with self._lock:
+            self._buffer.append(message)
+            self._size += len(message)
+            full = self._size >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self, final=False):
+        with self._lock:
+            batch, self._buffer, self._size = self._buffer, [], 0
+        with self._file_lock:
+            if self._file.closed:
+                return
+            text = self._pending + "".join(batch)
+            if not final:
+                # Lines still in progress may be overwritten by the next batch
+                text, newline, self._pending = text.rpartition("\n")
+                text += newline
+                if len(self._pending) >= self.flush_size:
+                    # Drop overwritten states of the line and write it anyway if it is still too long
+                    self._pending = ANSI_ESCAPE.sub('', self._pending).rsplit("\r", 1)[-1]
+                    if len(self._pending) >= self.flush_size:
+                        text, self._pending = text + self._pending, ""
+            else:
+                self._pending = ""
+            if text:
+                self._file.write(self.clean(text))
+                self._file.flush()
+
+    def close(self):
+        """
+        Stop the flush thread and write all remaining messages.
+        """
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush(final=True)
+        with self._file_lock:
+            self._file.close()
+
+
 class StdOutRSF(DelayedResultsMixin, RunSetup):
     """Store all stdout output of the current run into a file."""
 
@@ -175,6 +341,12 @@ class StdOutRSF(DelayedResultsMixin, RunSetup):
         from pypads.app.pypads import get_current_pads
         pads = get_current_pads()
 
+        writer: BufferedLogWriter = pads.cache.run_get("std_out_writer")
+        if writer is not None:
+            if hasattr(sys.stdout, 'original_write'):
+                setattr(sys.stdout, 'write', getattr(sys.stdout, 'original_write'))
+            writer.close()
+
         log_to: LogTO = pads.cache.run_get("std_out_logger")
         path = os.path.join(get_temp_folder(), "logfile.log")
         if os.path.isfile(path):
@@ -199,7 +371,12 @@ class StdOutRSF(DelayedResultsMixin, RunSetup):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, **kwargs):
+    def _call(self, *args, _pypads_env: LoggerEnv, _logger_call, _logger_output, _pypads_flush_size=1 << 16,
+              _pypads_flush_interval=1.0, **kwargs):
+        """
+        :param _pypads_flush_size: Number of buffered characters after which the output is written to the log file
+        :param _pypads_flush_interval: Seconds after which buffered output is written to the log file
+        """
         from pypads.app.pypads import get_current_pads
         pads = get_current_pads()
 
@@ -210,38 +387,22 @@ class StdOutRSF(DelayedResultsMixin, RunSetup):
             logger.warning("StdOutRSF already registered")
             return
 
-        import sys
-
-        class Logger(object):
-            def __init__(self):
-                import re
-                temp_folder = get_temp_folder()
-                if not os.path.isdir(temp_folder):
-                    os.mkdir(temp_folder)
-                # TODO close file?
-                self.log = open(os.path.join(temp_folder, "logfile.log"), "a")
-                self.re = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
-
-            def write(self, message):
-                self.log.write(self.re.sub('', message))
-                self.log.flush()
-
-            def flush(self):
-                # this flush method is needed for python 3 compatibility.
-                # this handles the flush command by doing nothing.
-                # you might want to specify some extra behavior here.
-                pass
 
-        stdout_logger = Logger()
+        temp_folder = get_temp_folder()
+        if not os.path.isdir(temp_folder):
+            os.mkdir(temp_folder)
+        writer = BufferedLogWriter(os.path.join(temp_folder, "logfile.log"), flush_size=_pypads_flush_size,
+                                   flush_interval=_pypads_flush_interval)
+        pads.cache.run_add("std_out_writer", writer)
 
-        if hasattr(sys.stdout,'original_write'):
+        if hasattr(sys.stdout, 'original_write'):
             original_function = getattr(sys.stdout, 'original_write')
         else:
             original_function = getattr(sys.stdout, 'write')
         setattr(sys.stdout, 'original_write', original_function)
 
         def modified_function(message):
-            stdout_logger.write(message)
-            sys.stdout.original_write(message)
+            writer.write(message)
+            return original_function(message)
 
         setattr(sys.stdout, 'write', modified_function)
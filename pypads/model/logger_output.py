@@ -89,6 +89,36 @@ class FileInfo:
     file_size: int = ...
 
 
+class MetricAggregationModel(BaseModel):
+    """
+    Aggregation policy and statistics of a metric logged in aggregation mode.
+    """
+    interval: float = ...  # Seconds after which the aggregated values are flushed
+    series: Optional[str] = ...  # Statistic of the values of an interval stored as point of the series or None
+    count: int = 0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    last: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+
+class MetricSeriesModel(BaseModel):
+    """
+    Series of a vector or array valued metric stored as chunks in the folder given by the data of the metric.
+    """
+    count: int = 0  # Number of values
+    chunks: int = 0  # Number of stored chunks
+    shape: List[int] = []  # Shape of a single value
+    dtype: Optional[str] = None
+    format: str = "npz"
+
+    class Config:
+        orm_mode = True
+
+
 class MetricMetaModel(MetadataModel):
     """
     Metric Metadata object to be stored in MongoDB.
@@ -98,6 +128,8 @@ class MetricMetaModel(MetadataModel):
     category: str = "MachineLearningMetric"
     storage_type: Union[ResultType, str] = ResultType.metric
     data: Union[float, List[float], str] = ...  # float, float history or path to artifact
+    aggregation: Optional[MetricAggregationModel] = None  # Set if the values of the metric got aggregated
+    series: Optional[MetricSeriesModel] = None  # Set if the metric is a series of arrays
 
     class Config:
         orm_mode = True
@@ -127,6 +159,8 @@ class ArtifactMetaModel(MetadataModel):
     storage_type: Union[ResultType, str] = ResultType.artifact
     file_size: int = ...
     data: str = ...  # Path to the artifact
+    content_hash: Optional[str] = None  # Hash of the content if the artifact is stored in the content addressed store
+    compression: Optional[str] = None  # Compression of the stored file (gzip, zstd, lz4) or None if uncompressed
 
     class Config:
         orm_mode = True
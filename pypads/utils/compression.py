@@ -0,0 +1,123 @@
+"""
+Streaming compression of files. gzip is always available, zstd and lz4 are used if their packages are installed and
+fall back to gzip otherwise. The compression of a file is given by its extension.
+"""
+import gzip
+import io
+import os
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst", "lz4": ".lz4"}
+
+_MODULES = {"zstd": "zstandard", "lz4": "lz4.frame"}
+
+
+def is_available(compression):
+    """
+    Check if the package needed for a compression is installed.
+    :param compression: Name of the compression
+    :return: True if files can be compressed with it
+    """
+    if compression not in COMPRESSIONS:
+        return False
+    if compression not in _MODULES:
+        return True
+    try:
+        import importlib
+        importlib.import_module(_MODULES[compression])
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_compression(compression):
+    """
+    Get the compression to use for a requested one.
+    :param compression: Name of the compression, True for the default compression or None / False for none
+    :return: Name of an available compression or None
+    """
+    if not compression:
+        return None
+    if compression is True:
+        return "gzip"
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression {}. Use one of {}.".format(compression, list(COMPRESSIONS)))
+    return compression if is_available(compression) else "gzip"
+
+
+def find_compression(path):
+    """
+    Get the compression of a file by its extension.
+    :param path: Path of the file
+    :return: Name of the compression or None if the file isn't compressed
+    """
+    for compression, extension in COMPRESSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+
+def strip_compression(path):
+    """
+    Remove the compression extension from a path.
+    """
+    compression = find_compression(path)
+    return path[:-len(COMPRESSIONS[compression])] if compression else path
+
+
+def open_compressed(path, mode="rb", compression=None, seekable=False):
+    """
+    Open a possibly compressed file. Files are decompressed while they are read.
+    :param path: Path of the file
+    :param mode: "rb", "rt", "wb" or "wt"
+    :param compression: Compression of the file. Derived from the extension if not given.
+    :param seekable: The reader needs to seek in the file. Streams of zstd can't seek and are therefore read into
+    memory.
+    :return: File object
+    """
+    if compression is None:
+        compression = find_compression(path)
+    text = "t" in mode
+    writing = "w" in mode
+    if compression is None:
+        return open(path, mode) if text or "b" in mode else open(path, mode + "b")
+    if compression == "gzip":
+        raw = gzip.open(path, "wb" if writing else "rb")
+    elif compression == "zstd":
+        import zstandard
+        if writing:
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+        elif seekable:
+            with open(path, "rb") as f:
+                raw = io.BytesIO(zstandard.ZstdDecompressor().stream_reader(f).read())
+        else:
+            # Buffer the stream for readline and peek
+            raw = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    elif compression == "lz4":
+        import lz4.frame
+        raw = lz4.frame.open(path, "wb" if writing else "rb")
+    else:
+        raise ValueError("Unknown compression {}. Use one of {}.".format(compression, list(COMPRESSIONS)))
+    if text:
+        return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+    return raw
+
+
+def compress_file(path, compression="gzip", target=None, remove=True, block_size=1 << 20):
+    """
+    Compress a file in blocks.
+    :param path: Path of the file to compress
+    :param compression: Compression to use. Falls back to gzip if it isn't available.
+    :param target: Path of the compressed file. Defaults to the path extended by the extension of the compression.
+    :param remove: Remove the uncompressed file afterwards
+    :param block_size: Bytes read at once
+    :return: Path of the compressed file
+    """
+    compression = resolve_compression(compression)
+    if target is None:
+        target = path + COMPRESSIONS[compression]
+    with open(path, "rb") as f_in, open_compressed(target, "wb", compression=compression) as f_out:
+        for block in iter(lambda: f_in.read(block_size), b""):
+            f_out.write(block)
+    if remove:
+        os.remove(path)
+    return target
@@ -0,0 +1,241 @@
+"""
+Cheap fingerprints of the environment of an experiment and of the data flowing through it. Environment fingerprints
+are used to reuse the snapshots (dependencies, hardware, git state) stored by earlier runs instead of collecting and
+uploading them again for every run. Data fingerprints link calls consuming the same data. File digests address
+artifacts by their content.
+"""
+import functools
+import hashlib
+import os
+import platform
+import site
+import sys
+import uuid
+import weakref
+
+MACHINE_ID_FILES = ["/etc/machine-id", "/var/lib/dbus/machine-id"]
+
+# Data fingerprints hash SAMPLE_CHUNKS evenly spaced chunks of about CHUNK_SIZE bytes of the buffer.
+SAMPLE_CHUNKS = 256
+CHUNK_SIZE = 64
+# Buffers up to this size are always hashed completely
+FULL_HASH_LIMIT = 1 << 16
+
+
+def fingerprint(*parts):
+    """
+    Build a stable hash for the given parts.
+    :param parts: Values to include into the fingerprint
+    :return: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Cryptographic hash of the content of a file. The file is read in blocks to not load it completely into memory.
+    :param path: Path of the file
+    :param block_size: Bytes read at once
+    :return: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def site_packages():
+    """
+    Get the directories packages are installed to.
+    :return: Sorted list of existing directories
+    """
+    paths = set()
+    try:
+        paths.update(site.getsitepackages())
+    except AttributeError:
+        # Virtualenvs with an old site module don't provide getsitepackages
+        pass
+    if site.ENABLE_USER_SITE:
+        paths.add(site.getusersitepackages())
+    paths.update([p for p in sys.path if p.endswith("site-packages") or p.endswith("dist-packages")])
+    return sorted([p for p in paths if os.path.isdir(p)])
+
+
+def environment_fingerprint():
+    """
+    Fingerprint of the installed python packages. Installing or removing a package changes the modification time of
+    the site-packages directory.
+    :return: Hex digest
+    """
+    return fingerprint(sys.prefix, sys.version, [(p, _mtime(p)) for p in site_packages()])
+
+
+def git_fingerprint(repo):
+    """
+    Fingerprint of the state of a git repository. Committing, checking out or staging changes moves HEAD or rewrites
+    the index. Unstaged modifications of tracked files are covered by the modification times of the files git reports
+    as changed, which only needs a stat of the tracked files.
+    :param repo: GitPython repository
+    :return: Hex digest
+    """
+    index = os.path.join(repo.git_dir, "index")
+    try:
+        stat = os.stat(index)
+        index_stat = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        index_stat = None
+    modified = [(path, _mtime(os.path.join(repo.working_dir, path)))
+                for path in repo.git.diff_files("--name-only").splitlines()]
+    return fingerprint(repo.working_dir, repo.head.commit.hexsha, index_stat, modified)
+
+
+def machine_id():
+    """
+    Get an id of the machine. This falls back to the mac address if no machine-id file is available.
+    :return: Id of the machine
+    """
+    for path in MACHINE_ID_FILES:
+        try:
+            with open(path) as f:
+                content = f.read().strip()
+                if content:
+                    return content
+        except OSError:
+            pass
+    return str(uuid.getnode())
+
+
+def machine_fingerprint(*parts):
+    """
+    Fingerprint of the machine. Additional values describing collected information can be given.
+    :param parts: Additional values
+    :return: Hex digest
+    """
+    return fingerprint(machine_id(), tuple(platform.uname()), *parts)
+
+
+
+_hash_factory = None
+
+
+def _new_hash():
+    """
+    :return: New hash object. xxhash is used if installed, blake2 otherwise.
+    """
+    global _hash_factory
+    if _hash_factory is None:
+        try:
+            import xxhash
+            _hash_factory = getattr(xxhash, "xxh3_128", xxhash.xxh64)
+        except ImportError:
+            _hash_factory = functools.partial(hashlib.blake2b, digest_size=16)
+    return _hash_factory()
+
+
+def _update_array(digest, array, full=False):
+    import numpy as np
+    digest.update(repr((array.shape, array.dtype.str)).encode("utf-8"))
+    if array.size == 0:
+        return
+    if full or array.nbytes <= FULL_HASH_LIMIT:
+        values = array
+    else:
+        # Strided sample of chunks over the whole buffer. This doesn't copy the array even if it isn't contiguous.
+        chunk = max(CHUNK_SIZE // max(array.itemsize, 1), 1)
+        starts = np.linspace(0, array.size - chunk, num=SAMPLE_CHUNKS).astype(np.int64)
+        values = array.flat[(starts[:, None] + np.arange(chunk)).ravel()]
+    if array.dtype.hasobject:
+        # The buffer only holds pointers
+        for value in values.flat:
+            digest.update(repr(value).encode("utf-8"))
+    else:
+        digest.update(np.ascontiguousarray(values).view(np.uint8).data)
+
+
+def _update_index(digest, index, full=False):
+    import pandas as pd
+    if isinstance(index, pd.RangeIndex):
+        digest.update(repr(("range", index.start, index.stop, index.step)).encode("utf-8"))
+    else:
+        _update_array(digest, index.to_numpy(), full)
+
+
+def _fingerprint_data(obj, full=False):
+    digest = _new_hash()
+    if "numpy" in sys.modules:
+        import numpy as np
+        if isinstance(obj, np.ndarray):
+            digest.update(b"ndarray")
+            _update_array(digest, obj, full)
+            return digest.hexdigest()
+    if "pandas" in sys.modules:
+        import pandas as pd
+        if isinstance(obj, pd.DataFrame):
+            digest.update(repr(("DataFrame", obj.shape, [str(c) for c in obj.columns],
+                                [str(d) for d in obj.dtypes])).encode("utf-8"))
+            _update_index(digest, obj.index, full)
+            for _, column in obj.items():
+                _update_array(digest, column.to_numpy(), full)
+            return digest.hexdigest()
+        if isinstance(obj, pd.Series):
+            digest.update(repr(("Series", str(obj.name))).encode("utf-8"))
+            _update_index(digest, obj.index, full)
+            _update_array(digest, obj.to_numpy(), full)
+            return digest.hexdigest()
+    if "scipy.sparse" in sys.modules:
+        import scipy.sparse as sp
+        if sp.issparse(obj):
+            digest.update(repr(("sparse", obj.format, obj.shape, obj.nnz)).encode("utf-8"))
+            if obj.format not in ["csr", "csc", "bsr", "coo"]:
+                obj = obj.tocsr()
+            for attribute in ["data", "indices", "indptr", "row", "col"]:
+                if hasattr(obj, attribute):
+                    _update_array(digest, getattr(obj, attribute), full)
+            return digest.hexdigest()
+    return None
+
+
+# id of the object -> (weak reference, full, fingerprint)
+_data_fingerprints = {}
+
+
+def _forget(key, reference):
+    entry = _data_fingerprints.get(key)
+    if entry is not None and entry[0] is reference:
+        del _data_fingerprints[key]
+
+
+def data_fingerprint(obj, full=False):
+    """
+    Fingerprint of the content of numpy arrays, pandas frames and series and scipy sparse matrices. Shape, type and a
+    strided sample of the buffer are hashed. Fingerprints are cached per object as long as it is alive. Changes in
+    place after the first fingerprint are therefore not detected.
+    :param obj: Data to fingerprint
+    :param full: Hash the whole buffer instead of a sample
+    :return: Hex digest or None if the object isn't supported
+    """
+    key = id(obj)
+    entry = _data_fingerprints.get(key)
+    if entry is not None and entry[0]() is obj and entry[1] == full:
+        return entry[2]
+    value = _fingerprint_data(obj, full=full)
+    if value is not None:
+        try:
+            reference = weakref.ref(obj, lambda r, k=key: _forget(k, r))
+            _data_fingerprints[key] = (reference, full, value)
+        except TypeError:
+            # Object can't be referenced weakly
+            pass
+    return value
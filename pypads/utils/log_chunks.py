@@ -0,0 +1,118 @@
+"""
+Rotation of log files into numbered and compressed chunks. The chunks are closed while the run is still going on,
+which allows for uploading them incrementally and tailing the logs of a running (or killed) job via an index.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+from pypads.utils.compression import COMPRESSIONS, open_compressed, resolve_compression
+
+# Tag of a run pointing to the artifact path of its log index
+LOG_INDEX_TAG = "pypads.logs.index"
+
+
+def open_chunk(path, compression=None):
+    """
+    Open a compressed log chunk for reading text.
+    :param path: Path of the chunk
+    :param compression: Compression of the chunk. Derived from the file extension if not given.
+    :return: Text stream
+    """
+    return open_compressed(path, "rt", compression=compression)
+
+
+def tail_chunks(paths, lines=100):
+    """
+    Get the last lines of a sequence of log chunks.
+    :param paths: Paths of the chunks in the order they were written
+    :param lines: Number of lines to return
+    :return: List of lines
+    """
+    tail = []
+    for path in reversed(paths):
+        with open_chunk(path) as f:
+            tail = f.read().splitlines() + tail
+        if len(tail) >= lines:
+            break
+    return tail[-lines:] if lines > 0 else []
+
+
+class LogChunker:
+    """
+    Rotation and compression functions for a loguru file sink. A chunk is closed if it exceeds chunk_size bytes or is
+    older than chunk_interval seconds. Closed chunks are numbered, compressed and handed to the on_chunk callback
+    together with the updated index. Loguru calls both functions on the thread writing the sink, which is a background
+    thread if the sink is enqueued.
+    """
+
+    def __init__(self, folder, name, on_chunk=None, chunk_size=10 * 1024 * 1024, chunk_interval=300.0,
+                 compression="gzip"):
+        compression = resolve_compression(compression)
+        self.folder = folder
+        self.name = name
+        self.on_chunk = on_chunk
+        self.chunk_size = chunk_size
+        self.chunk_interval = chunk_interval
+        self.compression = compression
+        self.chunks = []
+        self._started = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.folder, self.name + ".index.json")
+
+    def rotation(self, message, file):
+        now = time.time()
+        if self._started is None:
+            self._started = now
+        position = file.tell()
+        if position == 0:
+            return False
+        return position + len(message) > self.chunk_size or now - self._started >= self.chunk_interval
+
+    def compression_function(self, path):
+        """
+        Compress a closed log file into the next chunk, update the index and pass both to the callback.
+        :param path: Path of the closed log file
+        """
+        with self._lock:
+            self._started = None
+            number = len(self.chunks)
+            chunk_path = os.path.join(self.folder, "{}.{:05d}.log{}".format(self.name, number,
+                                                                             COMPRESSIONS[self.compression]))
+            lines = 0
+            with open(path, "rb") as f_in, open_compressed(chunk_path, "wb", compression=self.compression) as f_out:
+                for block in iter(lambda: f_in.read(1 << 20), b""):
+                    lines += block.count(b"\n")
+                    f_out.write(block)
+            chunk = {"chunk": number, "file": os.path.basename(chunk_path), "size": os.path.getsize(path),
+                     "compressed_size": os.path.getsize(chunk_path), "lines": lines, "closed": time.time()}
+            os.remove(path)
+            self.chunks.append(chunk)
+            self._write_index()
+        if self.on_chunk is not None:
+            self.on_chunk(chunk_path, self.index_path)
+
+    def close(self, path):
+        """
+        Compress the last log file. Loguru doesn't call the compression function when stopping a rotated sink.
+        :param path: Path of the log file of the sink
+        """
+        if os.path.isfile(path):
+            if os.path.getsize(path) > 0:
+                self.compression_function(path)
+            else:
+                os.remove(path)
+
+    def index(self):
+        return {"name": self.name, "compression": self.compression, "chunks": list(self.chunks)}
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index(), f)
+        shutil.move(tmp_path, self.index_path)
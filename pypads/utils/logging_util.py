@@ -12,6 +12,9 @@ from pydantic import BaseModel
 from pydantic.json import ENCODERS_BY_TYPE
 
 from pypads import logger
+from pypads.app.misc.profiler import profile_span
+from pypads.utils.compression import open_compressed, compress_file, find_compression, strip_compression, \
+    resolve_compression
 from pypads.utils.util import dict_merge
 
 
@@ -158,11 +161,15 @@ class FileFormats(Enum):
     text = 'txt'
     yaml = 'yaml'
     json = 'json'
+    numpy = 'npy'
+    numpy_archive = 'npz'
+    parquet = 'parquet'
+    feather = 'feather'
     unknown = ''
 
 
 def find_file_format(file_name):
-    name_split = file_name.rsplit(".", 1)
+    name_split = strip_compression(file_name).rsplit(".", 1)
     if len(name_split) == 2:
         enum = get_by_value_in_enum(name_split[1], FileFormats)
         if enum:
@@ -170,6 +177,39 @@ def find_file_format(file_name):
     return FileFormats.unknown
 
 
+def find_write_format(obj, default=FileFormats.pickle):
+    """
+    Get a format storing the object without pickling it. Arrays are stored as npy, dicts of arrays with string keys
+    as npz and data frames as parquet (or feather).
+    :param obj: Object to store
+    :param default: Format to use for other objects
+    :return: Format to store the object in
+    """
+    import sys
+    if "numpy" in sys.modules:
+        import numpy as np
+        # Subclasses like masked arrays or matrices would lose their type
+        if type(obj) is np.ndarray and not obj.dtype.hasobject:
+            return FileFormats.numpy
+        # Keys of an archive are read back as strings
+        if isinstance(obj, dict) and len(obj) > 0 and all(
+                isinstance(k, str) and type(v) is np.ndarray and not v.dtype.hasobject for k, v in obj.items()):
+            return FileFormats.numpy_archive
+    if "pandas" in sys.modules:
+        import pandas as pd
+        if isinstance(obj, pd.DataFrame) and _has_pyarrow():
+            return FileFormats.parquet
+    return default
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow
+        return True
+    except ImportError:
+        return False
+
+
 def write_unknown(p, o):
     with open(p, "w+") as fd:
         fd.write(str(o))
@@ -220,14 +260,50 @@ def write_json(p, o):
         return write_text(p, o)
 
 
+def write_numpy(p, o):
+    import numpy as np
+    with open(p + ".npy", "wb+") as fd:
+        np.save(fd, o, allow_pickle=False)
+        return fd.name
+
+
+def write_numpy_archive(p, o):
+    import numpy as np
+    with open(p + ".npz", "wb+") as fd:
+        if isinstance(o, dict):
+            np.savez(fd, **{str(k): v for k, v in o.items()})
+        else:
+            np.savez(fd, o)
+        return fd.name
+
+
+def write_parquet(p, o):
+    try:
+        o.to_parquet(p + ".parquet")
+        return p + ".parquet"
+    except Exception as e:
+        logger.warning("Couldn't write data frame as parquet. Trying to pickle it instead. " + str(e))
+        return write_pickle(p, o)
+
+
+def write_feather(p, o):
+    try:
+        # Feather only supports a default index
+        o.reset_index().to_feather(p + ".feather")
+        return p + ".feather"
+    except Exception as e:
+        logger.warning("Couldn't write data frame as feather. Trying to pickle it instead. " + str(e))
+        return write_pickle(p, o)
+
+
 def read_text(p):
-    with open(p, "r") as fd:
+    with open_compressed(p, "rt") as fd:
         return fd.read()
 
 
 def read_pickle(p):
     try:
-        with open(p, "rb") as fd:
+        with open_compressed(p, "rb") as fd:
             return pickle.load(fd)
     except FileNotFoundError:
         return None
@@ -237,7 +313,7 @@ def read_pickle(p):
 
 def read_yaml(p):
     try:
-        with open(p, "r") as fd:
+        with open_compressed(p, "rt") as fd:
             return yaml.full_load(fd)
     except FileNotFoundError:
         return None
@@ -248,7 +324,7 @@ def read_yaml(p):
 
 def read_json(p):
     try:
-        with open(p, "r") as fd:
+        with open_compressed(p, "rt") as fd:
             return json.load(fd)
     except FileNotFoundError:
         return None
@@ -257,27 +333,99 @@ def read_json(p):
         return read_text(p)
 
 
+def read_numpy(p, mmap_mode=None):
+    import numpy as np
+    try:
+        if mmap_mode and find_compression(p) is None:
+            return np.load(p, mmap_mode=mmap_mode, allow_pickle=False)
+        with open_compressed(p, "rb", seekable=True) as fd:
+            return np.load(fd, allow_pickle=False)
+    except FileNotFoundError:
+        return None
+
+
+def read_numpy_archive(p, mmap_mode=None):
+    import numpy as np
+    try:
+        if mmap_mode and find_compression(p) is None:
+            # The archive is read lazily array by array
+            return np.load(p, allow_pickle=False)
+        with open_compressed(p, "rb", seekable=True) as fd:
+            with np.load(fd, allow_pickle=False) as archive:
+                return dict(archive)
+    except FileNotFoundError:
+        return None
+
+
+def read_parquet(p):
+    import pandas as pd
+    try:
+        return pd.read_parquet(p)
+    except FileNotFoundError:
+        return None
+
+
+def read_feather(p):
+    import pandas as pd
+    try:
+        return pd.read_feather(p, memory_map=find_compression(p) is None)
+    except FileNotFoundError:
+        return None
+
+
 writers = {
     FileFormats.pickle: write_pickle,
     FileFormats.text: write_text,
     FileFormats.yaml: write_yaml,
-    FileFormats.json: write_json
+    FileFormats.json: write_json,
+    FileFormats.numpy: write_numpy,
+    FileFormats.numpy_archive: write_numpy_archive,
+    FileFormats.parquet: write_parquet,
+    FileFormats.feather: write_feather
 }
 
 readers = {
     FileFormats.pickle: read_pickle,
     FileFormats.text: read_text,
     FileFormats.yaml: read_yaml,
-    FileFormats.json: read_json
+    FileFormats.json: read_json,
+    FileFormats.numpy: read_numpy,
+    FileFormats.numpy_archive: read_numpy_archive,
+    FileFormats.parquet: read_parquet,
+    FileFormats.feather: read_feather
 }
 
+# Readers supporting memory mapped files
+mmap_readers = {FileFormats.numpy, FileFormats.numpy_archive}
+
+
+def artifact_compression(write_format, compression=None):
+    """
+    Get the compression of an artifact written in the given format.
+    :param write_format: Format the artifact is written in
+    :param compression: Compression requested by the caller. Overrides the configuration if given.
+    :return: Tuple of the compression (or None) and the size threshold in bytes below which it is skipped
+    """
+    from pypads.app.pypads import get_current_pads
+    from pypads.variables import artifact_compression as compression_key, artifact_compression_threshold
+    config = get_current_pads().config
+    if compression is None:
+        compression = config.get(compression_key, None)
+        if isinstance(compression, dict):
+            name = write_format.name if isinstance(write_format, FileFormats) else str(write_format)
+            compression = compression.get(name, None)
+    return resolve_compression(compression), config.get(artifact_compression_threshold, 0) or 0
+
 
-def store_tmp_artifact(file_name, obj, write_format: FileFormats):
+def store_tmp_artifact(file_name, obj, write_format: FileFormats, compression=None, compression_threshold=0):
     """
     Temporarily stores artifact to disk to enable upload etc.
     :param file_name: Name for the file
     :param obj: Object in memory to store to disk
-    :param write_format: Format to store the object in
+    :param write_format: Format to store the object in. For None or pickle a format not pickling the object is chosen
+    by its type if it stores the object without loss.
+    :param compression: Compression to apply to the written file
+    :param compression_threshold: Files smaller than this number of bytes are not compressed
     :return: Path to the temporarily stored artifact
     """
     from pypads.app.pypads import get_current_pads
@@ -290,7 +438,9 @@ def store_tmp_artifact(file_name, obj, write_format: FileFormats):
             if os.path.isdir(get_temp_folder()):
                 shutil.rmtree(get_temp_folder())
 
-    pads.api.register_teardown_utility("tmp_cleanup", tmp_cleanup)
+    # Run after the delayed loggers which still upload files of the temporary folder
+    import sys
+    pads.api.register_teardown_utility("tmp_cleanup", tmp_cleanup, order=sys.maxsize - 1)
 
     base_path = get_temp_folder()
     path = os.path.join(base_path, file_name)
@@ -300,26 +450,49 @@ def store_tmp_artifact(file_name, obj, write_format: FileFormats):
         os.makedirs(os.path.dirname(path))
 
     # Write to disk
+    if write_format is None or write_format == FileFormats.pickle or write_format == FileFormats.pickle.name:
+        write_format = find_write_format(obj)
     if isinstance(write_format, str):
         if write_format in FileFormats.__members__:
             write_format = FileFormats[write_format]
         else:
             logger.warning(
                 "Configured write format " + write_format + " not directly supported! Writing as generic file type.")
-            return write_unknown(f"{path}.{write_format}", obj)
+            with profile_span("serialization", "write_unknown"):
+                path = write_unknown(f"{path}.{write_format}", obj)
+            return _compress_tmp_artifact(path, compression, compression_threshold)
+
+    with profile_span("serialization", writers[write_format].__name__):
+        path = writers[write_format](path, obj)
+    return _compress_tmp_artifact(path, compression, compression_threshold)
+
 
-    return writers[write_format](path, obj)
+def _compress_tmp_artifact(path, compression, threshold):
+    if compression is None or os.path.getsize(path) < threshold:
+        return path
+    with profile_span("serialization", "compress", detail=compression):
+        return compress_file(path, compression)
 
 
-def read_artifact(path, read_format: FileFormats = None):
+def read_artifact(path, read_format: FileFormats = None, mmap_mode=None):
+    """
+    Read an artifact from disk. Compressed artifacts are decompressed transparently.
+    :param path: Path of the artifact
+    :param read_format: Format of the artifact. Derived from the file extension if not given.
+    :param mmap_mode: Memory map uncompressed numpy arrays instead of loading them (e.g. "r")
+    :return: Content of the artifact
+    """
     if read_format is None:
-        file_extension = path.split('.')[-1]
+        file_extension = strip_compression(path).split('.')[-1]
         read_format = get_by_value_in_enum(file_extension, FileFormats)
         if not read_format:
             logger.warning("Configured read format " + read_format + " not supported! ")
             return
     try:
-        data = readers[read_format](path)
+        if mmap_mode and read_format in mmap_readers:
+            data = readers[read_format](path, mmap_mode=mmap_mode)
+        else:
+            data = readers[read_format](path)
     except Exception as e:
         data = None
     return data
@@ -0,0 +1,331 @@
+"""
+Low-cost probes for the resource usage of the machine, the tracked process and the container (cgroup) it runs in. On
+linux the values are read directly from /proc and the cgroup filesystem. Elsewhere psutil is used.
+"""
+import os
+import sys
+import time
+
+# Limits at or above this value are the "unlimited" defaults of cgroup v1
+UNLIMITED = 2 ** 60
+
+NAN = float("nan")
+
+PROCESS_COLUMNS = ["cpu", "rss", "read_bytes", "write_bytes"]
+CGROUP_COLUMNS = ["memory", "memory_percent", "cpu_time", "nr_periods", "nr_throttled", "throttled_time"]
+USAGE_FIELDS = ["cpu_user", "cpu_system", "max_rss", "voluntary_switches", "involuntary_switches", "read_bytes",
+                "write_bytes"]
+
+
+class ResourceProbe:
+    """
+    Probe reading the resource usage via psutil. This is used on systems not providing a /proc filesystem.
+    """
+    name = "psutil"
+
+    def __init__(self):
+        self._last_process = None
+
+    def cpu_count(self):
+        import psutil
+        return psutil.cpu_count(logical=True)
+
+    def cpu_usage(self):
+        """
+        :return: Usage of each core and the total usage in percent since the last call
+        """
+        import psutil
+        cores = psutil.cpu_percent(percpu=True)
+        return cores + [sum(cores) / len(cores) if len(cores) > 0 else NAN]
+
+    def memory_usage(self):
+        """
+        :return: Used ram and swap in percent
+        """
+        import psutil
+        return [psutil.virtual_memory().percent, psutil.swap_memory().percent]
+
+    def process_times(self):
+        """
+        :return: User and system cpu time of the process in seconds
+        """
+        import psutil
+        times = psutil.Process().cpu_times()
+        return times.user, times.system
+
+    def process_memory(self):
+        """
+        :return: Resident set size and its peak in bytes. The peak is nan if not available.
+        """
+        import psutil
+        info = psutil.Process().memory_info()
+        return info.rss, getattr(info, "peak_wset", NAN)
+
+    def process_io(self):
+        """
+        :return: Bytes read and written by the process. Nan if not available.
+        """
+        import psutil
+        try:
+            io = psutil.Process().io_counters()
+            return io.read_bytes, io.write_bytes
+        except (AttributeError, psutil.Error):
+            return NAN, NAN
+
+    def cgroup(self):
+        """
+        :return: Version, path and limits of the cgroup of the process or None if it doesn't run in a cgroup
+        """
+        return None
+
+    def cgroup_usage(self):
+        """
+        :return: Dict of memory usage, cpu time and throttling counters of the cgroup or None
+        """
+        return None
+
+    def usage(self):
+        """
+        Cheap snapshot of the resources used by the process so far. Taking it before and after a call gives the
+        resources used by the call.
+        :return: Dict of USAGE_FIELDS. The cpu times are given in seconds, max_rss in bytes.
+        """
+        read_bytes, write_bytes = self.process_io()
+        try:
+            import resource
+        except ImportError:
+            import psutil
+            process = psutil.Process()
+            times = process.cpu_times()
+            switches = process.num_ctx_switches()
+            return dict(cpu_user=times.user, cpu_system=times.system, max_rss=self.process_memory()[1],
+                        voluntary_switches=switches.voluntary, involuntary_switches=switches.involuntary,
+                        read_bytes=read_bytes, write_bytes=write_bytes)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+        return dict(cpu_user=usage.ru_utime, cpu_system=usage.ru_stime,
+                    max_rss=usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024,
+                    voluntary_switches=usage.ru_nvcsw, involuntary_switches=usage.ru_nivcsw,
+                    read_bytes=read_bytes, write_bytes=write_bytes)
+
+    def process_sample(self):
+        """
+        :return: Values of the process for PROCESS_COLUMNS. The cpu usage is given in percent of one core since the
+        last sample.
+        """
+        now = time.monotonic()
+        cpu = sum(self.process_times())
+        last, self._last_process = self._last_process, (now, cpu)
+        cpu_percent = (cpu - last[1]) / (now - last[0]) * 100 if last is not None and now > last[0] else NAN
+        return [cpu_percent, self.process_memory()[0], *self.process_io()]
+
+    def cgroup_sample(self):
+        """
+        :return: Values of the cgroup for CGROUP_COLUMNS
+        """
+        usage = self.cgroup_usage() or {}
+        limits = self.cgroup() or {}
+        memory = usage.get("memory", NAN)
+        memory_limit = limits.get("memory_limit", None)
+        return [memory, memory / memory_limit * 100 if memory_limit else NAN,
+                *[usage.get(c, NAN) for c in CGROUP_COLUMNS[2:]]]
+
+
+class LinuxResourceProbe(ResourceProbe):
+    """
+    Probe reading /proc and the cgroup v1 or v2 files directly. A root can be given to read a different tree.
+    """
+    name = "procfs"
+
+    def __init__(self, root="/"):
+        super().__init__()
+        self._root = root
+        try:
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        except (AttributeError, ValueError, OSError):
+            self._clock_ticks = 100
+        self._cgroup = self._find_cgroup()
+        self._last_cpu = self._read_cpu_times()
+
+    def _path(self, *parts):
+        return os.path.join(self._root, *parts)
+
+    def _read(self, *parts):
+        with open(self._path(*parts)) as f:
+            return f.read()
+
+    def _read_optional(self, *parts):
+        try:
+            return self._read(*parts).strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _parse_keyed(content, sep=None):
+        values = {}
+        for line in content.splitlines():
+            entry = line.split(sep, 1)
+            if len(entry) == 2:
+                values[entry[0].strip()] = entry[1].strip()
+        return values
+
+    # ------------------------------ Machine ------------------------------
+
+    def _read_cpu_times(self):
+        cpus = []
+        for line in self._read("proc", "stat").splitlines():
+            if not line.startswith("cpu"):
+                break
+            name, *times = line.split()
+            times = [int(t) for t in times]
+            # idle and iowait
+            idle = times[3] + (times[4] if len(times) > 4 else 0)
+            # guest time is already accounted in user time
+            cpus.append((name, sum(times[:8]), idle))
+        return cpus
+
+    def cpu_count(self):
+        return len([c for c in self._last_cpu if c[0] != "cpu"])
+
+    def cpu_usage(self):
+        current = self._read_cpu_times()
+        last, self._last_cpu = {c[0]: c for c in self._last_cpu}, current
+        usage = {}
+        for name, total, idle in current:
+            if name not in last or total <= last[name][1]:
+                usage[name] = 0.
+            else:
+                usage[name] = (1 - (idle - last[name][2]) / (total - last[name][1])) * 100
+        return [usage[c[0]] for c in current if c[0] != "cpu"] + [usage.get("cpu", NAN)]
+
+    def memory_usage(self):
+        info = {k: int(v.split()[0]) for k, v in self._parse_keyed(self._read("proc", "meminfo"), ":").items()}
+        total = info.get("MemTotal", 0)
+        available = info.get("MemAvailable", info.get("MemFree", 0) + info.get("Buffers", 0) + info.get("Cached", 0))
+        swap_total = info.get("SwapTotal", 0)
+        return [(total - available) / total * 100 if total else NAN,
+                (swap_total - info.get("SwapFree", 0)) / swap_total * 100 if swap_total else 0.]
+
+    # ------------------------------ Process ------------------------------
+
+    def process_times(self):
+        stat = self._read("proc", "self", "stat")
+        # The name of the executable is in brackets and can contain spaces
+        fields = stat[stat.rindex(")") + 2:].split()
+        return int(fields[11]) / self._clock_ticks, int(fields[12]) / self._clock_ticks
+
+    def process_memory(self):
+        status = self._parse_keyed(self._read("proc", "self", "status"), ":")
+
+        def kb(key):
+            return int(status[key].split()[0]) * 1024 if key in status else NAN
+
+        return kb("VmRSS"), kb("VmHWM")
+
+    def process_io(self):
+        content = self._read_optional("proc", "self", "io")
+        if content is None:
+            # Reading io needs the same permissions as ptrace
+            return NAN, NAN
+        io = self._parse_keyed(content, ":")
+        return int(io.get("read_bytes", 0)), int(io.get("write_bytes", 0))
+
+    # ------------------------------ Cgroup ------------------------------
+
+    def _find_cgroup(self):
+        content = self._read_optional("proc", "self", "cgroup")
+        if content is None:
+            return None
+        paths = {}
+        for line in content.splitlines():
+            entry = line.split(":", 2)
+            if len(entry) == 3:
+                for controller in entry[1].split(","):
+                    paths[controller] = entry[2]
+
+        if "" in paths and os.path.exists(self._path("sys", "fs", "cgroup", "cgroup.controllers")):
+            directory = self._cgroup_dir(self._path("sys", "fs", "cgroup"), paths[""])
+            return {"version": 2, "path": paths[""], "cpu": directory, "memory": directory}
+
+        cgroup = {"version": 1, "path": paths.get("memory", paths.get("cpu", "/"))}
+        for controller, mounts in [("cpu", ["cpu", "cpu,cpuacct", "cpuacct,cpu"]), ("cpuacct", ["cpuacct"]),
+                                   ("memory", ["memory"])]:
+            for mount in mounts:
+                if controller in paths and os.path.isdir(self._path("sys", "fs", "cgroup", mount)):
+                    cgroup[controller] = self._cgroup_dir(self._path("sys", "fs", "cgroup", mount), paths[controller])
+                    break
+        return cgroup if "cpu" in cgroup or "memory" in cgroup else None
+
+    @staticmethod
+    def _cgroup_dir(mount, path):
+        # In a cgroup namespace (e.g. docker) the cgroup of the process is mounted as root
+        if path.strip("/") == "":
+            return mount
+        directory = os.path.join(mount, path.strip("/"))
+        return directory if os.path.isdir(directory) else mount
+
+    def _cgroup_file(self, controller, name):
+        if self._cgroup is None or controller not in self._cgroup:
+            return None
+        try:
+            with open(os.path.join(self._cgroup[controller], name)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _cgroup_int(self, controller, name):
+        value = self._cgroup_file(controller, name)
+        if value is None or value == "max":
+            return None
+        value = int(value)
+        return value if 0 <= value < UNLIMITED else None
+
+    def cgroup(self):
+        if self._cgroup is None:
+            return None
+        if self._cgroup["version"] == 2:
+            cpu_limit = None
+            cpu_max = self._cgroup_file("cpu", "cpu.max")
+            if cpu_max is not None and not cpu_max.startswith("max"):
+                quota, period = cpu_max.split()
+                cpu_limit = int(quota) / int(period)
+            memory_limit = self._cgroup_int("memory", "memory.max")
+        else:
+            quota = self._cgroup_int("cpu", "cpu.cfs_quota_us")
+            period = self._cgroup_int("cpu", "cpu.cfs_period_us")
+            cpu_limit = quota / period if quota is not None and period else None
+            memory_limit = self._cgroup_int("memory", "memory.limit_in_bytes")
+        return {"version": self._cgroup["version"], "path": self._cgroup["path"], "cpu_limit": cpu_limit,
+                "memory_limit": memory_limit}
+
+    def cgroup_usage(self):
+        if self._cgroup is None:
+            return None
+        stat = self._parse_keyed(self._cgroup_file("cpu", "cpu.stat") or "")
+        usage = {"nr_periods": int(stat.get("nr_periods", 0)), "nr_throttled": int(stat.get("nr_throttled", 0))}
+        if self._cgroup["version"] == 2:
+            usage["memory"] = self._cgroup_int("memory", "memory.current")
+            usage["cpu_time"] = int(stat["usage_usec"]) / 1e6 if "usage_usec" in stat else None
+            usage["throttled_time"] = int(stat.get("throttled_usec", 0)) / 1e6
+        else:
+            usage["memory"] = self._cgroup_int("memory", "memory.usage_in_bytes")
+            cpu_time = self._cgroup_int("cpuacct", "cpuacct.usage")
+            if cpu_time is None:
+                cpu_time = self._cgroup_int("cpu", "cpuacct.usage")
+            usage["cpu_time"] = cpu_time / 1e9 if cpu_time is not None else None
+            usage["throttled_time"] = int(stat.get("throttled_time", 0)) / 1e9
+        return {k: v if v is not None else NAN for k, v in usage.items()}
+
+
+def get_resource_probe(root="/"):
+    """
+    Get the probe fitting the current system.
+    :param root: Root of the filesystem to read /proc and /sys/fs/cgroup from
+    :return: LinuxResourceProbe if /proc is available otherwise the psutil based ResourceProbe
+    """
+    if sys.platform.startswith("linux") and os.path.exists(os.path.join(root, "proc", "self", "stat")):
+        try:
+            return LinuxResourceProbe(root=root)
+        except (OSError, ValueError, IndexError):
+            pass
+    return ResourceProbe()
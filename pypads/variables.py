@@ -22,6 +22,22 @@ recursion_identity = "recursion_identity"
 recursion_depth = "recursion_depth"
 log_on_failure = "log_on_failure"
 include_default_mappings = "include_default_mappings"
+overhead_budget = "overhead_budget"
+profile = "profile"
+parallel_setups = "parallel_setups"
+setup_timeout = "setup_timeout"
+snapshot_cache = "snapshot_cache"
+hardware_sampler = "hardware_sampler"
+content_store = "content_store"
+artifact_compression = "artifact_compression"
+artifact_compression_threshold = "artifact_compression_threshold"
+artifact_cache = "artifact_cache"
+artifact_cache_verify = "artifact_cache_verify"
+offline = "offline"
+write_ahead_log = "write_ahead_log"
+backend_resilience = "backend_resilience"
+metric_aggregation = "metric_aggregation"
+metric_series_chunk_size = "metric_series_chunk_size"
 
 # TAGS
 # Tag name to save the config to in mlflow context.
@@ -117,4 +117,23 @@ class PypadsAPILogging(BaseTest):
         pads = get_current_pads()
         assert pads.cache.run_exists(id(logger))
         assert pads.cache.run_get(id(logger)) == 16
-        # !-------------------------- asserts ---------------------------
\ No newline at end of file
+        # !-------------------------- asserts ---------------------------
+
+    def test_api_artifact_writer(self):
+        """
+        This example will stream an artifact into a file logged after the with block.
+        :return:
+        """
+        # --------------------------- setup of the tracking ---------------------------
+        # Activate tracking of pypads
+        from pypads.app.base import PyPads
+        tracker = PyPads(uri=TEST_FOLDER, config=config, hooks=hooks, events=events, autostart=True)
+
+        import pickle
+        with tracker.api.artifact_writer("models/model", "pickle") as f:
+            pickle.dump({"weights": list(range(100))}, f)
+
+        # --------------------------- asserts ---------------------------
+        run_id = tracker.api.active_run().info.run_id
+        assert tracker.results.load_artifact("models/model.pickle", run_id=run_id) == {"weights": list(range(100))}
+        # !-------------------------- asserts ---------------------------
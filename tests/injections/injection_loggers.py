@@ -253,3 +253,47 @@ class PypadsInjectionLoggers(BaseTest):
         self.assertEqual(i, 1)
         # TODO add asserts
         # !-------------------------- asserts ---------------------------
+
+    def test_memory_logger(self):
+        """
+        This example will check if only the outermost of nested hooked calls traces the memory allocations.
+        :return:
+        """
+        # --------------------------- setup of the tracking ---------------------------
+        import tracemalloc
+        from pypads.injections.loggers.memory import MemoryILF
+
+        class TestLogger(MemoryILF):
+            """ Remember the tracing state of each call. This is a utility logger for testing purposes. """
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.traced = []
+
+            def __pre__(self, ctx, *args, **kwargs):
+                state = super().__pre__(ctx, *args, **kwargs)
+                self.traced.append(state is not None and tracemalloc.is_tracing())
+                return state
+
+        test = TestLogger()
+
+        # Activate tracking of pypads
+        from pypads.app.base import PyPads
+        tracker = PyPads(uri=TEST_FOLDER, config=config, hooks={"memory": {"on": ["pypads_log"]}},
+                         events={"memory": test}, setup_fns={}, autostart=True)
+
+        def inner():
+            return [bytearray(1000) for _ in range(1000)]
+
+        inner = tracker.api.track(inner, anchors=["pypads_log"])
+
+        def outer():
+            return len(inner())
+
+        outer = tracker.api.track(outer, anchors=["pypads_log"])
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(outer(), 1000)
+        self.assertEqual(test.traced, [True, False])
+        self.assertFalse(tracemalloc.is_tracing())
+        # !-------------------------- asserts ---------------------------
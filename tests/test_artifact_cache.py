@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from pypads.app.misc.artifact_cache import ArtifactCache
+
+
+class ArtifactCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.downloads = []
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def _fetch(self, content):
+        def fetch(folder):
+            self.downloads.append(content)
+            path = os.path.join(folder, "file.txt")
+            with open(path, "w") as f:
+                f.write(content)
+            return path
+
+        return fetch
+
+    def test_read_through(self):
+        """
+        This example will check if artifacts are downloaded once and downloaded again if the cached file got corrupted.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        cache = ArtifactCache(os.path.join(self.folder, "cache"))
+        first = cache.download("run", "a/file.txt", 5, self._fetch("hello"))
+        second = cache.download("run", "a/file.txt", 5, self._fetch("hello"))
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.downloads), 1)
+        self.assertIsNone(cache.get("other_run", "a/file.txt", 5))
+        self.assertIsNone(cache.get("run", "a/file.txt", 6))
+
+        with open(first, "w") as f:
+            f.write("hullo")
+        self.assertIsNone(cache.get("run", "a/file.txt", 5))
+        path = cache.download("run", "a/file.txt", 5, self._fetch("hello"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "hello")
+        self.assertEqual(len(self.downloads), 2)
+        # !-------------------------- asserts ---------------------------
+
+    def test_eviction(self):
+        """
+        This example will check if the least recently used artifacts are evicted.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        cache = ArtifactCache(os.path.join(self.folder, "cache"), max_bytes=2500)
+        for i in range(2):
+            cache.download("run", "{}.txt".format(i), 1000, self._fetch("x" * 1000))
+            time.sleep(0.01)
+        # Accessing an entry makes it the most recently used one
+        cache.get("run", "0.txt", 1000)
+        time.sleep(0.01)
+        cache.download("run", "2.txt", 1000, self._fetch("x" * 1000))
+
+        # --------------------------- asserts ---------------------------
+        self.assertLessEqual(cache.size(), 2500)
+        self.assertIsNotNone(cache.get("run", "0.txt", 1000))
+        self.assertIsNotNone(cache.get("run", "2.txt", 1000))
+        self.assertIsNone(cache.get("run", "1.txt", 1000))
+        # !-------------------------- asserts ---------------------------
+
+    def test_verify(self):
+        """
+        This example will check if reads only compare the size and modification time of a cached file if the checksum
+        isn't to be validated.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        cache = ArtifactCache(os.path.join(self.folder, "cache"), verify=False)
+        path = cache.download("run", "a/file.txt", 5, self._fetch("hello"))
+        stat = os.stat(path)
+        with open(path, "w") as f:
+            f.write("hullo")
+        # Keep the modification time of the changed file
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(cache.get("run", "a/file.txt", 5), path)
+        self.assertIsNone(cache.get("run", "a/file.txt", 5, verify=True))
+        self.assertEqual(len(self.downloads), 1)
+        # !-------------------------- asserts ---------------------------
+
+    def test_known_size(self):
+        """
+        This example will check if the remote folder isn't listed for artifacts of which the size is known.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import mlflow
+        from mlflow.entities import FileInfo
+        from pypads.app.backends.mlflow import RemoteMlFlowBackend
+        listed = []
+        fetch = self._fetch("hello")
+
+        class Client:
+
+            def list_artifacts(self, run_id, path=None):
+                listed.append(path)
+                return [FileInfo("a/file.txt", False, 5)]
+
+            def download_artifacts(self, run_id, path, dst_path=None):
+                return fetch(dst_path)
+
+        class Backend(RemoteMlFlowBackend):
+
+            @property
+            def mlf(self):
+                return Client()
+
+        pads = SimpleNamespace(config={}, object_repository=None,
+                               artifact_cache=ArtifactCache(os.path.join(self.folder, "cache")))
+        tracking_uri = mlflow.get_tracking_uri()
+        try:
+            backend = Backend(os.path.join(self.folder, "mlruns"), pads)
+        finally:
+            mlflow.set_tracking_uri(tracking_uri)
+        first = backend.download_tmp_artifacts("run", "a/file.txt", file_size=5)
+        second = backend.download_tmp_artifacts("run", "a/file.txt")
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.downloads), 1)
+        self.assertEqual(listed, ["a"])
+        # !-------------------------- asserts ---------------------------
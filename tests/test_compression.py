@@ -0,0 +1,61 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from pypads.utils.compression import compress_file, resolve_compression, find_compression, is_available, \
+    strip_compression
+from pypads.utils.logging_util import read_artifact, find_file_format, FileFormats
+
+
+class CompressionTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_resolve(self):
+        """
+        This example will check if unavailable compressions fall back to gzip.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        self.assertIsNone(resolve_compression(None))
+        self.assertEqual(resolve_compression(True), "gzip")
+        self.assertEqual(resolve_compression("zstd"), "zstd" if is_available("zstd") else "gzip")
+        self.assertEqual(resolve_compression("lz4"), "lz4" if is_available("lz4") else "gzip")
+        self.assertRaises(ValueError, resolve_compression, "rar")
+        self.assertEqual(find_compression("a/b.pickle.gz"), "gzip")
+        self.assertIsNone(find_compression("a/b.pickle"))
+        self.assertEqual(strip_compression("a/b.json.zst"), "a/b.json")
+        self.assertEqual(find_file_format("b.pickle.gz"), FileFormats.pickle)
+        # !-------------------------- asserts ---------------------------
+
+    def test_read_compressed(self):
+        """
+        This example will check if compressed artifacts are read transparently.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        content = {"values": list(range(1000))}
+        json_path = os.path.join(self.folder, "content.json")
+        with open(json_path, "w") as f:
+            json.dump(content, f)
+        pickle_path = os.path.join(self.folder, "content.pickle")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(content, f)
+        size = os.path.getsize(json_path)
+        json_path = compress_file(json_path, "gzip")
+        pickle_path = compress_file(pickle_path, "zstd")
+
+        # --------------------------- asserts ---------------------------
+        self.assertTrue(json_path.endswith(".json.gz"))
+        self.assertLess(os.path.getsize(json_path), size)
+        self.assertFalse(os.path.exists(os.path.join(self.folder, "content.json")))
+        self.assertEqual(read_artifact(json_path), content)
+        self.assertEqual(read_artifact(pickle_path), content)
+        # !-------------------------- asserts ---------------------------
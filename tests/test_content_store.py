@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+class ContentStoreTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        from pypads.app.pypads import current_pads
+        if current_pads:
+            current_pads.deactivate_tracking(run_atexits=True, reload_modules=False)
+        shutil.rmtree(self.folder)
+
+    def test_collect_garbage(self):
+        """
+        This example will check if the blobs of deleted runs are kept until the runs are deleted permanently.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from pypads.app.base import PyPads
+        tracker = PyPads(uri=os.path.join(self.folder, "mlruns"), folder=os.path.join(self.folder, "pads"),
+                         config={"mongo_db": False, "content_store": True}, setup_fns={}, autostart=True)
+        tracker.api.log_mem_artifact("data", "content of the deleted run")
+        run_id = tracker.api.active_run().info.run_id
+        tracker.api.end_run()
+        tracker.backend.mlf.delete_run(run_id)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(tracker.object_repository.collect_garbage(dry_run=True), [])
+        tracker.backend.mlf.restore_run(run_id)
+        self.assertEqual(tracker.results.load_artifact("data.txt", run_id=run_id), "content of the deleted run")
+        # !-------------------------- asserts ---------------------------
+
+    def test_unavailable_backend(self):
+        """
+        This example will check if storing blobs and their references is retried and spooled while the backend is
+        unavailable.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from mlflow.tracking import MlflowClient
+        from pypads.app.base import PyPads
+        from pypads.app.misc.wal import get_run_wal, recover_run
+        from pypads.app.backends.repository import OBJECT_TAG_PREFIX
+        tracker = PyPads(uri=os.path.join(self.folder, "mlruns"), folder=os.path.join(self.folder, "pads"),
+                         config={"mongo_db": False, "content_store": True,
+                                 "backend_resilience": {"retries": 1, "backoff": 0}}, setup_fns={}, autostart=True)
+        run_id = tracker.api.active_run().info.run_id
+        store_id = tracker.object_repository.store.run_id
+        failures = {"count": 0}
+        log_artifact, set_tag = MlflowClient.log_artifact, MlflowClient.set_tag
+
+        def flaky(fn, failing):
+            def call(client, *args, **kwargs):
+                if failures["count"] < failing:
+                    failures["count"] += 1
+                    raise ConnectionError("Connection refused")
+                return fn(client, *args, **kwargs)
+
+            return call
+
+        # A single failure is retried
+        with mock.patch.object(MlflowClient, "set_tag", flaky(set_tag, 1)):
+            tracker.api.log_mem_artifact("retried", "retried content")
+        retried = tracker.backend.resilience.summary()["retried"]
+        # Repeated failures are spooled into the write-ahead log
+        failures["count"] = 0
+        with mock.patch.object(MlflowClient, "log_artifact", flaky(log_artifact, 100)), \
+                mock.patch.object(MlflowClient, "set_tag", flaky(set_tag, 100)):
+            tracker.api.log_mem_artifact("spooled", "spooled content")
+        wal = get_run_wal(tracker)
+        spooled = wal.spooled
+        tracker.api.end_run()
+
+        # --------------------------- asserts ---------------------------
+        self.assertGreaterEqual(retried, 1)
+        self.assertGreaterEqual(spooled, 2)
+        client = MlflowClient(tracking_uri=os.path.join(self.folder, "mlruns"))
+        tags = client.get_run(run_id).data.tags
+        self.assertEqual(len([k for k in tags if k.startswith(OBJECT_TAG_PREFIX)]), 1)
+
+        self.assertEqual(recover_run(wal.path), run_id)
+        tags = client.get_run(run_id).data.tags
+        self.assertEqual(sorted(v for k, v in tags.items() if k.startswith(OBJECT_TAG_PREFIX)),
+                         ["retried.txt", "spooled.txt"])
+        blobs = [f.path for folder in client.list_artifacts(store_id, "objects") if folder.is_dir
+                 for f in client.list_artifacts(store_id, folder.path)]
+        for path in ["retried.txt", "spooled.txt"]:
+            self.assertIn(tracker.object_repository.resolve(run_id, path), blobs)
+        self.assertEqual(tracker.results.load_artifact("spooled.txt", run_id=run_id), "spooled content")
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pypads.utils.logging_util import FileFormats, find_write_format, writers, read_artifact, _has_pyarrow
+
+
+class FileFormatsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_find_write_format(self):
+        """
+        This example will check if arrays and data frames are stored without pickling them.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(find_write_format(np.zeros(3)), FileFormats.numpy)
+        self.assertEqual(find_write_format({"a": np.zeros(3), "b": np.ones(2)}), FileFormats.numpy_archive)
+        self.assertEqual(find_write_format(np.array([object()])), FileFormats.pickle)
+        self.assertEqual(find_write_format({"a": 1}), FileFormats.pickle)
+        self.assertEqual(find_write_format({1: np.zeros(3)}), FileFormats.pickle)
+        self.assertEqual(find_write_format(np.ma.masked_array([1, 2], mask=[0, 1])), FileFormats.pickle)
+        self.assertEqual(find_write_format(np.matrix([[1, 2]])), FileFormats.pickle)
+        self.assertEqual(find_write_format(pd.DataFrame({"a": [1]})),
+                         FileFormats.parquet if _has_pyarrow() else FileFormats.pickle)
+        # !-------------------------- asserts ---------------------------
+
+    def test_numpy(self):
+        """
+        This example will check if arrays are memory mapped on request.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        array = np.arange(1000.)
+        path = writers[FileFormats.numpy](os.path.join(self.folder, "array"), array)
+        archive = writers[FileFormats.numpy_archive](os.path.join(self.folder, "arrays"), {"a": array, "b": array[:3]})
+
+        # --------------------------- asserts ---------------------------
+        loaded = read_artifact(path, mmap_mode="r")
+        self.assertIsInstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, array)
+        self.assertNotIsInstance(read_artifact(path), np.memmap)
+
+        loaded = read_artifact(archive)
+        self.assertEqual(set(loaded.keys()), {"a", "b"})
+        np.testing.assert_array_equal(loaded["b"], array[:3])
+        # !-------------------------- asserts ---------------------------
+
+    def test_write_format(self):
+        """
+        This example will check if pickled objects are only stored by their type if this doesn't lose information.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from pypads.app.base import PyPads
+        from pypads.app.pypads import current_pads
+        tracker = PyPads(uri=os.path.join(self.folder, "mlruns"), folder=os.path.join(self.folder, "pads"),
+                         config={"mongo_db": False, "parallel_setups": False}, setup_fns={}, autostart=True)
+        try:
+            arrays = {1: np.arange(3.)}
+            tracker.api.log_mem_artifact("pickled", arrays, write_format=FileFormats.pickle)
+            tracker.api.log_mem_artifact("chosen", {"a": np.arange(3.)}, write_format=None)
+            tracker.api.log_mem_artifact("array", np.arange(3.), write_format=FileFormats.pickle)
+            masked = np.ma.masked_array([1., 2.], mask=[False, True])
+            tracker.api.log_mem_artifact("masked", masked, write_format=FileFormats.pickle)
+            run_id = tracker.api.active_run().info.run_id
+            files = {f.path for f in tracker.backend.list_files(run_id)}
+            loaded = tracker.results.load_artifact("pickled.pickle")
+            loaded_masked = tracker.results.load_artifact("masked.pickle")
+            tracker.api.end_run()
+        finally:
+            if current_pads:
+                current_pads.deactivate_tracking(run_atexits=True, reload_modules=False)
+
+        # --------------------------- asserts ---------------------------
+        self.assertTrue({"pickled.pickle", "chosen.npz", "array.npy", "masked.pickle"}.issubset(files))
+        self.assertIsInstance(loaded_masked, np.ma.MaskedArray)
+        self.assertEqual(loaded_masked.mask.tolist(), [False, True])
+        self.assertEqual(list(loaded.keys()), [1])
+        np.testing.assert_array_equal(loaded[1], arrays[1])
+        # !-------------------------- asserts ---------------------------
+
+    @unittest.skipUnless(_has_pyarrow(), "pyarrow is not installed")
+    def test_data_frame(self):
+        """
+        This example will check if data frames are written as parquet and feather.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        frame = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        parquet = writers[FileFormats.parquet](os.path.join(self.folder, "frame"), frame)
+        feather = writers[FileFormats.feather](os.path.join(self.folder, "frame"), frame)
+
+        # --------------------------- asserts ---------------------------
+        pd.testing.assert_frame_equal(read_artifact(parquet), frame)
+        pd.testing.assert_frame_equal(read_artifact(feather).drop(columns="index"), frame)
+        # !-------------------------- asserts ---------------------------
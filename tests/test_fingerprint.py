@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from pypads.utils import fingerprint as fp
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_fingerprint(self):
+        """
+        This example will check if fingerprints are stable and depend on all given parts.
+        :return:
+        """
+        self.assertEqual(fp.fingerprint("a", 1, ("b", 2)), fp.fingerprint("a", 1, ("b", 2)))
+        self.assertNotEqual(fp.fingerprint("a", 1), fp.fingerprint("a", 2))
+        self.assertNotEqual(fp.fingerprint("ab", "c"), fp.fingerprint("a", "bc"))
+        self.assertEqual(fp.machine_fingerprint("cpu", 4), fp.machine_fingerprint("cpu", 4))
+        self.assertNotEqual(fp.machine_fingerprint("cpu", 4), fp.machine_fingerprint("cpu", 8))
+
+    def test_environment_fingerprint(self):
+        """
+        This example will check if installing a package into site-packages changes the fingerprint.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        site_dir = tempfile.mkdtemp(suffix="site-packages")
+
+        # --------------------------- asserts ---------------------------
+        with mock.patch.object(fp, "site_packages", return_value=[site_dir]):
+            before = fp.environment_fingerprint()
+            self.assertEqual(before, fp.environment_fingerprint())
+
+            time.sleep(0.01)
+            os.mkdir(os.path.join(site_dir, "new_package"))
+            self.assertNotEqual(before, fp.environment_fingerprint())
+        # !-------------------------- asserts ---------------------------
+
+    def test_data_fingerprint(self):
+        """
+        This example will check if equal data in different objects gets the same fingerprint.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import numpy as np
+        import pandas as pd
+        import scipy.sparse as sp
+        array = np.random.RandomState(0).rand(1000, 500)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(fp.data_fingerprint(array), fp.data_fingerprint(array.copy()))
+        self.assertEqual(fp.data_fingerprint(array, full=True), fp.data_fingerprint(array.copy(), full=True))
+        self.assertNotEqual(fp.data_fingerprint(array), fp.data_fingerprint(array.reshape(500, 1000)))
+        self.assertNotEqual(fp.data_fingerprint(array[:, ::2]), fp.data_fingerprint(array[:, 1::2]))
+        self.assertNotEqual(fp.data_fingerprint(array), fp.data_fingerprint(array.astype(np.float32)))
+
+        frame = pd.DataFrame(array[:100], columns=[str(i) for i in range(500)])
+        self.assertEqual(fp.data_fingerprint(frame), fp.data_fingerprint(frame.copy()))
+        self.assertNotEqual(fp.data_fingerprint(frame), fp.data_fingerprint(frame.rename(columns={"0": "a"})))
+        self.assertEqual(fp.data_fingerprint(frame["1"]), fp.data_fingerprint(frame["1"].copy()))
+        self.assertEqual(fp.data_fingerprint(sp.csr_matrix(array)), fp.data_fingerprint(sp.csr_matrix(array)))
+        self.assertIsNone(fp.data_fingerprint([1, 2, 3]))
+        # !-------------------------- asserts ---------------------------
+
+    def test_data_fingerprint_cache(self):
+        """
+        This example will check if data fingerprints are cached until the object is collected.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import numpy as np
+        array = np.zeros(100000)
+        value = fp.data_fingerprint(array)
+
+        # --------------------------- asserts ---------------------------
+        with mock.patch.object(fp, "_fingerprint_data") as fingerprint_data:
+            self.assertEqual(fp.data_fingerprint(array), value)
+            fingerprint_data.assert_not_called()
+        key = id(array)
+        del array
+        self.assertNotIn(key, fp._data_fingerprints)
+        # !-------------------------- asserts ---------------------------
+
+    def test_git_fingerprint(self):
+        """
+        This example will check if the git fingerprint changes with commits, staged and unstaged changes.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import git
+        folder = tempfile.mkdtemp()
+        repo = git.Repo.init(folder)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "test")
+            config.set_value("user", "email", "test@example.com")
+        path = os.path.join(folder, "experiment.py")
+        with open(path, "w") as f:
+            f.write("print('a')\n")
+        repo.index.add([path])
+        repo.index.commit("initial")
+
+        # --------------------------- asserts ---------------------------
+        committed = fp.git_fingerprint(repo)
+        self.assertEqual(fp.git_fingerprint(repo), committed)
+
+        time.sleep(0.01)
+        with open(path, "w") as f:
+            f.write("print('b')\n")
+        repo.index.add([path])
+        staged = fp.git_fingerprint(repo)
+        self.assertNotEqual(staged, committed)
+
+        repo.index.commit("change")
+        self.assertNotEqual(fp.git_fingerprint(repo), staged)
+
+        committed = fp.git_fingerprint(repo)
+        time.sleep(0.01)
+        with open(path, "w") as f:
+            f.write("print('c')\n")
+        self.assertNotEqual(fp.git_fingerprint(repo), committed)
+        # !-------------------------- asserts ---------------------------
+
+    def test_file_digest(self):
+        """
+        This example will check if the streamed file digest equals the digest of the whole content.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import hashlib
+        content = os.urandom(3 * 1024 + 17)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(fp.file_digest(f.name, block_size=1024), hashlib.sha256(content).hexdigest())
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from pypads.utils.log_chunks import LogChunker, tail_chunks
+
+
+class LogChunkerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_chunks(self):
+        """
+        This example will check if a loguru sink is rotated into compressed chunks which can be tailed.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from loguru import logger
+        uploaded = []
+        chunker = LogChunker(self.folder, "run", on_chunk=lambda chunk, index: uploaded.append(chunk),
+                             chunk_size=1000)
+        path = os.path.join(self.folder, "run.log")
+        lid = logger.add(path, rotation=chunker.rotation, compression=chunker.compression_function,
+                         format="{message}", enqueue=True)
+        for i in range(100):
+            logger.info("message {}", i)
+        logger.remove(lid)
+        chunker.close(path)
+
+        # --------------------------- asserts ---------------------------
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(uploaded, [os.path.join(self.folder, c["file"]) for c in chunker.chunks])
+        self.assertGreater(len(chunker.chunks), 1)
+        self.assertTrue(all(c["size"] <= 1000 and c["compressed_size"] > 0 for c in chunker.chunks))
+        self.assertEqual(sum(c["lines"] for c in chunker.chunks), 100)
+
+        with open(chunker.index_path) as f:
+            index = json.load(f)
+        self.assertEqual(index["compression"], "gzip")
+        self.assertEqual([c["chunk"] for c in index["chunks"]], list(range(len(chunker.chunks))))
+
+        self.assertEqual(tail_chunks(uploaded, lines=3), ["message 97", "message 98", "message 99"])
+        self.assertEqual(len(tail_chunks(uploaded, lines=1000)), 100)
+        # !-------------------------- asserts ---------------------------
+
+    def test_interval(self):
+        """
+        This example will check if chunks are closed after the chunk interval.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        chunker = LogChunker(self.folder, "run", chunk_interval=0)
+        path = os.path.join(self.folder, "run.log")
+
+        # --------------------------- asserts ---------------------------
+        with open(path, "w") as f:
+            self.assertFalse(chunker.rotation("first", f))
+            f.write("first\n")
+            self.assertTrue(chunker.rotation("second", f))
+        # !-------------------------- asserts ---------------------------
+
+    def test_upload(self):
+        """
+        This example will check if chunks are uploaded into the run the sink was registered for.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from pypads.injections.setup.misc_setup import _upload_log_chunk
+        artifacts = []
+
+        class Backend:
+
+            def log_file(self, local_path, artifact_path="", move=False, run_id=None):
+                if local_path.endswith("missing.log.gz"):
+                    raise FileNotFoundError(local_path)
+                artifacts.append((run_id, os.path.basename(local_path), artifact_path))
+
+        pads = SimpleNamespace(backend=Backend())
+        logs = SimpleNamespace(path="logs")
+        uploaded = set()
+        _upload_log_chunk(pads, "run", logs, uploaded, os.path.join(self.folder, "run.00000.log.gz"),
+                          os.path.join(self.folder, "run.index.json"))
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(artifacts, [("run", "run.00000.log.gz", "logs"), ("run", "run.index.json", "logs")])
+        self.assertEqual(uploaded, {"run.00000.log.gz"})
+        with self.assertLogs("pypads.injections.setup.misc_setup", level="WARNING"):
+            _upload_log_chunk(pads, "run", logs, uploaded, os.path.join(self.folder, "missing.log.gz"),
+                              os.path.join(self.folder, "run.index.json"))
+        self.assertEqual(uploaded, {"run.00000.log.gz"})
+        # !-------------------------- asserts ---------------------------
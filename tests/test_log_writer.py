@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pypads.injections.setup.misc_setup import BufferedLogWriter
+
+
+class BufferedLogWriterTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "logfile.log")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_clean(self):
+        """
+        This example will check if escape sequences and overwritten progress bar states are removed.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(BufferedLogWriter.clean("\x1b[32mok\x1b[0m\n"), "ok\n")
+        self.assertEqual(BufferedLogWriter.clean("1/3\r2/3\r3/3\nnext\r\n"), "3/3\nnext\n")
+        # !-------------------------- asserts ---------------------------
+
+    def test_buffering(self):
+        """
+        This example will check if writes are buffered and flushed on size, interval and close.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        writer = BufferedLogWriter(self.path, flush_size=1 << 20, flush_interval=3600)
+        for i in range(100):
+            writer.write("\r\x1b[1mepoch {}\x1b[0m".format(i))
+        writer.write("\n")
+        writer.write("done")
+
+        # --------------------------- asserts ---------------------------
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "")
+        writer.flush()
+        with open(self.path) as f:
+            # The unterminated line is held back until it is finished
+            self.assertEqual(f.read(), "epoch 99\n")
+        writer.close()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "epoch 99\ndone")
+        writer.write("ignored")
+
+        writer = BufferedLogWriter(self.path, flush_size=10, flush_interval=3600)
+        writer.write("a" * 5 + "\n" + "b" * 5 + "\n")
+        for _ in range(100):
+            if os.path.getsize(self.path) > 13:
+                break
+            time.sleep(0.01)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "epoch 99\ndone" + "a" * 5 + "\n" + "b" * 5 + "\n")
+        writer.close()
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,68 @@
+import unittest
+
+from pypads.app.misc.metric_aggregation import MetricAccumulator, MetricAggregator
+
+
+class BatchBackend:
+    """
+    Backend recording the batches of metrics.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def log_metrics(self, metrics):
+        self.batches.append(metrics)
+
+
+class Pads:
+
+    def __init__(self):
+        self.backend = BatchBackend()
+
+
+class MetricAggregationTest(unittest.TestCase):
+
+    def test_accumulator(self):
+        """
+        This example will check if the statistics of the whole run and the points of the series are aggregated.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        accumulator = MetricAccumulator(None, series="mean")
+        for i, value in enumerate([4, 2, 6]):
+            accumulator.add(value, 1000 + i, step=i + 1)
+        first = accumulator.pop()
+        accumulator.add(1, 2000)
+        second = accumulator.pop()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(first, (4., 1002, 3))
+        # Values without a step are numbered
+        self.assertEqual(second, (1., 2000, 4))
+        self.assertIsNone(accumulator.pop())
+        self.assertEqual((accumulator.count, accumulator.min, accumulator.max, accumulator.mean, accumulator.last),
+                         (4, 1., 6., 3.25, 1.))
+        # !-------------------------- asserts ---------------------------
+
+    def test_flush(self):
+        """
+        This example will check if the points of all metrics are stored in a single batch.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        pads = Pads()
+        aggregator = MetricAggregator(pads, interval=3600, series="max")
+        for key in ["loss", "accuracy"]:
+            for step in range(1, 101):
+                accumulator = aggregator.accumulators.setdefault(key, MetricAccumulator(None, series="max"))
+                accumulator.add(step / 100, step, step=step)
+        stored = aggregator.flush()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(stored, 2)
+        self.assertEqual(pads.backend.batches, [[("loss", 1., 100, 100), ("accuracy", 1., 100, 100)]])
+        self.assertEqual(aggregator.flush(), 0)
+        self.assertEqual(len(pads.backend.batches), 1)
+        self.assertRaises(ValueError, MetricAggregator, pads, series="median")
+        # !-------------------------- asserts ---------------------------
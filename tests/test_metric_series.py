@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from pypads.app.misc.metric_series import MetricSeries, read_series, is_array_metric
+
+
+class MetricSeriesTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_chunks(self):
+        """
+        This example will check if array valued metrics are written into chunks and read back as a data frame.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        series = MetricSeries(SimpleNamespace(name="confusion_matrix"), self.folder, chunk_size=2)
+        chunks = []
+        for i in range(5):
+            series.append(np.eye(2, dtype=int) * i, 1000 + i)
+            if len(series) >= series.chunk_size:
+                chunks.append(series.write_chunk())
+        chunks.append(series.write_chunk())
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(len(chunks), 3)
+        self.assertIsNone(series.write_chunk())
+        self.assertEqual(series.model().dict(), {"count": 5, "chunks": 3, "shape": [2, 2], "dtype": "int64",
+                                                 "format": "npz"})
+        self.assertRaises(ValueError, series.append, [1, 2], 1006)
+
+        df = read_series(chunks)
+        self.assertEqual(list(df["step"]), [1, 2, 3, 4, 5])
+        self.assertEqual(df["value"][3].tolist(), [[3, 0], [0, 3]])
+        expanded = read_series(chunks, expand=True)
+        self.assertEqual(list(expanded.columns), ["step", "timestamp", "value[0,0]", "value[0,1]", "value[1,0]",
+                                                  "value[1,1]"])
+        self.assertEqual(list(expanded["value[1,1]"]), [0, 1, 2, 3, 4])
+        # !-------------------------- asserts ---------------------------
+
+    def test_is_array_metric(self):
+        """
+        This example will check which values are stored as array valued metrics.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        self.assertTrue(is_array_metric([0.5, 0.7]))
+        self.assertTrue(is_array_metric(np.zeros((3, 3))))
+        self.assertFalse(is_array_metric(0.5))
+        self.assertFalse(is_array_metric("report"))
+        self.assertFalse(is_array_metric({"a": 1}))
+        self.assertFalse(is_array_metric(["a", "b"]))
+        # !-------------------------- asserts ---------------------------
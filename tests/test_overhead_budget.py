@@ -0,0 +1,63 @@
+import time
+import unittest
+
+from pypads.app.misc.budget import OverheadBudget, FULL, NO_EXPENSIVE, SAMPLED
+
+
+class DummyLogger:
+    expensive = False
+
+
+class ExpensiveDummyLogger:
+    expensive = True
+
+
+class OverheadBudgetTest(unittest.TestCase):
+
+    def test_degradation(self):
+        """
+        This example will check if the budget degrades the tracking step by step if the overhead is too high.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        budget = OverheadBudget(budget=0.05, sample_rate=3, window=0.01)
+        cheap = DummyLogger()
+        expensive = ExpensiveDummyLogger()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(budget.level, FULL)
+        self.assertTrue(budget.allows(expensive))
+
+        time.sleep(0.02)
+        budget.account(pre_time=0.01, post_time=0.01, child_time=0.001)
+        self.assertEqual(budget.level, NO_EXPENSIVE)
+        self.assertFalse(budget.allows(expensive))
+        self.assertTrue(budget.allows(cheap))
+
+        time.sleep(0.02)
+        budget.account(pre_time=0.01, post_time=0.01, child_time=0.001)
+        self.assertEqual(budget.level, SAMPLED)
+        allowed = [budget.allows(cheap) for _ in range(6)]
+        self.assertEqual(allowed.count(True), 2)
+
+        summary = budget.summary()
+        self.assertEqual(summary["level"], "sampled")
+        self.assertEqual(len(summary["decisions"]), 2)
+        self.assertEqual(summary["skipped"], {"ExpensiveDummyLogger": 1, "DummyLogger": 4})
+        # !-------------------------- asserts ---------------------------
+
+    def test_within_budget(self):
+        """
+        This example will check that the tracking isn't degraded while the overhead stays in the budget.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        budget = OverheadBudget.from_config(0.5)
+        budget._window = 0.01
+
+        # --------------------------- asserts ---------------------------
+        time.sleep(0.05)
+        budget.account(pre_time=0.001, post_time=0.001, child_time=0.04)
+        self.assertEqual(budget.level, FULL)
+        self.assertTrue(budget.allows(ExpensiveDummyLogger()))
+        # !-------------------------- asserts ---------------------------
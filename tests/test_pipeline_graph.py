@@ -0,0 +1,50 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypads.injections.loggers.pipeline_detection import CompactGraph, CALL_ORDER_EDGE, OF_EDGE
+
+
+class CompactGraphTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_aggregation(self):
+        """
+        This example will check if repeated edges are aggregated while the edge log keeps all of them.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        log_path = os.path.join(self.folder, "edges.jsonl")
+        graph = CompactGraph(log_path=log_path)
+        instance = graph.intern("instance")
+        fit = graph.intern("fit", parent=instance)
+        predict = graph.intern("predict", parent=instance)
+        for i in range(1000):
+            graph.add_edge(fit, predict, CALL_ORDER_EDGE, timestamp=i)
+            graph.add_edge(predict, fit, CALL_ORDER_EDGE, timestamp=i)
+        graph.close()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(graph.intern("fit"), fit)
+        self.assertEqual(graph.number_of_nodes, 3)
+        self.assertEqual(graph.number_of_edges, 2)
+
+        network = graph.to_dict()
+        self.assertEqual(set(network["fit"].keys()), {"instance", "predict"})
+        self.assertEqual(network["fit"]["instance"][OF_EDGE]["plain_label"], OF_EDGE)
+        edge = network["fit"]["predict"][CALL_ORDER_EDGE]
+        self.assertEqual((edge["count"], edge["first_step"], edge["last_step"]), (1000, 0, 1998))
+        self.assertEqual((edge["first_time"], edge["last_time"]), (0, 999))
+
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len([r for r in records if r[0] == "node"]), 3)
+        self.assertEqual(len([r for r in records if r[0] == "edge"]), 2000)
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,38 @@
+import time
+import unittest
+
+from pypads.app.misc.profiler import Profiler
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_spans(self):
+        """
+        This example will check if the profiler sums up the spans per component and exports them as chrome trace.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.span("logger", "DummyLogger._call", detail="fit"):
+                time.sleep(0.001)
+        with profiler.span("backend", "log_metric"):
+            pass
+
+        # --------------------------- asserts ---------------------------
+        count, wall, cpu = profiler._totals[("logger", "DummyLogger._call")]
+        self.assertEqual(count, 3)
+        self.assertGreaterEqual(wall, 3 * 10 ** 6)
+
+        summary = profiler.summary()
+        self.assertTrue(summary.index("DummyLogger._call") < summary.index("log_metric"))
+
+        trace = profiler.trace()
+        self.assertEqual(len(trace["traceEvents"]), 4)
+        self.assertEqual(trace["traceEvents"][0]["args"], {"detail": "fit"})
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+        collected = profiler.reset()
+        self.assertEqual(len(collected.trace()["traceEvents"]), 4)
+        self.assertEqual(len(profiler.trace()["traceEvents"]), 0)
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,132 @@
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypads.app.backends.resilience import ResilientCaller, RetryPolicy, CircuitBreaker, resilient, is_transient
+from pypads.app.misc.wal import WriteAheadLog
+from pypads.exceptions import BackendUnavailableError
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class FlakyBackend:
+    """
+    Backend failing a number of times before its operations succeed.
+    """
+
+    def __init__(self, failures, wal, clock):
+        self.failures = failures
+        self.calls = 0
+        self.sleeps = []
+        self.wal = wal
+        self.resilience = ResilientCaller(RetryPolicy(retries=2, backoff=1, max_backoff=3),
+                                          CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=clock),
+                                          sleep=self.sleeps.append)
+
+    @resilient("log_metric", spool=True)
+    def log_metric(self, key, value):
+        self.calls += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("Connection refused")
+        return key
+
+    @resilient("log_param")
+    def log_param(self, key, value):
+        self.calls += 1
+        raise ValueError("Changing a parameter is not allowed")
+
+    def _spool(self, operation, *args, **kwargs):
+        return self.wal.spool(operation)
+
+
+class ResilienceTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.wal = WriteAheadLog(os.path.join(self.folder, "run.wal"))
+        self.clock = FakeClock()
+
+    def tearDown(self) -> None:
+        self.wal.close()
+        shutil.rmtree(self.folder)
+
+    def test_retries(self):
+        """
+        This example will check if transient errors are retried with a jittered exponential backoff and other errors
+        are raised directly.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        backend = FlakyBackend(2, self.wal, self.clock)
+        out = backend.log_metric("metric", 1)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(out, "metric")
+        self.assertEqual(backend.calls, 3)
+        self.assertEqual(len(backend.sleeps), 2)
+        self.assertTrue(0 <= backend.sleeps[0] <= 1)
+        self.assertTrue(0 <= backend.sleeps[1] <= 2)
+        self.assertEqual(backend.resilience.summary()["retried"], 2)
+
+        self.assertRaises(ValueError, backend.log_param, "param", 1)
+        self.assertEqual(backend.calls, 4)
+        # !-------------------------- asserts ---------------------------
+
+    def test_is_transient(self):
+        """
+        This example will check if only connection and timeout errors are considered transient.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        self.assertTrue(is_transient(ConnectionRefusedError()))
+        self.assertTrue(is_transient(TimeoutError()))
+        self.assertTrue(is_transient(OSError(errno.EHOSTUNREACH, "No route to host")))
+        self.assertFalse(is_transient(OSError(errno.ENOSPC, "No space left on device")))
+        self.assertFalse(is_transient(PermissionError(errno.EACCES, "Permission denied")))
+        self.assertFalse(is_transient(FileNotFoundError()))
+        self.assertFalse(is_transient(ValueError()))
+        # !-------------------------- asserts ---------------------------
+
+    def test_circuit_breaker(self):
+        """
+        This example will check if writes are spooled while the circuit is open and the backend is probed again after
+        the reset timeout.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        backend = FlakyBackend(100, self.wal, self.clock)
+        for i in range(4):
+            backend.log_metric("metric", i)
+        calls = backend.calls
+
+        # --------------------------- asserts ---------------------------
+        # Two operations with three attempts each open the circuit
+        self.assertEqual(calls, 6)
+        self.assertEqual(backend.resilience.breaker.state, CircuitBreaker.open)
+        self.assertEqual(self.wal.spooled, 4)
+        self.assertEqual(backend.resilience.summary()["spooled"], 4)
+        self.assertRaises(BackendUnavailableError, backend.log_param, "param", 1)
+        self.assertEqual(backend.resilience.summary()["dropped"], 1)
+
+        # A single attempt probes the backend after the timeout
+        self.clock.time = 60
+        backend.log_metric("metric", 4)
+        self.assertEqual(backend.calls, calls + 1)
+        self.assertEqual(backend.resilience.breaker.state, CircuitBreaker.open)
+
+        self.clock.time = 120
+        backend.failures = 0
+        self.assertEqual(backend.log_metric("metric", 5), "metric")
+        self.assertEqual(backend.resilience.breaker.state, CircuitBreaker.closed)
+        self.assertEqual(len([r for r in WriteAheadLog.read(self.wal.path) if r["kind"] == "spooled"]), 5)
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pypads.utils.resources import LinuxResourceProbe, get_resource_probe, ResourceProbe, USAGE_FIELDS
+
+PROC_FILES = {
+    "proc/stat": "cpu  100 0 100 700 100 0 0 0 0 0\n"
+                 "cpu0 50 0 50 350 50 0 0 0 0 0\n"
+                 "cpu1 50 0 50 350 50 0 0 0 0 0\n"
+                 "intr 1234\n",
+    "proc/meminfo": "MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    250 kB\n"
+                    "SwapTotal:       200 kB\nSwapFree:        150 kB\n",
+    "proc/self/stat": "42 (python (my script)) R 1 42 42 0 -1 4194304 86 0 0 0 250 50 0 0 20 0 1 0 226417 2568192 350",
+    "proc/self/status": "Name:\tpython\nVmHWM:\t    2048 kB\nVmRSS:\t    1024 kB\n",
+    "proc/self/io": "rchar: 3980\nwchar: 10\nread_bytes: 4096\nwrite_bytes: 8192\n"
+}
+
+CGROUP_V2_FILES = {
+    "proc/self/cgroup": "0::/docker/abc\n",
+    "sys/fs/cgroup/cgroup.controllers": "cpu memory",
+    "sys/fs/cgroup/docker/abc/cpu.max": "200000 100000",
+    "sys/fs/cgroup/docker/abc/cpu.stat": "usage_usec 5000000\nuser_usec 4000000\nsystem_usec 1000000\n"
+                                         "nr_periods 10\nnr_throttled 3\nthrottled_usec 1500000\n",
+    "sys/fs/cgroup/docker/abc/memory.current": "512",
+    "sys/fs/cgroup/docker/abc/memory.max": "1024"
+}
+
+CGROUP_V1_FILES = {
+    "proc/self/cgroup": "4:memory:/\n2:cpu,cpuacct:/\n0::/\n",
+    "sys/fs/cgroup/cpu,cpuacct/cpu.cfs_quota_us": "50000",
+    "sys/fs/cgroup/cpu,cpuacct/cpu.cfs_period_us": "100000",
+    "sys/fs/cgroup/cpu,cpuacct/cpu.stat": "nr_periods 20\nnr_throttled 5\nthrottled_time 2000000000\n",
+    "sys/fs/cgroup/cpu,cpuacct/cpuacct.usage": "3000000000",
+    "sys/fs/cgroup/memory/memory.usage_in_bytes": "256",
+    "sys/fs/cgroup/memory/memory.limit_in_bytes": "9223372036854771712"
+}
+
+
+class LinuxResourceProbeTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root)
+
+    def _write(self, files):
+        for path, content in files.items():
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def test_process(self):
+        """
+        This example will check if the machine and process values are parsed from a /proc tree.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        self._write(PROC_FILES)
+        probe = get_resource_probe(root=self.root)
+
+        # --------------------------- asserts ---------------------------
+        self.assertIsInstance(probe, LinuxResourceProbe)
+        self.assertEqual(probe.cpu_count(), 2)
+        self.assertEqual(probe.memory_usage(), [75., 25.])
+        user, system = probe.process_times()
+        self.assertAlmostEqual(user * probe._clock_ticks, 250)
+        self.assertAlmostEqual(system * probe._clock_ticks, 50)
+        self.assertEqual(probe.process_memory(), (1024 * 1024, 2048 * 1024))
+        self.assertEqual(probe.process_io(), (4096, 8192))
+        self.assertIsNone(probe.cgroup())
+
+        self._write({"proc/stat": "cpu  150 0 150 800 100 0 0 0 0 0\n"
+                                  "cpu0 100 0 100 350 50 0 0 0 0 0\n"
+                                  "cpu1 50 0 50 450 50 0 0 0 0 0\n"})
+        self.assertEqual(probe.cpu_usage(), [100., 0., 50.])
+        # !-------------------------- asserts ---------------------------
+
+    def test_cgroup_v2(self):
+        """
+        This example will check if limits and throttling are read from a cgroup v2 tree.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        self._write({**PROC_FILES, **CGROUP_V2_FILES})
+        probe = LinuxResourceProbe(root=self.root)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(probe.cgroup(), {"version": 2, "path": "/docker/abc", "cpu_limit": 2.,
+                                          "memory_limit": 1024})
+        self.assertEqual(probe.cgroup_usage(), {"memory": 512, "cpu_time": 5., "nr_periods": 10, "nr_throttled": 3,
+                                                "throttled_time": 1.5})
+        self.assertEqual(probe.cgroup_sample(), [512, 50., 5., 10, 3, 1.5])
+        # !-------------------------- asserts ---------------------------
+
+    def test_cgroup_v1(self):
+        """
+        This example will check if limits and throttling are read from a cgroup v1 tree mounted in a namespace.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        self._write({**PROC_FILES, **CGROUP_V1_FILES})
+        probe = LinuxResourceProbe(root=self.root)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(probe.cgroup(), {"version": 1, "path": "/", "cpu_limit": .5, "memory_limit": None})
+        self.assertEqual(probe.cgroup_usage(), {"memory": 256, "cpu_time": 3., "nr_periods": 20, "nr_throttled": 5,
+                                                "throttled_time": 2.})
+        # !-------------------------- asserts ---------------------------
+
+    def test_fallback(self):
+        """
+        This example will check if psutil is used if no /proc tree is available.
+        :return:
+        """
+        # --------------------------- asserts ---------------------------
+        probe = get_resource_probe(root=self.root)
+        self.assertIs(type(probe), ResourceProbe)
+        self.assertIsNone(probe.cgroup())
+        self.assertEqual(len(probe.process_sample()), 4)
+        # !-------------------------- asserts ---------------------------
+
+    def test_usage(self):
+        """
+        This example will check if the usage snapshots attribute the resources of a call.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        probe = get_resource_probe()
+        before = probe.usage()
+        data = [list(range(1000)) for _ in range(2000)]
+        sum(sum(r) for r in data)
+        after = probe.usage()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(set(before.keys()), set(USAGE_FIELDS))
+        self.assertGreater(after["cpu_user"] + after["cpu_system"], before["cpu_user"] + before["cpu_system"])
+        self.assertGreaterEqual(after["max_rss"], before["max_rss"])
+        # !-------------------------- asserts ---------------------------
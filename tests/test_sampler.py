@@ -0,0 +1,96 @@
+import time
+import unittest
+
+import numpy as np
+
+from pypads.app.misc.sampler import HardwareSampler, RingBuffer
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def test_wrap_around(self):
+        """
+        This example will check if only the latest samples are kept in chronological order.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        buffer = RingBuffer(["a", "b"], capacity=4, reservoir=16)
+        for i in range(10):
+            buffer.append(i, [i, 2 * i])
+
+        # --------------------------- asserts ---------------------------
+        samples = buffer.samples()
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.count, 10)
+        self.assertEqual(samples.shape, (4, 3))
+        self.assertEqual(list(samples[:, 0]), [6, 7, 8, 9])
+        self.assertEqual(list(samples[:, 2]), [12, 14, 16, 18])
+        # !-------------------------- asserts ---------------------------
+
+    def test_aggregates(self):
+        """
+        This example will check if the aggregates cover all samples and ignore missing values.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        buffer = RingBuffer(["a", "b", "c"], capacity=8, reservoir=200)
+        for i in range(101):
+            buffer.append(i, [i, np.nan if i % 2 else i, np.nan])
+
+        # --------------------------- asserts ---------------------------
+        aggregates = buffer.aggregates(percentiles=[50, 90])
+        self.assertNotIn("c", aggregates)
+        self.assertEqual(aggregates["a"]["min"], 0)
+        self.assertEqual(aggregates["a"]["max"], 100)
+        self.assertEqual(aggregates["a"]["mean"], 50)
+        self.assertEqual(aggregates["a"]["count"], 101)
+        self.assertEqual(aggregates["a"]["p50"], 50)
+        self.assertEqual(aggregates["a"]["p90"], 90)
+        self.assertEqual(aggregates["b"]["count"], 51)
+        self.assertEqual(aggregates["b"]["max"], 100)
+        # !-------------------------- asserts ---------------------------
+
+    def test_reservoir(self):
+        """
+        This example will check if the reservoir is drawn over the whole run instead of the latest samples.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        buffer = RingBuffer(["a"], capacity=10, reservoir=100)
+        for i in range(10000):
+            buffer.append(i, [i])
+
+        # --------------------------- asserts ---------------------------
+        aggregates = buffer.aggregates(percentiles=[50])
+        self.assertGreater(aggregates["a"]["p50"], 2500)
+        self.assertLess(aggregates["a"]["p50"], 7500)
+        # !-------------------------- asserts ---------------------------
+
+
+class HardwareSamplerTest(unittest.TestCase):
+
+    def test_probes(self):
+        """
+        This example will check if probes share the sampler thread and broken probes are disabled.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        flushed = {}
+
+        def broken():
+            raise RuntimeError("Probe not available")
+
+        sampler = HardwareSampler(period=0.01)
+        sampler.add_probe("fast", lambda: [1.], ["value"], on_flush=lambda p: flushed.update({p.name: len(p.buffer)}))
+        sampler.add_probe("slow", lambda: [2.], ["value"], period=0.05,
+                          on_flush=lambda p: flushed.update({p.name: len(p.buffer)}))
+        sampler.add_probe("broken", broken, ["value"])
+        time.sleep(0.3)
+        sampler.flush()
+
+        # --------------------------- asserts ---------------------------
+        self.assertTrue(sampler.probes["broken"].failed)
+        self.assertEqual(len(sampler.probes["broken"].buffer), 0)
+        self.assertGreater(flushed["fast"], flushed["slow"])
+        self.assertGreater(flushed["slow"], 0)
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,141 @@
+import threading
+import time
+import unittest
+
+from pypads.app.misc.scheduler import SetupScheduler, ThreadRunStack, run_in_background
+
+
+class DummySetup:
+
+    def __init__(self, name, calls, order=1, needed=None, provided=None, duration=0.):
+        self.name = name
+        self.order = order
+        self.needed_cached = needed or []
+        self.provided_cached = provided or []
+        self._calls = calls
+        self._duration = duration
+
+    def __call__(self, *args, **kwargs):
+        time.sleep(self._duration)
+        self._calls.append((self.name, threading.get_ident()))
+
+
+class SetupSchedulerTest(unittest.TestCase):
+
+    def test_dependencies(self):
+        """
+        This example will check if setups are run after the setups providing their cached entries.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        calls = []
+        setups = {
+            "cpu": DummySetup("cpu", calls, order=2, needed="Stats", duration=0.01),
+            "ram": DummySetup("ram", calls, order=3, needed="Stats"),
+            "stats": DummySetup("stats", calls, order=1, provided="Stats", duration=0.05),
+            "git": DummySetup("git", calls, order=1, duration=0.2)
+        }
+
+        # --------------------------- asserts ---------------------------
+        start = time.time()
+        timed_out = SetupScheduler(setups, timeout=5).run()
+        self.assertEqual(timed_out, [])
+        self.assertLess(time.time() - start, 0.25 + 0.06 + 0.1)
+        names = [name for name, _ in calls]
+        self.assertEqual(names[:3], ["stats", "cpu", "ram"])
+        self.assertEqual(names[3], "git")
+        # !-------------------------- asserts ---------------------------
+
+    def test_timeout(self):
+        """
+        This example will check if setups depending on a timed out setup are skipped.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        calls = []
+        setups = {
+            "stats": DummySetup("stats", calls, provided="Stats", duration=0.5),
+            "cpu": DummySetup("cpu", calls, needed="Stats"),
+            "socket": DummySetup("socket", calls)
+        }
+
+        # --------------------------- asserts ---------------------------
+        timed_out = SetupScheduler(setups, timeout=0.1).run()
+        self.assertEqual(timed_out, ["stats"])
+        self.assertEqual([name for name, _ in calls], ["socket"])
+        # !-------------------------- asserts ---------------------------
+
+    def test_run_stack(self):
+        """
+        This example will check if the run stack of mlflow is only replaced while setups are running.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import mlflow.tracking.fluent as fluent
+        shared = fluent._active_run_stack
+        stacks = []
+        setups = {
+            "stats": DummySetup("stats", [], duration=0.05),
+            "git": lambda *args, **kwargs: stacks.append(fluent._active_run_stack)
+        }
+        SetupScheduler(setups, timeout=5).run()
+        # Wait for the threads to release the stack after signaling to be done
+        for thread in threading.enumerate():
+            if thread.name.startswith("PyPadsSetup-"):
+                thread.join(5)
+
+        # --------------------------- asserts ---------------------------
+        self.assertIsInstance(stacks[0], ThreadRunStack)
+        self.assertNotIsInstance(fluent._active_run_stack, ThreadRunStack)
+        self.assertIs(fluent._active_run_stack, shared)
+        # !-------------------------- asserts ---------------------------
+
+    def test_cycle(self):
+        """
+        This example will check if cyclic cache dependencies are detected.
+        :return:
+        """
+        setups = {
+            "a": DummySetup("a", [], needed="B", provided="A"),
+            "b": DummySetup("b", [], needed="A", provided="B")
+        }
+        with self.assertRaises(ValueError):
+            SetupScheduler(setups)
+
+    def test_background(self):
+        """
+        This example will check if a background setup attaches its results and is joined by the teardown.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        teardowns = {}
+
+        class Api:
+            def register_teardown_utility(self, name, fn, **kwargs):
+                teardowns[name] = fn
+
+        class Pads:
+            api = Api()
+
+        class Output:
+            stored = 0
+            value = None
+
+            def store(self):
+                self.stored += 1
+
+        output = Output()
+
+        def capture():
+            time.sleep(0.1)
+            output.value = 42
+
+        # --------------------------- asserts ---------------------------
+        start = time.time()
+        thread = run_in_background(Pads(), "capture", capture, output=output, timeout=5)
+        self.assertLess(time.time() - start, 0.1)
+        self.assertIsNone(output.value)
+        teardowns["capture_join"](Pads())
+        self.assertFalse(thread.is_alive())
+        self.assertEqual((output.value, output.stored), (42, 1))
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,120 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        self.argv = sys.argv[0]
+
+    def tearDown(self) -> None:
+        from pypads.app.pypads import current_pads
+        if current_pads:
+            current_pads.deactivate_tracking(run_atexits=True, reload_modules=False)
+        os.chdir(self.cwd)
+        sys.argv[0] = self.argv
+        shutil.rmtree(self.folder)
+
+    def test_git_tags_of_reused_snapshot(self):
+        """
+        This example will check if a run reusing the git snapshot of an earlier run still gets the git tags.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        import git
+        source = os.path.join(self.folder, "source")
+        os.makedirs(source)
+        repo = git.Repo.init(source)
+        script = os.path.join(source, "experiment.py")
+        with open(script, "w") as f:
+            f.write("print('experiment')\n")
+        repo.index.add(["experiment.py"])
+        repo.index.commit("Add experiment")
+        # The git setup tracks the repository of the executed script
+        os.chdir(source)
+        sys.argv[0] = script
+
+        from pypads.app.base import PyPads
+        from pypads.injections.setup.git import IGitRSF, PYPADS_SOURCE_COMMIT_HASH, PYPADS_GIT_BRANCH
+        tracker = PyPads(uri=os.path.join(self.folder, "mlruns"), folder=os.path.join(self.folder, "pads"),
+                         config={"mongo_db": False, "parallel_setups": False}, setup_fns={IGitRSF()},
+                         autostart=True)
+        first = tracker.api.active_run().info.run_id
+        tracker.api.end_run()
+        tracker.api.start_run()
+        second = tracker.api.active_run().info.run_id
+        tracker.api.end_run()
+
+        # --------------------------- asserts ---------------------------
+        first_tags = tracker.backend.get_run(first).data.tags
+        second_tags = tracker.backend.get_run(second).data.tags
+        self.assertEqual(first_tags[PYPADS_SOURCE_COMMIT_HASH], repo.head.commit.hexsha)
+        self.assertEqual(first_tags[PYPADS_GIT_BRANCH], repo.active_branch.name)
+        for key in [PYPADS_SOURCE_COMMIT_HASH, PYPADS_GIT_BRANCH, "pypads.git.description", "pypads.git.remotes",
+                    "pypads.git.describe"]:
+            self.assertEqual(second_tags.get(key), first_tags[key])
+        # The second run didn't store its own git log
+        self.assertEqual([a.path for a in tracker.backend.list_files(second) if "git" in a.path.lower()], [])
+        # !-------------------------- asserts ---------------------------
+
+    def _tracker(self, setup_fns):
+        from pypads.app.base import PyPads
+        return PyPads(uri=os.path.join(self.folder, "mlruns"), folder=os.path.join(self.folder, "pads"),
+                      config={"mongo_db": False, "parallel_setups": False}, setup_fns=setup_fns, autostart=True)
+
+    def test_stored_snapshot(self):
+        """
+        This example will check if the snapshot repository returns the reference stored by an earlier run.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from pypads.app.backends.repository import SnapshotRepository
+        tracker = self._tracker({})
+        collected = []
+
+        def collect():
+            collected.append(tracker.api.active_run().info.run_id)
+            return tracker.api.set_tag("snapshot", "value")
+
+        reference = tracker.snapshot_repository.snapshot("fingerprint", collect)
+        tracker.api.end_run()
+        tracker.api.start_run()
+        # A new repository doesn't know the snapshot from memory
+        reused = SnapshotRepository().snapshot("fingerprint", collect)
+        tracker.api.end_run()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(len(collected), 1)
+        self.assertEqual(reused.id, reference.id)
+        self.assertEqual(reused.run.uid, reference.run.uid)
+        # !-------------------------- asserts ---------------------------
+
+    def test_disk_snapshot(self):
+        """
+        This example will check if the disk snapshot is reused by the following runs.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from mlflow.entities import ViewType
+        from pypads.injections.setup.hardware import IMacAddressRSF, IDiskRSF
+        tracker = self._tracker({IMacAddressRSF(), IDiskRSF()})
+        tracker.api.end_run()
+        snapshots = tracker.backend.get_experiment_by_name("pypads_snapshots").experiment_id
+        stored = len(tracker.backend.list_run_infos(snapshots, run_view_type=ViewType.ALL))
+        for _ in range(2):
+            with open(os.path.join(self.folder, "data.bin"), "ab") as f:
+                # Change the free space of the disk
+                f.write(os.urandom(1 << 16))
+            tracker.api.start_run()
+            run_id = tracker.api.active_run().info.run_id
+            tracker.api.end_run()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(len(tracker.backend.list_run_infos(snapshots, run_view_type=ViewType.ALL)), stored)
+        self.assertIn("pypads.disk.free", tracker.backend.get_run(run_id).data.metrics)
+        # !-------------------------- asserts ---------------------------
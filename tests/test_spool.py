@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mlflow.entities import ViewType
+from mlflow.tracking import MlflowClient
+
+from pypads.app.backends.spool import SpoolSync, SPOOL_RUN_TAG, SPOOL_SYNCED_TAG, PARENT_RUN_TAG
+
+
+class Collection:
+    """
+    MongoDB collection recording the upserted documents.
+    """
+
+    def __init__(self):
+        self.documents = {}
+
+    def replace_one(self, query, document, upsert=False):
+        self.documents[query["_id"]] = document
+
+
+class Database(dict):
+
+    def __missing__(self, key):
+        self[key] = Collection()
+        return self[key]
+
+
+class SpoolSyncTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.spool = os.path.join(self.folder, "spool")
+        self.target = os.path.join(self.folder, "target")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_sync(self):
+        """
+        This example will check if spooled runs are replayed once with their data and nesting.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        source = MlflowClient(tracking_uri=self.spool)
+        experiment_id = source.create_experiment("experiment")
+        parent = source.create_run(experiment_id)
+        source.log_param(parent.info.run_id, "param", 1)
+        for step in range(3):
+            source.log_metric(parent.info.run_id, "metric", step * 0.5, step=step)
+        artifact = os.path.join(self.folder, "data.txt")
+        with open(artifact, "w") as f:
+            f.write("data")
+        source.log_artifact(parent.info.run_id, artifact)
+        child = source.create_run(experiment_id, tags={PARENT_RUN_TAG: parent.info.run_id})
+        source.set_terminated(child.info.run_id)
+        running = source.create_run(experiment_id)
+        source.set_terminated(parent.info.run_id)
+
+        synced = SpoolSync(self.spool, self.target).sync()
+        synced_again = SpoolSync(self.spool, self.target).sync()
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(synced, synced_again)
+        self.assertEqual(set(synced.keys()), {parent.info.run_id, child.info.run_id})
+        self.assertNotIn(running.info.run_id, synced)
+
+        target = MlflowClient(tracking_uri=self.target)
+        experiment = target.get_experiment_by_name("experiment")
+        self.assertEqual(len(target.search_runs([experiment.experiment_id], run_view_type=ViewType.ALL)), 2)
+
+        run = target.get_run(synced[parent.info.run_id])
+        self.assertEqual(run.info.status, "FINISHED")
+        self.assertEqual(run.data.params, {"param": "1"})
+        self.assertEqual(run.data.tags[SPOOL_RUN_TAG], parent.info.run_id)
+        self.assertEqual(run.data.tags[SPOOL_SYNCED_TAG], "true")
+        self.assertEqual([m.value for m in target.get_metric_history(run.info.run_id, "metric")], [0., .5, 1.])
+        self.assertEqual([a.path for a in target.list_artifacts(run.info.run_id)], ["data.txt"])
+        self.assertEqual(target.get_run(synced[child.info.run_id]).data.tags[PARENT_RUN_TAG], run.info.run_id)
+        # !-------------------------- asserts ---------------------------
+
+    def test_sync_documents(self):
+        """
+        This example will check if the metadata documents of an offline run reference the synced runs after a sync.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        from pypads.app.base import PyPads
+        from pypads.app.backends.mlflow import LocalMlFlowBackend
+        from pypads.app.pypads import current_pads
+        from pypads.utils.util import persistent_hash
+        tracker = PyPads(uri=self.target, folder=os.path.join(self.folder, "pads"),
+                         config={"mongo_db": False, "offline": True, "parallel_setups": False}, setup_fns={},
+                         autostart=True)
+        try:
+            tracker.api.log_metric("metric", 0.5)
+            run_id = tracker.api.active_run().info.run_id
+            tracker.api.end_run()
+            backend = tracker.backend
+        finally:
+            if current_pads:
+                current_pads.deactivate_tracking(run_atexits=True, reload_modules=False)
+
+        db = Database()
+        synced = SpoolSync(backend.uri, self.target, mongo_db=db).sync()
+
+        # --------------------------- asserts ---------------------------
+        self.assertIsInstance(backend, LocalMlFlowBackend)
+        self.assertEqual(backend.uri, os.path.join(self.folder, "pads", "spool"))
+        self.assertIn(run_id, synced)
+
+        target = MlflowClient(tracking_uri=self.target)
+        experiment_ids = {e.experiment_id for e in target.search_experiments(view_type=ViewType.ALL)}
+        documents = [d for c in db.values() for d in c.documents.values()]
+        self.assertTrue(any(d["run"]["uid"] == synced[run_id] for d in documents))
+
+        def check(entry):
+            if isinstance(entry, list):
+                for e in entry:
+                    check(e)
+            if not isinstance(entry, dict):
+                return
+            # No reference points to a run of the spool anymore
+            if isinstance(entry.get("run"), dict):
+                self.assertNotIn(entry["run"]["uid"], synced)
+            if isinstance(entry.get("experiment"), dict):
+                self.assertIn(entry["experiment"]["uid"], experiment_ids)
+            if entry.get("backend_uri") is not None:
+                self.assertEqual(entry["backend_uri"], self.target)
+                if "_id" in entry:
+                    self.assertEqual(entry["_id"], str(persistent_hash((self.target, entry["uid"]))))
+            for value in entry.values():
+                check(value)
+
+        for document in documents:
+            check(document)
+        # !-------------------------- asserts ---------------------------
@@ -0,0 +1,108 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from mlflow.tracking import MlflowClient
+
+from pypads.app.misc.wal import WriteAheadLog, recover_run, recover_runs
+
+
+class WriteAheadLogTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def test_read_partial(self):
+        """
+        This example will check if a partially written last record is ignored.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        path = os.path.join(self.folder, "run.wal")
+        wal = WriteAheadLog(path, sync_records=2)
+        for i in range(3):
+            wal.append("metric", key="m", value=float(i), step=0, timestamp=i)
+        with open(path, "a") as f:
+            f.write('{"kind": "metric", "ke')
+
+        # --------------------------- asserts ---------------------------
+        records = WriteAheadLog.read(path)
+        self.assertEqual([r["value"] for r in records], [0., 1., 2.])
+        wal.close()
+        self.assertFalse(os.path.exists(path))
+        # !-------------------------- asserts ---------------------------
+
+    def test_recover(self):
+        """
+        This example will check if a run of a killed process is finalized from its log.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        uri = os.path.join(self.folder, "mlruns")
+        client = MlflowClient(tracking_uri=uri)
+        run = client.create_run(client.create_experiment("experiment"))
+        run_id = run.info.run_id
+        client.log_metric(run_id, "m", 1., timestamp=1, step=0)
+        tmp_folder = os.path.join(self.folder, "tmp")
+        os.makedirs(tmp_folder)
+        with open(os.path.join(tmp_folder, "stdout.txt"), "w") as f:
+            f.write("captured")
+
+        path = os.path.join(self.folder, "wal", run_id + ".wal")
+        wal = WriteAheadLog(path)
+        wal.append("run", run_id=run_id, experiment_id=run.info.experiment_id, uri=uri, pid=-1, host="",
+                   tmp_folder=tmp_folder)
+        wal.append("param", key="p", value=1)
+        wal.append("metric", key="m", value=1., step=0, timestamp=1)
+        wal.append("metric", key="m", value=2., step=0, timestamp=2)
+        wal.append("probe", name="cpu", columns=["usage"])
+        wal.append("sample", probe="cpu", timestamp=1., values=[50.])
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(recover_run(path), run_id)
+        run = client.get_run(run_id)
+        self.assertEqual(run.info.status, "KILLED")
+        self.assertEqual(run.data.params, {"p": "1"})
+        self.assertEqual([m.value for m in client.get_metric_history(run_id, "m")], [1., 2.])
+        self.assertEqual({a.path for a in client.list_artifacts(run_id, "recovered")},
+                         {"recovered/hardware", "recovered/stdout.txt"})
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(tmp_folder))
+        # !-------------------------- asserts ---------------------------
+
+    def test_recover_spooled(self):
+        """
+        This example will check if the logs of spooled operations are only replayed if asked for.
+        :return:
+        """
+        # --------------------------- setup of the test ---------------------------
+        uri = os.path.join(self.folder, "mlruns")
+        client = MlflowClient(tracking_uri=uri)
+        run = client.create_run(client.create_experiment("experiment"))
+        run_id = run.info.run_id
+        client.set_terminated(run_id)
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+
+        path = os.path.join(self.folder, "wal", run_id + ".wal")
+        wal = WriteAheadLog(path)
+        wal.append("run", run_id=run_id, experiment_id=run.info.experiment_id, uri=uri, pid=process.pid,
+                   host=socket.gethostname(), tmp_folder=os.path.join(self.folder, "tmp"))
+        wal.append("param", key="p", value=1)
+        wal.spool("log_param")
+        wal.close(remove=False)
+
+        # --------------------------- asserts ---------------------------
+        self.assertEqual(recover_runs(self.folder, spooled=False), [])
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(recover_runs(self.folder), [run_id])
+        self.assertEqual(client.get_run(run_id).data.params, {"p": "1"})
+        self.assertFalse(os.path.exists(path))
+        # !-------------------------- asserts ---------------------------